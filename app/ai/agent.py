@@ -1,42 +1,67 @@
+import logging
+from functools import lru_cache
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
+from app.ai.checkpoint import get_checkpointer
 from app.ai.state import AgentState
+from app.config import settings
 from app.rag.chain import (
+    parse_assessment,
     assess_question_node,
     request_clarification_node,
+    await_clarification_node,
     retrieve_documents_node,
     assess_answer_quality_node,
     generate_answer_node,
     filter_and_sanitize_node,
     create_final_report_node,
+    create_fused_report_node,
+    aassess_question_node,
+    arequest_clarification_node,
+    aawait_clarification_node,
+    aretrieve_documents_node,
+    aassess_answer_quality_node,
+    agenerate_answer_node,
+    afilter_and_sanitize_node,
+    acreate_final_report_node,
+    acreate_fused_report_node,
+    lookup_answer_cache_node,
+    store_answer_cache_node,
+    alookup_answer_cache_node,
+    astore_answer_cache_node,
 )
 
+logger = logging.getLogger(__name__)
+
 # 최대 재시도 횟수 설정 (재질문, 재검색에 각각 적용)
 MAX_RETRIES = 1
 
 
+def _node(name: str, func, afunc) -> RunnableLambda:
+    """동기/비동기 구현을 함께 가진 노드를 만듭니다. `invoke/stream`과 `ainvoke/astream` 모두에서 실행됩니다."""
+    return RunnableLambda(func, afunc=afunc, name=name)
+
+
 def route_after_question_assessment(state: AgentState) -> str:
     """
     '질문 분석' 노드 실행 후, 정보가 충분한지에 따라 다음 경로를 결정합니다.
     - sufficient: 정보 충분 -> 문서 검색 단계로 진행
     - insufficient: 정보 불충분 -> 재질문 또는 (횟수 초과 시) 강제 진행
     """
-    assessment_result = state.get("assessment_result", "").lower().strip()
+    # 한 토큰 출력, 따옴표/마침표가 붙은 출력, 일괄 처리에서 미리 계산한 값 모두 같은 기준으로 판별합니다.
+    assessment_result = parse_assessment(state.get("assessment_result"))
     
     if assessment_result == "sufficient":
-        print("✅ 경로 결정: 정보 충분. '문서 검색'으로 이동합니다.")
-        # 다음 단계를 위해 재시도 횟수를 초기화합니다.
-        state['retries'] = 0
+        logger.info("✅ 경로 결정: 정보 충분. '문서 검색'으로 이동합니다.")
         return "retrieve_documents"
     else:
-        # 재질문 횟수를 확인합니다.
+        # 재질문 횟수를 확인합니다. (횟수는 '추가 정보 요청' 노드가 갱신하고, 세션에서는 다음 턴으로 이어집니다)
         if state.get('retries', 0) >= MAX_RETRIES:
-            print(f"⚠️ 경로 결정: 최대 재질문 횟수({MAX_RETRIES}회) 도달. '문서 검색'을 강제 실행합니다.")
-            state['retries'] = 0 # 재검색을 위해 카운터 초기화
+            logger.info("⚠️ 경로 결정: 최대 재질문 횟수(%d회) 도달. '문서 검색'을 강제 실행합니다.", MAX_RETRIES)
             return "retrieve_documents"
         else:
-            print("▶️ 경로 결정: 정보 불충분. '추가 정보 요청'으로 이동합니다.")
-            # 재질문 시도 횟수를 여기서 직접 업데이트합니다.
-            state['retries'] = state.get('retries', 0) + 1
+            logger.info("▶️ 경로 결정: 정보 불충분. '추가 정보 요청'으로 이동합니다.")
             return "request_clarification"
 
 def route_after_quality_assessment(state: AgentState) -> str:
@@ -45,70 +70,184 @@ def route_after_quality_assessment(state: AgentState) -> str:
     - sufficient: 품질 충분 -> 답변 생성 단계로 진행
     - insufficient: 품질 불충분 -> 재검색 또는 (횟수 초과 시) 강제 진행
     """
-    assessment_result = state.get("assessment_result", "").lower()
+    assessment_result = parse_assessment(state.get("assessment_result"))
 
     if assessment_result == "sufficient":
-        print("✅ 경로 결정: 문서 품질 충분. '답변 생성'으로 이동합니다.")
+        logger.info("✅ 경로 결정: 문서 품질 충분. '답변 생성'으로 이동합니다.")
         return "generate_answer"
     else:
         # 재검색 횟수를 확인합니다.
         if state.get('retries', 0) >= MAX_RETRIES:
-            print(f"⚠️ 경로 결정: 최대 재검색 횟수({MAX_RETRIES}회) 도달. '답변 생성'을 강제 실행합니다.")
+            logger.info("⚠️ 경로 결정: 최대 재검색 횟수(%d회) 도달. '답변 생성'을 강제 실행합니다.", MAX_RETRIES)
             return "generate_answer"
         else:
-            print(f"▶️ 경로 결정: 문서 품질 불충분. '문서 검색'을 다시 시도합니다. (시도 {state.get('retries', 0) + 1}/{MAX_RETRIES})")
-            state['retries'] = state.get('retries', 0) + 1
+            # 재검색 횟수는 '문서 검색' 노드가 갱신합니다.
+            logger.info("▶️ 경로 결정: 문서 품질 불충분. '문서 검색'을 다시 시도합니다. (시도 %d/%d)",
+                        state.get('retries', 0) + 1, MAX_RETRIES)
             return "retrieve_documents"
 
 
-def build_agent_workflow():
+def route_after_quality_assessment_parallel(state: AgentState):
+    """
+    병렬 모드용 분기 함수. 품질이 충분하면 '답변 생성'과 '민원 내용 정제'를 동시에 실행합니다.
+    두 노드는 서로 다른 필드(assistant_answer, cleaned_question)만 갱신하므로 상태 병합 시 충돌하지 않습니다.
+    """
+    next_node = route_after_quality_assessment(state)
+    if next_node == "generate_answer":
+        return ["generate_answer", "filter_and_sanitize"]
+    return next_node
+
+
+def route_after_answer_cache(state: AgentState) -> str:
+    """
+    '답변 캐시 조회' 노드 실행 후 다음 경로를 결정합니다.
+    - 적중: 캐시된 검색 문서/답변 초안으로 바로 '최종 보고서 생성'
+    - 미스: 일반 경로('문서 검색')로 진행
+    """
+    if state.get("answer_cache_hit"):
+        logger.info("✅ 경로 결정: 답변 캐시 적중. '최종 보고서 생성'으로 이동합니다.")
+        return "create_final_report"
+    return "retrieve_documents"
+
+
+def build_agent_workflow(parallel_answer_and_sanitize: bool = None, answer_cache: bool = None, checkpointer=None,
+                         fused_report: bool = None):
     """
     LangGraph 워크플로우를 정의하고 모든 노드와 엣지를 연결한 후,
     컴파일된 에이전트(그래프)를 반환합니다.
+
+    Args:
+        parallel_answer_and_sanitize: True면 '답변 생성'과 '민원 내용 정제'를 병렬로 실행합니다.
+            None이면 `settings.PARALLEL_ANSWER_AND_SANITIZE`를 따릅니다.
+        answer_cache: True면 '민원 내용 정제'를 먼저 실행하고 시맨틱 답변 캐시를 조회합니다.
+            적중 시 검색/품질 평가/답변 생성을 건너뜁니다. (이 경우 병렬 옵션은 사용하지 않습니다)
+            None이면 `settings.ANSWER_CACHE_ENABLED`를 따릅니다.
+        checkpointer: 지정하면 실행 상태를 `thread_id`별로 저장합니다. 재질문 후 '답변 대기' 노드에서 멈추고,
+            같은 세션의 다음 입력(`Command(resume=답변)`)이 오면 저장된 상태에서 이어서 실행합니다.
+        fused_report: True면 '답변 생성', '민원 내용 정제', '최종 보고서 생성' 대신 '통합 보고서 생성' 노드에서
+            구조화된 출력(JSON) LLM 호출 한 번으로 답변/정제된 민원/담당자 정보를 만들고 `final_report`를 채웁니다.
+            (병렬 옵션보다 우선하며, 답변 캐시 모드에서는 사용하지 않습니다)
+            None이면 `settings.FUSED_FINAL_REPORT`를 따릅니다.
     """
+    if parallel_answer_and_sanitize is None:
+        parallel_answer_and_sanitize = settings.PARALLEL_ANSWER_AND_SANITIZE
+    if answer_cache is None:
+        answer_cache = settings.ANSWER_CACHE_ENABLED
+    if fused_report is None:
+        fused_report = settings.FUSED_FINAL_REPORT
+    fused_report = fused_report and not answer_cache
+
     workflow = StateGraph(AgentState)
 
     # 1. 노드 정의
-    workflow.add_node("assess_question", assess_question_node)
-    workflow.add_node("request_clarification", request_clarification_node)
-    workflow.add_node("retrieve_documents", retrieve_documents_node)
-    workflow.add_node("assess_answer_quality", assess_answer_quality_node)
-    workflow.add_node("generate_answer", generate_answer_node)
-    workflow.add_node("filter_and_sanitize", filter_and_sanitize_node)
-    workflow.add_node("create_final_report", create_final_report_node)
+    workflow.add_node("assess_question", _node("assess_question", assess_question_node, aassess_question_node))
+    workflow.add_node("request_clarification", _node("request_clarification", request_clarification_node, arequest_clarification_node))
+    workflow.add_node("retrieve_documents", _node("retrieve_documents", retrieve_documents_node, aretrieve_documents_node))
+    workflow.add_node("assess_answer_quality", _node("assess_answer_quality", assess_answer_quality_node, aassess_answer_quality_node))
+    if fused_report:
+        workflow.add_node("create_fused_report", _node("create_fused_report", create_fused_report_node, acreate_fused_report_node))
+    else:
+        workflow.add_node("generate_answer", _node("generate_answer", generate_answer_node, agenerate_answer_node))
+        workflow.add_node("filter_and_sanitize", _node("filter_and_sanitize", filter_and_sanitize_node, afilter_and_sanitize_node))
+        workflow.add_node("create_final_report", _node("create_final_report", create_final_report_node, acreate_final_report_node))
+    if answer_cache:
+        workflow.add_node("lookup_answer_cache", _node("lookup_answer_cache", lookup_answer_cache_node, alookup_answer_cache_node))
+        workflow.add_node("store_answer_cache", _node("store_answer_cache", store_answer_cache_node, astore_answer_cache_node))
 
     # 2. 엣지 연결
     workflow.set_entry_point("assess_question")
 
-    # '질문 분석' 후의 조건부 분기
+    # '질문 분석' 후의 조건부 분기 (답변 캐시 모드에서는 검색 전에 '민원 내용 정제'부터 실행)
     workflow.add_conditional_edges(
         "assess_question",
         route_after_question_assessment,
-        {"request_clarification": "request_clarification", "retrieve_documents": "retrieve_documents"},
+        {
+            "request_clarification": "request_clarification",
+            "retrieve_documents": "filter_and_sanitize" if answer_cache else "retrieve_documents",
+        },
     )
-    workflow.add_edge("request_clarification", END)
+    if checkpointer is None:
+        workflow.add_edge("request_clarification", END)
+    else:
+        # 세션: 재질문 후 답변을 기다리며 멈추고, 답변이 오면 같은 스레드에서 '질문 분석'부터 이어서 실행합니다.
+        workflow.add_node("await_clarification", _node("await_clarification", await_clarification_node, aawait_clarification_node))
+        workflow.add_edge("request_clarification", "await_clarification")
+        workflow.add_edge("await_clarification", "assess_question")
     
     # '문서 검색' 후 -> '품질 평가'
     workflow.add_edge("retrieve_documents", "assess_answer_quality")
 
-    # '품질 평가' 후의 조건부 분기
-    workflow.add_conditional_edges(
-        "assess_answer_quality",
-        route_after_quality_assessment,
-        {"retrieve_documents": "retrieve_documents", "generate_answer": "generate_answer"},
-    )
-    
-    # '답변 생성' 후 -> '민원 내용 정제' (두 작업은 병렬로도 가능하지만, 순차적으로 진행하여 흐름을 명확히 함)
-    workflow.add_edge("generate_answer", "filter_and_sanitize")
-    
-    # '민원 내용 정제' 후 -> '최종 보고서 생성'
-    workflow.add_edge("filter_and_sanitize", "create_final_report")
+    if answer_cache:
+        # '민원 내용 정제' 후 -> '답변 캐시 조회' -> 적중 시 '최종 보고서 생성', 미스 시 '문서 검색'
+        workflow.add_edge("filter_and_sanitize", "lookup_answer_cache")
+        workflow.add_conditional_edges(
+            "lookup_answer_cache",
+            route_after_answer_cache,
+            {"create_final_report": "create_final_report", "retrieve_documents": "retrieve_documents"},
+        )
+        workflow.add_conditional_edges(
+            "assess_answer_quality",
+            route_after_quality_assessment,
+            {"retrieve_documents": "retrieve_documents", "generate_answer": "generate_answer"},
+        )
+
+        # '답변 생성' 후 -> '답변 캐시 저장' -> '최종 보고서 생성'
+        workflow.add_edge("generate_answer", "store_answer_cache")
+        workflow.add_edge("store_answer_cache", "create_final_report")
+    elif fused_report:
+        # '품질 평가' 후 -> '통합 보고서 생성' (답변/정제/보고서를 한 번에 생성한 뒤 종료)
+        workflow.add_conditional_edges(
+            "assess_answer_quality",
+            route_after_quality_assessment,
+            {"retrieve_documents": "retrieve_documents", "generate_answer": "create_fused_report"},
+        )
+        workflow.add_edge("create_fused_report", END)
+    elif parallel_answer_and_sanitize:
+        # '품질 평가' 후 -> '답변 생성'과 '민원 내용 정제'로 동시에 분기
+        workflow.add_conditional_edges(
+            "assess_answer_quality",
+            route_after_quality_assessment_parallel,
+            {
+                "retrieve_documents": "retrieve_documents",
+                "generate_answer": "generate_answer",
+                "filter_and_sanitize": "filter_and_sanitize",
+            },
+        )
+
+        # 두 분기가 모두 끝나면 '최종 보고서 생성'에서 합류
+        workflow.add_edge(["generate_answer", "filter_and_sanitize"], "create_final_report")
+    else:
+        # '품질 평가' 후의 조건부 분기
+        workflow.add_conditional_edges(
+            "assess_answer_quality",
+            route_after_quality_assessment,
+            {"retrieve_documents": "retrieve_documents", "generate_answer": "generate_answer"},
+        )
+
+        # '답변 생성' 후 -> '민원 내용 정제' (순차 모드: 흐름을 명확히 하기 위해 차례로 진행)
+        workflow.add_edge("generate_answer", "filter_and_sanitize")
+
+        # '민원 내용 정제' 후 -> '최종 보고서 생성'
+        workflow.add_edge("filter_and_sanitize", "create_final_report")
     
     # '최종 보고서 생성' 후 그래프 종료
-    workflow.add_edge("create_final_report", END)
+    if not fused_report:
+        workflow.add_edge("create_final_report", END)
 
     # 3. 그래프 컴파일
-    print("🤖 LangGraph 워크플로우를 컴파일합니다...")
-    agent = workflow.compile()
-    print("✅ 에이전트 컴파일 완료!")
-    return agent
\ No newline at end of file
+    logger.info("🤖 LangGraph 워크플로우를 컴파일합니다...")
+    agent = workflow.compile(checkpointer=checkpointer)
+    logger.info("✅ 에이전트 컴파일 완료!")
+    return agent
+
+
+@lru_cache(maxsize=None)
+def get_compiled_agent(parallel_answer_and_sanitize: bool = None, answer_cache: bool = None, sessions: bool = False,
+                       fused_report: bool = None):
+    """
+    컴파일된 에이전트를 (그래프 옵션별로) 프로세스당 한 번만 생성하여 재사용합니다.
+    컴파일된 그래프는 요청 간 상태를 공유하지 않으므로 여러 스레드/비동기 작업에서 동시에 실행해도 안전합니다.
+    `sessions`가 True면 SQLite 체크포인트 저장소와 '답변 대기' 노드를 붙여 컴파일합니다. (실행 시 `thread_id` 필요)
+    """
+    checkpointer = get_checkpointer() if sessions else None
+    return build_agent_workflow(parallel_answer_and_sanitize, answer_cache, checkpointer, fused_report)
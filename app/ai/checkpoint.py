@@ -0,0 +1,360 @@
+"""
+SQLite 기반 LangGraph 체크포인트 저장소
+민원인별 대화(thread_id)의 `AgentState`를 저장합니다. 재질문 후 '답변 대기' 노드에서 멈춘(`interrupt`) 실행은
+추가 답변이 오면 `Command(resume=답변)`으로 멈춘 지점부터 이어서 실행합니다.
+
+저장 구조는 LangGraph의 `InMemorySaver`와 같습니다.
+- checkpoints: 체크포인트 본문(채널 값 제외)과 메타데이터
+- blobs: 채널 값. (채널, 버전)별로 한 번만 저장하므로 바뀌지 않은 필드는 다시 저장하지 않습니다.
+- writes: 실행 중인 단계의 대기 중 쓰기(pending writes)
+
+스레드마다 최근 `keep_last`개 체크포인트만 남기고 오래된 체크포인트와 더 이상 참조되지 않는 채널 값은 삭제합니다.
+`ttl_seconds`를 지정하면 그 시간 동안 저장이 없던 스레드(답하지 않은 재질문 세션)를 통째로 삭제합니다.
+정리는 저장할 때 `SWEEP_INTERVAL_SECONDS`마다 한 번씩 합니다.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from app.config import settings
+
+# 오래된 스레드를 정리하는 최소 간격
+SWEEP_INTERVAL_SECONDS = 600.0
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver):
+    """
+    하나의 SQLite 파일에 체크포인트를 저장하는 LangGraph 체크포인터입니다.
+    연결 하나를 잠금으로 보호하여 여러 스레드에서 공유하고, 비동기 메서드는 스레드 풀에서 실행합니다.
+    """
+
+    def __init__(self, path: str, keep_last: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        super().__init__()
+        self.path = path
+        self.keep_last = keep_last
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._swept_at = 0.0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+            """
+        )
+        # 스레드 목록이 없던 이전 파일의 스레드는 지금부터 만료 시간을 셉니다.
+        self._conn.execute("INSERT OR IGNORE INTO threads SELECT DISTINCT thread_id, ? FROM checkpoints", (time.time(),))
+
+    # --- 내부 도우미 ---
+
+    def _load_channel_values(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            row = self._conn.execute(
+                "SELECT type, value FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row and row[0] != "empty":
+                values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint_blob))
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_channel_values(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_checkpoint_id,
+                }}
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, v))) for task_id, channel, t, v in writes],
+        )
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        """최근 `keep_last`개를 넘는 체크포인트와 그 쓰기, 남은 체크포인트가 참조하지 않는 채널 값을 삭제합니다."""
+        stale = [row[0] for row in self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+            " ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.keep_last),
+        )]
+        if not stale:
+            return
+        for table in ("checkpoints", "writes"):
+            self._conn.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in stale],
+            )
+        referenced = set()
+        for type_, blob in self._conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ):
+            versions = self.serde.loads_typed((type_, blob))["channel_versions"]
+            referenced.update((channel, str(version)) for channel, version in versions.items())
+        unused = [
+            (thread_id, checkpoint_ns, channel, version)
+            for channel, version in self._conn.execute(
+                "SELECT channel, version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            )
+            if (channel, version) not in referenced
+        ]
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?", unused
+        )
+
+    def _delete_threads(self, thread_ids: Sequence[str]) -> None:
+        for table in ("checkpoints", "blobs", "writes", "threads"):
+            self._conn.executemany(f"DELETE FROM {table} WHERE thread_id = ?", [(thread_id,) for thread_id in thread_ids])
+
+    def _sweep(self, now: float) -> None:
+        """`ttl_seconds` 동안 저장이 없던 스레드를 삭제합니다. 호출자는 `_lock`을 잡고 있어야 합니다."""
+        if not self.ttl_seconds or now - self._swept_at < SWEEP_INTERVAL_SECONDS:
+            return
+        self._swept_at = now
+        idle = [row[0] for row in self._conn.execute(
+            "SELECT thread_id FROM threads WHERE updated_at < ?", (now - self.ttl_seconds,))]
+        if idle:
+            self._delete_threads(idle)
+
+    # --- BaseCheckpointSaver 구현 ---
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = ("SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+                 " FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?")
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(query + " AND checkpoint_id = ?",
+                                         (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+            else:
+                row = self._conn.execute(query + " ORDER BY checkpoint_id DESC LIMIT 1",
+                                         (thread_id, checkpoint_ns)).fetchone()
+            return self._to_tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint,"
+                 " metadata_type, metadata FROM checkpoints")
+        conditions, params = [], []
+        if config:
+            conditions.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                conditions.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            params.append(before_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                checkpoint_tuple = self._to_tuple(thread_id, checkpoint_ns, row)
+                if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                results.append(checkpoint_tuple)
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        blobs = []
+        for channel, version in new_versions.items():
+            type_, value = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), type_, value))
+        type_, checkpoint_blob = self.serde.dumps_typed(stored)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                     type_, checkpoint_blob, metadata_type, metadata_blob),
+                )
+                now = time.time()
+                self._conn.execute("INSERT OR REPLACE INTO threads VALUES (?, ?)", (thread_id, now))
+                if self.keep_last:
+                    self._prune(thread_id, checkpoint_ns)
+                self._sweep(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # 특수 채널(오류/인터럽트 등)은 덮어쓰고, 일반 쓰기는 이미 있으면 유지합니다. (InMemorySaver와 동일)
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, type_, blob, task_path))
+        with self._lock:
+            self._conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._delete_threads([thread_id])
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in results:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> SqliteCheckpointSaver:
+    """프로세스 전역 체크포인트 저장소를 반환합니다."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                _checkpointer = SqliteCheckpointSaver(settings.SESSION_DB_PATH, keep_last=settings.SESSION_CHECKPOINTS_KEPT,
+                                                      ttl_seconds=settings.SESSION_TTL_SECONDS)
+    return _checkpointer
@@ -0,0 +1,244 @@
+"""
+질문 분석 로컬 분류기
+'질문 분석' 노드의 sufficient/insufficient 판단을 문자 n-gram + 정규식(위치/시간/대상) 특징의
+로지스틱 회귀 모델로 먼저 예측합니다. 확신도가 임계값 이상이면 LLM 호출 없이 경로를 결정하고,
+불확실하면 기존대로 LLM에 맡깁니다.
+
+학습 데이터는 `QUESTION_DECISION_LOG_PATH`에 기록되는 LLM 판단 로그(JSONL)를 사용합니다.
+
+사용법:
+    python -m app.ai.question_classifier train --data logs/question_decisions.jsonl
+    python -m app.ai.question_classifier benchmark --data logs/question_decisions.jsonl
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import joblib
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import FeatureUnion, Pipeline
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+LABELS = ("insufficient", "sufficient")
+
+# 필수 정보(위치/시간/대상)를 나타내는 표현
+LOCATION_PATTERN = re.compile(
+    r"(\S+(시|도|구|군|동|읍|면|리|로|길|가)\s*\d*|\d+\s*(번지|번길|호)|아파트|빌라|오피스텔|주택|상가|학교|공원|역|"
+    r"교차로|사거리|골목|주차장|건물|앞|옆|근처|맞은편|입구)"
+)
+TIME_PATTERN = re.compile(
+    r"(\d+\s*(월|일|시|분)|오전|오후|새벽|아침|점심|저녁|밤|낮|심야|어제|오늘|그제|지난|매일|매주|주말|평일|"
+    r"요일|\d{4}[.\-/]\d{1,2}[.\-/]\d{1,2}|\d{1,2}:\d{2})"
+)
+TARGET_PATTERN = re.compile(
+    r"(주차|차량|자동차|오토바이|소음|층간|공사|쓰레기|무단\s*투기|흡연|담배|악취|불법|광고|현수막|노점|"
+    r"가게|식당|업소|공장|개|반려견|가로등|신호등|도로|보도|인도|파손|누수)"
+)
+
+
+class RegexFeatures(BaseEstimator, TransformerMixin):
+    """위치/시간/대상 정규식 일치 여부와 질문 길이를 수치 특징으로 만듭니다."""
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        rows = []
+        for text in X:
+            has_location = bool(LOCATION_PATTERN.search(text))
+            has_time = bool(TIME_PATTERN.search(text))
+            has_target = bool(TARGET_PATTERN.search(text))
+            rows.append([
+                has_location,
+                has_time,
+                has_target,
+                has_location and has_time and has_target,
+                min(len(text), 500) / 500,
+            ])
+        return np.asarray(rows, dtype=np.float64)
+
+
+def build_pipeline() -> Pipeline:
+    return Pipeline([
+        ("features", FeatureUnion([
+            ("char_ngrams", TfidfVectorizer(analyzer="char_wb", ngram_range=(1, 3), min_df=2, sublinear_tf=True)),
+            ("regex", RegexFeatures()),
+        ])),
+        ("classifier", LogisticRegression(max_iter=1000, class_weight="balanced")),
+    ])
+
+
+class QuestionClassifier:
+    """학습된 파이프라인을 감싸 확신도 기반으로 경로를 결정합니다."""
+
+    def __init__(self, pipeline: Pipeline, threshold: float):
+        self.pipeline = pipeline
+        self.threshold = threshold
+        self.decided = 0
+        self.deferred = 0
+
+    @classmethod
+    def load(cls, path: str, threshold: float) -> "QuestionClassifier":
+        return cls(joblib.load(path), threshold)
+
+    def predict(self, question: str) -> Tuple[str, float]:
+        """(라벨, 확신도)를 반환합니다."""
+        probabilities = self.pipeline.predict_proba([question])[0]
+        best = int(np.argmax(probabilities))
+        return str(self.pipeline.classes_[best]), float(probabilities[best])
+
+    def decide(self, question: str) -> Optional[str]:
+        """확신도가 임계값 이상이면 라벨을, 아니면 None(LLM에 위임)을 반환합니다."""
+        label, confidence = self.predict(question)
+        if confidence >= self.threshold:
+            self.decided += 1
+            return label
+        self.deferred += 1
+        return None
+
+    def decide_many(self, questions: List[str]) -> List[Optional[str]]:
+        """여러 질문을 한 번에 분류합니다. (일괄 처리용, 결과는 `decide`와 같음)"""
+        if not questions:
+            return []
+        probabilities = self.pipeline.predict_proba(questions)
+        labels = self.pipeline.classes_[np.argmax(probabilities, axis=1)]
+        decisions = [
+            str(label) if confidence >= self.threshold else None
+            for label, confidence in zip(labels, probabilities.max(axis=1))
+        ]
+        decided = sum(decision is not None for decision in decisions)
+        self.decided += decided
+        self.deferred += len(decisions) - decided
+        return decisions
+
+
+_classifier = None
+_classifier_missing = False
+_classifier_lock = threading.Lock()
+
+
+def get_question_classifier() -> Optional[QuestionClassifier]:
+    """설정에서 분류기를 켰고 모델 파일이 있으면 프로세스 전역 분류기를 반환합니다."""
+    global _classifier, _classifier_missing
+    if not settings.QUESTION_CLASSIFIER_ENABLED or _classifier_missing:
+        return None
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                if not os.path.exists(settings.QUESTION_CLASSIFIER_PATH):
+                    logger.warning("⚠️ 질문 분류기 모델이 없어 LLM만 사용합니다: %s", settings.QUESTION_CLASSIFIER_PATH)
+                    _classifier_missing = True
+                    return None
+                _classifier = QuestionClassifier.load(
+                    settings.QUESTION_CLASSIFIER_PATH, settings.QUESTION_CLASSIFIER_THRESHOLD
+                )
+    return _classifier
+
+
+_decision_log_lock = threading.Lock()
+
+
+def log_question_decision(question: str, decision: str) -> None:
+    """LLM의 질문 분석 판단을 JSONL로 기록합니다. (분류기 학습/평가 데이터)"""
+    path = settings.QUESTION_DECISION_LOG_PATH
+    if not path:
+        return
+    record = json.dumps({"question": question, "label": decision, "ts": time.time()}, ensure_ascii=False)
+    with _decision_log_lock:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf8") as f:
+            f.write(record + "\n")
+
+
+def load_decisions(path: str) -> Tuple[List[str], List[str]]:
+    """판단 로그에서 (질문, 라벨) 목록을 읽습니다. 라벨은 LLM 출력을 정규화하여 사용합니다."""
+    questions, labels = [], []
+    with open(path, "r", encoding="utf8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            label = record["label"].strip().strip("`'\".").lower()
+            if label not in LABELS:
+                continue
+            questions.append(record["question"])
+            labels.append(label)
+    return questions, labels
+
+
+def train(data_path: str, output_path: str) -> None:
+    questions, labels = load_decisions(data_path)
+    print(f"학습 데이터 {len(questions)}건 (sufficient {labels.count('sufficient')}건)")
+    pipeline = build_pipeline()
+    pipeline.fit(questions, labels)
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    joblib.dump(pipeline, output_path)
+    print(f"모델을 '{output_path}'에 저장했습니다.")
+
+
+def benchmark(data_path: str, thresholds: List[float], test_size: float = 0.3) -> None:
+    """
+    판단 로그를 학습/평가로 나누어, 임계값별로
+    - 건너뛴 비율(skip rate): 분류기가 LLM 없이 결정한 비율
+    - 추가 오류율: 전체 평가 데이터 중 분류기 결정이 LLM 판단과 달라진 비율
+    - 분류기 결정 정확도: 분류기가 결정한 건 중 LLM 판단과 일치한 비율
+    을 출력합니다.
+    """
+    questions, labels = load_decisions(data_path)
+    train_q, test_q, train_y, test_y = train_test_split(
+        questions, labels, test_size=test_size, random_state=42, stratify=labels
+    )
+    pipeline = build_pipeline().fit(train_q, train_y)
+
+    start = time.perf_counter()
+    probabilities = pipeline.predict_proba(test_q)
+    per_question_ms = (time.perf_counter() - start) * 1000 / len(test_q)
+    predicted = pipeline.classes_[np.argmax(probabilities, axis=1)]
+    confidence = probabilities.max(axis=1)
+    expected = np.asarray(test_y)
+
+    print(f"\n학습 {len(train_q)}건 / 평가 {len(test_q)}건, 분류 지연 {per_question_ms:.3f}ms/건")
+    print(f"{'임계값':>6} {'건너뜀':>8} {'추가 오류':>9} {'결정 정확도':>10}")
+    for threshold in thresholds:
+        decided = confidence >= threshold
+        skip_rate = decided.mean()
+        added_error = (decided & (predicted != expected)).mean()
+        accuracy = (predicted[decided] == expected[decided]).mean() if decided.any() else float("nan")
+        print(f"{threshold:>6.2f} {skip_rate:>8.1%} {added_error:>9.2%} {accuracy:>10.2%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="질문 분석 로컬 분류기")
+    parser.add_argument("command", choices=["train", "benchmark"])
+    parser.add_argument("--data", default=settings.QUESTION_DECISION_LOG_PATH or "logs/question_decisions.jsonl")
+    parser.add_argument("--output", default=settings.QUESTION_CLASSIFIER_PATH)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.8, 0.9, 0.95, 0.99])
+    args = parser.parse_args()
+
+    if args.command == "train":
+        train(args.data, args.output)
+    else:
+        benchmark(args.data, args.thresholds)
+
+
+if __name__ == "__main__":
+    # `python -m`으로 실행하면 이 파일이 __main__이 되어 RegexFeatures가 __main__ 기준으로 저장되므로,
+    # 패키지 경로로 다시 import한 모듈에서 실행하여 서버에서도 모델을 불러올 수 있게 합니다.
+    from app.ai.question_classifier import main as _main
+    _main()
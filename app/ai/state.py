@@ -16,7 +16,13 @@ class AgentState(TypedDict):
         assessment_result: 노드 분기를 위한 판단 결과 (e.g., 'sufficient' or 'insufficient')
         final_report: 민원인용 답변과 담당자용 정보가 모두 포함된 최종 결과물(딕셔셔리)
         retries: 재시도 횟수 (재질문 또는 재검색)
+        context_tokens_saved: 컨텍스트 패킹(병합/중복 제거/토큰 예산)으로 줄인 프롬프트 토큰 수 (요청 누적)
+        documents_unchanged: 재검색 결과가 직전 검색 문서와 같은지 여부 (같으면 품질 평가 LLM 호출을 건너뜀)
+        answer_cache_hit: 시맨틱 답변 캐시에서 검색 문서/답변 초안을 재사용했는지 여부
         messages: 전체 대화 기록. `operator.add`를 사용하여 메시지가 덮어쓰이지 않고 계속 추가되도록 합니다.
+
+    병렬 모드에서 동시에 실행되는 노드들은 서로 다른 필드만 갱신해야 합니다.
+    (reducer가 없는 필드를 같은 단계에서 두 노드가 갱신하면 LangGraph가 InvalidUpdateError를 발생시킵니다.)
     """
     question: str
     cleaned_question: str
@@ -26,4 +32,7 @@ class AgentState(TypedDict):
     assessment_result: str
     final_report: Dict[str, Any]
     retries: int
+    documents_unchanged: bool
+    context_tokens_saved: int
+    answer_cache_hit: bool
     messages: Annotated[List[BaseMessage], operator.add]
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+에이전트 실행 추적 모듈
+LangChain 콜백으로 그래프 노드와 LLM 호출을 관찰하여, 요청 하나의 노드별
+실행 시간/대기 시간/토큰/비용/캐시 적중/재시도를 모으고 Prometheus 지표(`app.core.metrics`)에도 기록합니다.
+
+- 노드 실행: 이름이 `langgraph_node` 메타데이터와 같은 체인 실행을 노드로 봅니다.
+- 대기 시간: 직전 노드가 끝난(또는 실행을 시작한) 시각부터 이 노드가 시작되기까지의 시간입니다.
+- 토큰: 모델이 돌려준 사용량을 쓰고, 없으면(스트리밍/가짜 모델 등) 토큰 수를 근사합니다.
+- 캐시 적중: LLM 응답 캐시가 보내는 `llm_cache` 사용자 정의 이벤트로 집계합니다.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.config import settings
+from app.core import metrics
+from app.rag.context_packing import get_token_counter
+from app.rag.llm_cache import LLM_CACHE_EVENT
+
+
+def _usage(response) -> Optional[Tuple[int, int]]:
+    """LLM 결과에서 (프롬프트 토큰, 완성 토큰)을 꺼냅니다. 사용량 정보가 없으면 None을 반환합니다."""
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    if token_usage.get("prompt_tokens") is not None:
+        return token_usage["prompt_tokens"], token_usage.get("completion_tokens", 0)
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage["input_tokens"], usage["output_tokens"]
+    return None
+
+
+def _cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """모델 단가(`LLM_MODEL_PRICES_PER_1M`, 없으면 기본 단가)로 비용(USD)을 계산합니다."""
+    prompt_price, completion_price = settings.LLM_MODEL_PRICES_PER_1M.get(
+        model, (settings.LLM_PROMPT_PRICE_PER_1M, settings.LLM_COMPLETION_PRICE_PER_1M)
+    )
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class AgentTrace(BaseCallbackHandler):
+    """요청 하나의 실행 추적. 실행마다 새로 만들어 `callbacks`로 전달합니다."""
+
+    # 시간 측정이 정확하도록 비동기 실행에서도 이벤트를 바로 처리합니다. (처리 비용이 작음)
+    run_inline = True
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.outcome: Optional[str] = None
+        self.nodes: Dict[Tuple[str, Any], dict] = {}
+        self.retries = {"clarification": 0, "retrieval": 0}
+        self.tokens_estimated = False
+        self._last_end = self.started_at
+        self._node_runs: Dict[Any, Tuple[str, Any, float]] = {}
+        self._llm_runs: Dict[Any, Tuple[str, Any, Optional[str], float, list]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, node: str, step) -> dict:
+        entry = self.nodes.get((node, step))
+        if entry is None:
+            entry = self.nodes[(node, step)] = {
+                "node": node, "wall_ms": 0.0, "queue_ms": 0.0, "llm_calls": 0, "llm_ms": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "cache_hits": 0, "error": False,
+            }
+        return entry
+
+    # --- 노드 ---
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        if node is None or kwargs.get("name") != node:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            # 그래프가 노드를 감싼 실행과 노드 함수 실행이 같은 이름이므로 바깥 실행만 셉니다.
+            parent = self._node_runs.get(kwargs.get("parent_run_id"))
+            if parent is not None and parent[0] == node:
+                return
+            queue = max(0.0, now - self._last_end)
+            self._node_runs[run_id] = (node, metadata.get("langgraph_step"), now)
+            self._entry(node, metadata.get("langgraph_step"))["queue_ms"] = queue * 1000
+        metrics.NODE_QUEUE.observe(queue, node=node)
+
+    def _end_node(self, run_id, outputs, error: bool) -> None:
+        with self._lock:
+            run = self._node_runs.pop(run_id, None)
+            if run is None:
+                return
+            node, step, started = run
+            now = time.perf_counter()
+            self._last_end = now
+            entry = self._entry(node, step)
+            entry["wall_ms"] = (now - started) * 1000
+            entry["error"] = error
+            retry_kind = None
+            if not error and node == "request_clarification":
+                retry_kind = "clarification"
+            elif not error and node == "retrieve_documents" and (outputs or {}).get("retries", 0) > 0:
+                retry_kind = "retrieval"
+            if retry_kind:
+                self.retries[retry_kind] += 1
+        metrics.NODE_DURATION.observe(now - started, node=node)
+        if error:
+            metrics.NODE_ERRORS.inc(node=node)
+        if retry_kind:
+            metrics.RETRIES.inc(kind=retry_kind)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_node(run_id, outputs if isinstance(outputs, dict) else None, error=False)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_node(run_id, None, error=True)
+
+    # --- LLM 호출 ---
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node", "unknown")
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name")
+        with self._lock:
+            self._llm_runs[run_id] = (node, metadata.get("langgraph_step"), model, time.perf_counter(), messages)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            run = self._llm_runs.pop(run_id, None)
+        if run is None:
+            return
+        node, step, model, started, messages = run
+        seconds = time.perf_counter() - started
+        usage = _usage(response)
+        if usage is None:
+            counter = get_token_counter(settings.CONTEXT_TOKENIZER_ENCODING)
+            prompt = "".join(str(message.content) for batch in messages for message in batch)
+            completion = "".join(generation.text for generations in response.generations for generation in generations)
+            usage = (counter.count(prompt), counter.count(completion))
+            self.tokens_estimated = True
+        prompt_tokens, completion_tokens = usage
+        cost = _cost(model, prompt_tokens, completion_tokens)
+
+        with self._lock:
+            entry = self._entry(node, step)
+            entry["llm_calls"] += 1
+            entry["llm_ms"] += seconds * 1000
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["cost_usd"] += cost
+        metrics.LLM_DURATION.observe(seconds, node=node)
+        metrics.LLM_TOKENS.inc(prompt_tokens, node=node, kind="prompt")
+        metrics.LLM_TOKENS.inc(completion_tokens, node=node, kind="completion")
+        metrics.LLM_COST.inc(cost, node=node)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._llm_runs.pop(run_id, None)
+
+    # --- LLM 응답 캐시 ---
+
+    def on_custom_event(self, name, data, *, run_id, metadata=None, **kwargs):
+        if name != LLM_CACHE_EVENT or data.get("result") == "misses":
+            return
+        metadata = metadata or {}
+        with self._lock:
+            self._entry(data["node"], metadata.get("langgraph_step"))["cache_hits"] += 1
+
+    # --- 요약 ---
+
+    def finish(self, outcome: str) -> None:
+        """실행을 마치고 전체 실행 시간을 지표에 기록합니다. (outcome: completed|clarification|error)"""
+        self.finished_at = time.perf_counter()
+        self.outcome = outcome
+        metrics.REQUEST_DURATION.observe(self.finished_at - self.started_at, outcome=outcome)
+
+    def summary(self) -> dict:
+        """응답에 붙일 요청 단위 추적 요약"""
+        end = self.finished_at or time.perf_counter()
+        with self._lock:
+            nodes = [dict(entry, wall_ms=round(entry["wall_ms"], 2), queue_ms=round(entry["queue_ms"], 2),
+                          llm_ms=round(entry["llm_ms"], 2), cost_usd=round(entry["cost_usd"], 6))
+                     for entry in self.nodes.values()]
+        prompt_tokens = sum(node["prompt_tokens"] for node in nodes)
+        completion_tokens = sum(node["completion_tokens"] for node in nodes)
+        return {
+            "outcome": self.outcome,
+            "total_ms": round((end - self.started_at) * 1000, 2),
+            "llm_calls": sum(node["llm_calls"] for node in nodes),
+            "cache_hits": sum(node["cache_hits"] for node in nodes),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "cost_usd": round(sum(node["cost_usd"] for node in nodes), 6),
+            "retries": dict(self.retries),
+            "nodes": nodes,
+        }
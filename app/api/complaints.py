@@ -0,0 +1,106 @@
+import json
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter
+from pydantic import BaseModel
+from sse_starlette.sse import EventSourceResponse
+from starlette.background import BackgroundTask
+
+from app.ai.tracing import AgentTrace
+from app.config import settings
+from app.core.rate_limit import PRIORITY_IN_PROGRESS, PRIORITY_NEW, get_admission_controller
+from app.services.agent_service import arun_minone_agent, asession_in_progress, astream_minone_agent
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/complaints", tags=["complaints"])
+
+
+class ComplaintRequest(BaseModel):
+    question: str
+    # 재질문에 답할 때 이전 응답의 session_id를 보내면 재질문에서 멈춘 실행을 답변만 받아 이어서 처리합니다.
+    session_id: Optional[str] = None
+
+
+class ComplaintResponse(BaseModel):
+    answer: str
+    # True면 최종 보고서, False면 추가 정보 요청(재질문)입니다.
+    completed: bool
+    # 재질문일 때만 있습니다. 추가 답변을 보낼 때 함께 보내면 이어서 처리합니다.
+    session_id: Optional[str] = None
+    # 노드별 실행 시간/토큰/비용 요약 (TRACE_IN_RESPONSE가 True일 때만)
+    trace: Optional[Dict[str, Any]] = None
+
+
+def _session_id(request: ComplaintRequest) -> Optional[str]:
+    """요청의 세션 ID. 세션을 사용하는데 ID가 없으면 새 ID를 정합니다. (실행이 재질문으로 끝날 때만 세션이 저장됩니다)"""
+    if not settings.SESSION_ENABLED:
+        return None
+    return request.session_id or uuid.uuid4().hex
+
+
+async def _priority(request: ComplaintRequest) -> int:
+    """
+    재질문에 대한 추가 답변은 진행 중인 민원으로 새 민원보다 먼저 받습니다.
+    클라이언트가 보낸 session_id만 믿지 않고, 저장된 세션이 실제로 재질문에서 멈춘 경우에만 우선합니다.
+    """
+    return PRIORITY_IN_PROGRESS if await asession_in_progress(request.session_id) else PRIORITY_NEW
+
+
+@asynccontextmanager
+async def _admitted(request: ComplaintRequest):
+    """수락 제어(`ADMISSION_ENABLED`)를 통과한 동안 민원을 처리합니다. 받을 수 없으면 `OverloadedError`(503)"""
+    if not settings.ADMISSION_ENABLED:
+        yield
+        return
+    async with get_admission_controller().admit(await _priority(request)):
+        yield
+
+
+@router.post("", response_model=ComplaintResponse)
+async def create_complaint(request: ComplaintRequest) -> ComplaintResponse:
+    """민원을 접수하여 AI 에이전트를 실행하고, 최종 보고서 또는 재질문을 반환합니다."""
+    session_id = _session_id(request)
+    trace = AgentTrace()
+    async with _admitted(request):
+        answer = await arun_minone_agent(request.question, session_id, trace)
+    completed = "■" in answer
+    return ComplaintResponse(
+        answer=answer,
+        completed=completed,
+        session_id=None if completed else session_id,
+        trace=trace.summary() if settings.TRACE_IN_RESPONSE else None,
+    )
+
+
+@router.post("/stream")
+async def stream_complaint(request: ComplaintRequest) -> EventSourceResponse:
+    """
+    민원을 접수하고 처리 과정을 SSE로 스트리밍합니다.
+    노드 진행 상황(`node`), 최종 보고서/재질문 토큰(`token`), 최종 결과(`final`) 이벤트를 차례로 보냅니다.
+    수락 제어는 스트림을 시작하기 전에 하므로, 받을 수 없으면 SSE가 아닌 503 응답이 갑니다.
+    """
+    session_id = _session_id(request)
+    admission = get_admission_controller() if settings.ADMISSION_ENABLED else None
+    if admission is not None:
+        await admission.acquire(await _priority(request))
+    released = False
+
+    def release():
+        # 스트림이 끝나거나 오류가 나면 생성기에서, 시작 전에 연결이 끊기면 응답의 백그라운드 작업에서 한 번만 반납합니다.
+        nonlocal released
+        if admission is not None and not released:
+            released = True
+            admission.release()
+
+    async def event_generator():
+        try:
+            async for event in astream_minone_agent(request.question, session_id):
+                yield {"event": event["event"], "data": json.dumps(event["data"], ensure_ascii=False)}
+        finally:
+            release()
+
+    return EventSourceResponse(event_generator(), background=BackgroundTask(release))
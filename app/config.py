@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -15,6 +15,12 @@ class Settings(BaseSettings):
     LOG_FILE_BACKUP_COUNT: int = 5
     LOG_TO_FILE: bool = True
     LOG_TO_CONSOLE: bool = True
+    # queue: 별도 스레드에서 JSON Lines로 기록 (요청 경로를 막지 않음) | sync: 기존 동기 핸들러 | off: 로깅 끔
+    LOG_MODE: str = "queue"
+    LOG_JSON_FILE: str = "logs/app.jsonl"
+    # LLM 출력 같은 큰 본문 로그: 이 길이를 넘으면 WARNING 미만에서는 SAMPLE_RATE 비율만 전체를 기록
+    LOG_PAYLOAD_MAX_CHARS: int = 500
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.05
 
     # AI 설정
     OPENAI_API_KEY: Optional[str] = None
@@ -26,6 +32,192 @@ class Settings(BaseSettings):
 
     TAVILY_API_KEY: Optional[str] = None
 
+    # LLM 모델 설정 (모든 노드의 기본값)
+    LLM_MODEL: str = "gpt-4.1-mini"
+    LLM_TEMPERATURE: float = 0.1
+    LLM_MAX_TOKENS: Optional[int] = None
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    # 노드별 덮어쓸 값 (model, temperature, max_tokens, timeout). 환경 변수로는 전체를 JSON으로 지정합니다.
+    # 분기용 평가 노드는 한 단어만 필요하므로 작은 모델/짧은 제한 시간을 사용합니다.
+    # ('답변 품질 평가'는 법령 문서를 읽고 판단해야 하므로 모델은 기본값을 유지하고 출력 길이만 제한합니다)
+    LLM_NODE_SETTINGS: Dict[str, Dict[str, Any]] = {
+        "assess_question": {"model": "gpt-4.1-nano", "temperature": 0.0, "max_tokens": 5, "timeout": 10.0},
+        "assess_answer_quality": {"temperature": 0.0, "max_tokens": 5, "timeout": 15.0},
+        "request_clarification": {"max_tokens": 150, "timeout": 20.0},
+        "generate_answer": {"max_tokens": 1024},
+        "filter_and_sanitize": {"max_tokens": 300, "timeout": 30.0},
+        "create_final_report": {"max_tokens": 1500, "timeout": 90.0},
+        "create_fused_report": {"max_tokens": 2000, "timeout": 90.0},
+    }
+    # 분기용 평가 노드의 출력 방식
+    # token: 레이블 첫 토큰만 생성하도록 logit_bias + max_tokens=1로 제한 (토크나이저를 불러오지 못하면 text로 동작)
+    # text: 프롬프트 지시만으로 한 단어를 출력 (max_tokens는 LLM_NODE_SETTINGS를 따름)
+    LLM_CLASSIFICATION_MODE: str = "token"
+
+    # 속도 제한 설정 (프로세스 전역 스케줄러가 모델별 분당 요청/토큰 한도를 토큰 버킷으로 지킵니다)
+    # 켜면 ChatOpenAI/OpenAIEmbeddings의 자체 재시도를 끄고, 스케줄러를 거친 지터 백오프 재시도로 대신합니다.
+    RATE_LIMIT_ENABLED: bool = True
+    # 모델: {"rpm": 분당 요청 수, "tpm": 분당 토큰 수, "concurrency": 동시 호출 수(선택)}
+    # 계정 등급의 공급자 한도를 적습니다. 목록에 없는 모델은 "default" 항목을 따르고, 그것도 없으면 제한하지 않습니다.
+    RATE_LIMITS: Dict[str, Dict[str, int]] = {
+        "gpt-4.1": {"rpm": 500, "tpm": 30000},
+        "gpt-4.1-mini": {"rpm": 500, "tpm": 200000},
+        "gpt-4.1-nano": {"rpm": 500, "tpm": 200000},
+        "text-embedding-3-small": {"rpm": 3000, "tpm": 1000000},
+        "text-embedding-3-large": {"rpm": 3000, "tpm": 1000000},
+    }
+    RATE_LIMIT_HEADROOM: float = 0.9  # 공급자 한도의 이 비율까지만 사용 (추정 오차/다른 프로세스 여유)
+    RATE_LIMIT_BURST_SECONDS: float = 10.0  # 버킷에 쌓일 수 있는 최대 분량 (이 시간 동안의 한도)
+    RATE_LIMIT_CONCURRENCY: int = 32  # 모델별 동시 호출 수 기본값 (0이면 제한 없음)
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = 30.0  # 호출 하나가 버킷을 기다릴 최대 시간 (넘으면 503)
+    # max_tokens가 없는 호출의 완성 토큰 추정치 (토큰 한도 계산용)
+    RATE_LIMIT_DEFAULT_COMPLETION_TOKENS: int = 1000
+    # 429에 Retry-After가 없을 때 해당 모델의 모든 호출을 멈출 시간(초)
+    RATE_LIMIT_PAUSE_SECONDS: float = 1.0
+    # 일시적 오류(429, 시간 초과, 연결 오류, 5xx) 재시도: 최대 시도 횟수, 지터 지수 백오프 기준/최대 대기(초)
+    LLM_RETRY_ATTEMPTS: int = 4
+    LLM_RETRY_BASE_SECONDS: float = 0.5
+    LLM_RETRY_MAX_WAIT_SECONDS: float = 20.0
+
+    # 수락 제어 설정 (API 서버가 동시에 처리하는 민원 수 제한, 넘치면 대기열 -> 503 + Retry-After)
+    ADMISSION_ENABLED: bool = True
+    # 동시 처리 민원 수는 처리 용량(건/s = 한도 RPM x HEADROOM / 60 / 민원당 호출 수) x 목표 지연(초) 정도로 맞춥니다.
+    ADMISSION_MAX_IN_FLIGHT: int = 64
+    ADMISSION_MAX_QUEUE: int = 256
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    # 새 민원의 첫 LLM 호출이 속도 제한으로 이보다 오래 기다릴 것으로 예상되면 바로 거절합니다.
+    ADMISSION_MAX_ESTIMATED_WAIT_SECONDS: float = 15.0
+
+    # RAG 설정
+    VECTOR_STORE_PATH: str = "data/vector_store/faiss_index"
+    LAW_DATA_PATH: str = "data/laws"
+    # 실행 중인 서버가 인덱스 교체(매니페스트 `updated_at` 변경)를 확인하는 최소 간격
+    VECTOR_STORE_CHECK_INTERVAL_SECONDS: float = 5.0
+
+    # 검색 설정
+    RETRIEVER_MODE: str = "vector"  # vector: 벡터 검색 | hybrid: BM25 + 벡터 검색 (RRF 결합)
+    HYBRID_FETCH_K: int = 20  # 결합 전 BM25/벡터 검색에서 각각 가져올 후보 수
+    HYBRID_RRF_K: int = 60
+
+    # FAISS 인덱스 설정 (Flat | IVF-Flat | HNSW | IVF-PQ)
+    # Flat 이외 유형은 Flat 원본으로부터 index.ann.faiss를 만들어 검색에 사용합니다.
+    FAISS_INDEX_TYPE: str = "Flat"
+    FAISS_INDEX_MMAP: bool = True  # 인덱스를 읽기 전용 메모리 맵으로 열기
+    FAISS_IVF_NLIST: int = 1024  # 벡터 수가 적으면 자동으로 줄입니다.
+    FAISS_IVF_NPROBE: int = 16
+    FAISS_HNSW_M: int = 32
+    FAISS_HNSW_EF_CONSTRUCTION: int = 200
+    FAISS_HNSW_EF_SEARCH: int = 64
+    FAISS_PQ_M: int = 64  # 서브벡터 수 (임베딩 차원의 약수)
+    FAISS_PQ_NBITS: int = 8
+    # 청크 본문/메타데이터 저장 형식 (sqlite: 필요한 청크만 읽는 zstd 압축 SQLite | pickle: LangChain 기본 index.pkl)
+    # 로드 시에는 매니페스트에 기록된 형식을 따르므로, 기존 pickle 인덱스도 그대로 사용할 수 있습니다.
+    DOCSTORE_FORMAT: str = "sqlite"
+
+    # 샤드 인덱스 설정 (법령 분야별로 인덱스를 나누고, 질의 키워드로 고른 샤드만 동시에 검색)
+    # 샤드마다 `SHARDED_VECTOR_STORE_PATH/<샤드 이름>`에 독립된 인덱스/매니페스트를 저장하므로 샤드별로 다시 만들 수 있습니다.
+    SHARDED_INDEX_ENABLED: bool = False
+    SHARDED_VECTOR_STORE_PATH: str = "data/vector_store/shards"
+    # 샤드 이름: {"patterns": LAW_DATA_PATH 기준 PDF 경로의 glob 패턴, "keywords": 질의 라우팅 키워드}
+    # 어느 패턴에도 맞지 않는 PDF는 기본 샤드(`SHARD_DEFAULT`)에 들어갑니다.
+    SHARDS: Dict[str, Dict[str, List[str]]] = {
+        "traffic": {
+            "patterns": ["*도로교통*", "*주차장*", "traffic/*"],
+            "keywords": ["주차", "정차", "차량", "자동차", "도로", "교통", "신호", "횡단보도", "견인"],
+        },
+        "noise": {
+            "patterns": ["*소음*", "*진동*", "noise/*"],
+            "keywords": ["소음", "진동", "층간", "시끄", "확성기"],
+        },
+        "construction": {
+            "patterns": ["*건축*", "*주택*", "construction/*"],
+            "keywords": ["건축", "공사", "증축", "대수선", "철거", "건물", "가설"],
+        },
+        "environment": {
+            "patterns": ["*폐기물*", "*대기환경*", "*수질*", "environment/*"],
+            "keywords": ["쓰레기", "폐기물", "투기", "분리수거", "악취", "매연", "오염"],
+        },
+    }
+    SHARD_DEFAULT: str = "general"
+    # 라우팅 결과와 관계없이 항상 함께 검색할 샤드 (민원 처리 절차 등 공통 법령)
+    SHARD_ALWAYS_SEARCH: List[str] = ["general"]
+    SHARD_MAX_ROUTED: int = 2  # 키워드로 고를 최대 샤드 수 (맞는 키워드가 없으면 모든 샤드 검색)
+    SHARD_SEARCH_WORKERS: int = 4  # 샤드 동시 검색 스레드 수
+
+    # 컨텍스트 패킹 설정 (겹치는 청크 병합 + 중복 제거 + 토큰 예산)
+    CONTEXT_PACKING_ENABLED: bool = True
+    CONTEXT_TOKEN_BUDGET: int = 4000
+    CONTEXT_DEDUP_THRESHOLD: float = 0.8  # 짧은 쪽 구절의 5-gram 중 이 비율 이상이 겹치면 중복
+    CONTEXT_TOKENIZER_ENCODING: str = "o200k_base"  # gpt-4.1 계열 토크나이저
+
+    # 인덱스 빌드 설정
+    INDEX_BUILD_PARSE_WORKERS: int = 0  # PDF 파싱/분할 프로세스 수 (0이면 CPU 수)
+    INDEX_BUILD_EMBED_CONCURRENCY: int = 4  # 동시에 진행할 임베딩 배치 수
+    INDEX_BUILD_EMBED_BATCH_SIZE: int = 100
+
+    # 임베딩 설정 (openai: OpenAI 임베딩 API | local: 프로세스 안에서 계산하는 문자 n-gram 해싱 임베딩, CPU)
+    # 인덱스 매니페스트에 백엔드/모델/차원을 기록하므로, 설정과 다른 임베딩으로 만든 인덱스는 로드 시 오류가 납니다.
+    EMBEDDING_BACKEND: str = "openai"
+    EMBEDDING_MODEL: str = "text-embedding-3-small"  # openai 백엔드 모델
+    EMBEDDING_LOCAL_DIMENSION: int = 1024
+
+    # 임베딩 캐시 설정 (청크/질의 임베딩을 디스크에 저장하여 재사용)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "data/cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_BYTES: int = 536870912  # 512MB
+
+    # LLM 응답 캐시 설정 (같은 모델/파라미터/프롬프트의 응답을 디스크에 저장하여 재사용)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "data/cache/llm_responses.sqlite3"
+    LLM_CACHE_MAX_BYTES: int = 67108864  # 64MB
+    LLM_CACHE_TTL_SECONDS: int = 86400
+
+    # 시맨틱 답변 캐시 설정 (유사한 민원이면 검색 문서/답변 초안을 재사용)
+    ANSWER_CACHE_ENABLED: bool = False
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.93  # 코사인 유사도
+    ANSWER_CACHE_TTL_SECONDS: int = 86400
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+
+    # 질문 분석 로컬 분류기 설정 (확신도가 높으면 LLM 호출 없이 경로 결정)
+    QUESTION_CLASSIFIER_ENABLED: bool = False
+    QUESTION_CLASSIFIER_PATH: str = "data/models/question_classifier.joblib"
+    QUESTION_CLASSIFIER_THRESHOLD: float = 0.95
+    # LLM의 질문 분석 판단을 기록할 JSONL 경로 (분류기 학습용, 비우면 기록하지 않음)
+    QUESTION_DECISION_LOG_PATH: Optional[str] = None
+
+    # 에이전트 설정
+    # True면 '답변 생성'과 '민원 내용 정제'를 병렬 분기로 실행하고 '최종 보고서 생성'에서 합류합니다.
+    PARALLEL_ANSWER_AND_SANITIZE: bool = False
+    # True면 '답변 생성', '민원 내용 정제', '최종 보고서 생성'을 구조화된 출력(JSON) LLM 호출 한 번으로 대신하고
+    # `final_report`를 채웁니다. (병렬 옵션보다 우선하며, 답변 캐시 모드에서는 사용하지 않습니다)
+    FUSED_FINAL_REPORT: bool = False
+    # True면 문서 재검색 시 매번 검색 방식을 바꿉니다. (k 확대 + MMR 다양화 + 정제된 민원 내용으로 질의 확장)
+    # 재검색 결과가 이전과 같으면 '답변 품질 평가' LLM 호출을 건너뜁니다.
+    RETRY_ESCALATION_ENABLED: bool = True
+    RETRY_ESCALATION_K_STEP: int = 5  # 재검색 1회당 늘릴 검색 문서 수
+
+    # 대화 세션 설정 (민원인별 thread_id로 에이전트 상태를 저장하여 추가 답변 시 이어서 실행)
+    SESSION_ENABLED: bool = True
+    SESSION_DB_PATH: str = "data/sessions/checkpoints.sqlite3"
+    SESSION_CHECKPOINTS_KEPT: int = 20  # 세션마다 남길 최근 체크포인트 수 (0이면 모두 보관)
+    # 재질문에 답하지 않고 이 시간이 지난 세션은 삭제합니다. (0이면 보관) 최종 보고서가 나온 세션은 바로 삭제합니다.
+    SESSION_TTL_SECONDS: float = 86400.0
+
+    # 일괄 처리 설정 (python -m app.services.batch_service)
+    BATCH_CONCURRENCY: int = 8  # 동시에 실행할 민원 수
+    BATCH_PROGRESS_EVERY: int = 100  # 진행 상황을 출력할 처리 건수 간격
+
+    # 실행 추적/지표 설정 (노드별 지연·토큰·비용을 /metrics로 내보내고 응답에 요약을 붙임)
+    TRACE_IN_RESPONSE: bool = True
+    # 토큰 비용 계산 단가 (USD / 1M 토큰, [프롬프트, 완성]). 목록에 없는 모델은 아래 기본 단가(gpt-4.1-mini)를 사용합니다.
+    LLM_MODEL_PRICES_PER_1M: Dict[str, List[float]] = {
+        "gpt-4.1": [2.00, 8.00],
+        "gpt-4.1-mini": [0.40, 1.60],
+        "gpt-4.1-nano": [0.10, 0.40],
+    }
+    LLM_PROMPT_PRICE_PER_1M: float = 0.40
+    LLM_COMPLETION_PRICE_PER_1M: float = 1.60
+
     # CORS 설정
     ALLOWED_ORIGINS: list = ["*"]
 
@@ -1,30 +1,185 @@
 """
 로깅 설정 모듈
 콘솔과 파일에 동시에 로그를 기록하는 설정
+
+- queue 모드(기본): 로거에는 `QueueHandler`만 붙이고, 포맷/파일 쓰기는 `QueueListener` 스레드에서 처리합니다.
+  요청 처리 경로(이벤트 루프)는 레코드를 큐에 넣기만 하므로 디스크/콘솔 I/O로 막히지 않습니다.
+  파일은 JSON Lines 하나(`LOG_JSON_FILE`)로 기록합니다.
+- sync 모드: 기존처럼 핸들러마다 즉시 포맷하여 콘솔과 파일 3개에 기록합니다.
+
+LLM 출력처럼 큰 본문은 `log_payload`로 메시지와 분리하여 기록하며,
+WARNING 미만 레벨에서는 일부(`LOG_PAYLOAD_SAMPLE_RATE`)만 전체를 남기고 나머지는 앞부분만 남깁니다.
 """
+import atexit
 import logging
 import logging.config
+import logging.handlers
+import queue
+import random
+import sys
 from pathlib import Path
+from typing import Optional
+
+import orjson
+
+from app.config import settings
+
+# LogRecord 기본 속성 (이 밖의 속성은 `extra`로 전달된 값으로 보고 JSON에 포함합니다)
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class PayloadSampler(logging.Filter):
+    """
+    큰 본문(`payload`)을 레벨에 따라 샘플링합니다.
+    WARNING 이상은 항상 전체를 남기고, 그 미만은 `max_chars`를 넘는 본문 중 `sample_rate` 비율만 전체를 남깁니다.
+    나머지는 앞부분만 남기고 `payload_truncated`로 표시합니다. (레코드는 버리지 않습니다)
+    """
+
+    def __init__(self, max_chars: int, sample_rate: float):
+        super().__init__()
+        self.max_chars = max_chars
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        payload = getattr(record, "payload", None)
+        if (payload is None or record.levelno >= logging.WARNING or len(payload) <= self.max_chars
+                or random.random() < self.sample_rate):
+            return True
+        record.payload = payload[:self.max_chars]
+        record.payload_truncated = len(payload)
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """레코드를 orjson으로 한 줄 JSON으로 만듭니다. (`extra`로 전달한 필드 포함)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.module}:{record.lineno}",
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        # 예외 정보는 `QueueHandler.prepare`에서 이미 메시지에 포함됩니다.
+        return orjson.dumps(entry, default=str).decode("utf-8")
+
+
+class ConsoleFormatter(logging.Formatter):
+    """사람이 읽는 콘솔 형식. 본문(`payload`)이 있으면 메시지 다음 줄에 붙입니다."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        payload = getattr(record, "payload", None)
+        if payload is None:
+            return text
+        if getattr(record, "payload_truncated", None):
+            payload = f"{payload}... (전체 {record.payload_truncated}자 중 일부)"
+        return f"{text}\n{payload}"
 
 
-def setup_logging():
-    """로깅 설정을 초기화합니다."""
+def log_payload(logger: logging.Logger, level: int, message: str, payload: str, *args) -> None:
+    """
+    LLM 출력 같은 큰 본문을 기록합니다. 레벨이 꺼져 있으면 아무 것도 만들지 않습니다.
+    `message`는 `%` 형식 문자열이며 `args`로 지연 포맷됩니다.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, message, *args, extra={"payload": payload}, stacklevel=2)
+
+
+def _setup_queue_logging() -> None:
+    """`QueueHandler` -> `QueueListener`(별도 스레드) -> JSON Lines 파일/콘솔 구성을 적용합니다."""
+    global _listener
+    shutdown_logging()
+
+    handlers = []
+    if settings.LOG_TO_FILE:
+        Path(settings.LOG_JSON_FILE).parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            settings.LOG_JSON_FILE,
+            maxBytes=settings.LOG_FILE_MAX_SIZE,
+            backupCount=settings.LOG_FILE_BACKUP_COUNT,
+            encoding="utf8",
+        )
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
+    if settings.LOG_TO_CONSOLE:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(ConsoleFormatter("[{asctime}] {levelname:<8} {name}: {message}",
+                                                      style="{", datefmt="%Y-%m-%d %H:%M:%S"))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(PayloadSampler(settings.LOG_PAYLOAD_MAX_CHARS, settings.LOG_PAYLOAD_SAMPLE_RATE))
+
+    for name, level in (("app", settings.LOG_LEVEL), ("uvicorn", "INFO"), ("uvicorn.access", "INFO"),
+                        ("sqlalchemy.engine", "WARNING")):
+        logger = logging.getLogger(name)
+        logger.handlers[:] = [queue_handler]
+        logger.setLevel(level)
+        logger.propagate = False
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel("INFO")
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """큐에 남은 레코드를 모두 기록하고 리스너 스레드를 종료합니다. (queue 모드)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def setup_logging(mode: str = None):
+    """
+    로깅 설정을 초기화합니다.
+
+    Args:
+        mode: queue | sync | off (None이면 `settings.LOG_MODE`)
+    """
+    mode = mode or settings.LOG_MODE
 
     # 로그 디렉토리 생성
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
 
+    logging.disable(logging.CRITICAL if mode == "off" else logging.NOTSET)
+    if mode == "queue":
+        _setup_queue_logging()
+        logger = logging.getLogger("app")
+        logger.info("로깅 시스템이 초기화되었습니다. (queue 모드)")
+        logger.info("로그 파일 위치: %s", Path(settings.LOG_JSON_FILE).absolute())
+        return
+    shutdown_logging()
+
     # 로깅 설정 딕셔너리
     LOGGING_CONFIG = {
         "version": 1,
         "disable_existing_loggers": False,
         "formatters": {
             "default": {
+                "()": ConsoleFormatter,
                 "format": "[{asctime}] {levelname:<8} {name}: {message}",
                 "style": "{",
                 "datefmt": "%Y-%m-%d %H:%M:%S"
             },
             "detailed": {
+                "()": ConsoleFormatter,
                 "format": "[{asctime}] {levelname:<8} {name} [{filename}:{lineno}] {funcName}(): {message}",
                 "style": "{",
                 "datefmt": "%Y-%m-%d %H:%M:%S"
@@ -123,7 +278,7 @@ def setup_logging():
     # 앱 시작 로그
     logger = logging.getLogger("app")
     logger.info("로깅 시스템이 초기화되었습니다.")
-    logger.info(f"로그 파일 위치: {log_dir.absolute()}")
+    logger.info("로그 파일 위치: %s", log_dir.absolute())
 
 
 def get_logger(name: str = None) -> logging.Logger:
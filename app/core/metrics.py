@@ -0,0 +1,131 @@
+"""
+Prometheus 형식 지표 모듈
+카운터/히스토그램을 프로세스 메모리에 모아 `/metrics`에서 Prometheus 텍스트 형식(0.0.4)으로 내보냅니다.
+외부 의존성 없이 필요한 기능(라벨, 누적 버킷, 합계/개수)만 구현합니다.
+"""
+import bisect
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+# 초 단위 지연 시간 버킷 (LLM 호출 1회 ~ 요청 전체)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 값 -> (버킷별 개수(비누적), 합계, 개수)
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    bucket_labels = _labels(self.labelnames, key, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# --- 에이전트 지표 ---
+NODE_DURATION = registry.register(Histogram(
+    "minone_node_duration_seconds", "그래프 노드 실행 시간", ["node"]))
+NODE_QUEUE = registry.register(Histogram(
+    "minone_node_queue_seconds", "이전 단계가 끝난 뒤 노드가 시작되기까지 기다린 시간", ["node"]))
+NODE_ERRORS = registry.register(Counter(
+    "minone_node_errors_total", "노드 실행 오류 수", ["node"]))
+LLM_DURATION = registry.register(Histogram(
+    "minone_llm_duration_seconds", "LLM 호출 시간", ["node"]))
+LLM_TOKENS = registry.register(Counter(
+    "minone_llm_tokens_total", "LLM 토큰 수 (kind=prompt|completion)", ["node", "kind"]))
+LLM_COST = registry.register(Counter(
+    "minone_llm_cost_usd_total", "설정한 단가로 계산한 LLM 비용(USD)", ["node"]))
+LLM_CACHE = registry.register(Counter(
+    "minone_llm_cache_total", "LLM 응답 캐시 조회 결과 (result=hits|misses|coalesced)", ["node", "result"]))
+RETRIES = registry.register(Counter(
+    "minone_retries_total", "재시도 횟수 (kind=clarification|retrieval)", ["kind"]))
+REQUEST_DURATION = registry.register(Histogram(
+    "minone_agent_run_duration_seconds", "에이전트 실행 전체 시간 (outcome=completed|clarification|error)", ["outcome"]))
+RATE_LIMIT_WAIT = registry.register(Histogram(
+    "minone_rate_limit_wait_seconds", "속도 제한 스케줄러에서 호출이 기다린 시간 (priority=in_progress|new)",
+    ["model", "priority"]))
+UPSTREAM_RETRIES = registry.register(Counter(
+    "minone_upstream_retries_total", "공급자 오류로 다시 시도한 호출 수 (error=rate_limit|timeout|connection|server)",
+    ["model", "error"]))
+ADMISSIONS = registry.register(Counter(
+    "minone_admissions_total", "민원 수락 제어 결과 (result=admitted|queued|rejected)", ["priority", "result"]))
+HTTP_DURATION = registry.register(Histogram(
+    "minone_http_request_duration_seconds", "HTTP 요청 처리 시간", ["method", "path", "status"]))
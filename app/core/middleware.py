@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.core.metrics import HTTP_DURATION
 import time
 import logging
 from typing import Any
@@ -26,10 +27,14 @@ def setup_middleware(app: FastAPI) -> None:
         process_time = time.time() - start_time
 
         logger.info(
-            f"{request.method} {request.url} "
-            f"completed in {process_time:.4f}s "
-            f"with status {response.status_code}"
+            "%s %s completed in %.4fs with status %d",
+            request.method, request.url, process_time, response.status_code,
         )
 
+        # 경로 파라미터별로 라벨이 늘어나지 않도록 라우트 템플릿을 사용합니다. (매칭되지 않은 경로는 하나로 묶음)
+        route = request.scope.get("route")
+        HTTP_DURATION.observe(process_time, method=request.method,
+                              path=getattr(route, "path", "unmatched"), status=response.status_code)
+
         response.headers["X-Process-Time"] = str(process_time)
         return response
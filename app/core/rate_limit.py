@@ -0,0 +1,429 @@
+"""
+속도 제한/수락 제어 모듈
+요청마다 여러 번의 LLM/임베딩 호출이 조율 없이 나가면 버스트 부하에서 공급자 429를 받고,
+재시도가 한꺼번에 몰려 다시 429를 받습니다. 이를 막는 프로세스 전역 스케줄러입니다.
+
+- 토큰 버킷: 모델별 분당 요청 수(RPM)/토큰 수(TPM)를 공급자 한도의 `RATE_LIMIT_HEADROOM` 비율로 지키고,
+  모델별 동시 호출 수도 제한합니다. 호출 토큰은 호출하는 쪽이 추정해서 넘깁니다. (프롬프트 + max_tokens)
+- 우선순위: 이미 처리 중인 민원(첫 호출을 마친 실행, 재질문에 대한 추가 답변)의 호출이
+  새 민원의 첫 호출보다 먼저 버킷을 사용합니다. 새 민원이 몰려도 시작한 민원은 끝까지 처리됩니다.
+- 일시 정지: 429를 받으면 그 모델의 모든 호출을 `Retry-After` 동안 멈춰 재시도가 몰리지 않게 합니다.
+- 수락 제어: API 서버가 동시에 처리하는 민원 수를 제한하고, 넘치면 우선순위 대기열에서 기다리게 합니다.
+  대기열이 가득 찼거나, 새 민원의 호출 예상 대기 시간이 길면 공급자 한도에 닿기 전에 거절합니다. (503 + Retry-After)
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.core import metrics
+
+PRIORITY_IN_PROGRESS = 0
+PRIORITY_NEW = 1
+PRIORITY_NAMES = {PRIORITY_IN_PROGRESS: "in_progress", PRIORITY_NEW: "new"}
+
+# 앞선 대기 호출이 있거나 동시 호출 수가 가득 찼을 때 다시 확인하는 간격(초)
+POLL_INTERVAL = 0.02
+
+
+class OverloadedError(Exception):
+    """처리 한도를 넘어 지금은 요청을 받을 수 없을 때 발생합니다. API는 503과 `Retry-After`로 응답합니다."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+# --- 민원 단위 우선순위 ---
+
+class RequestContext:
+    """민원 한 건의 실행 상태. 첫 호출 이후의 호출은 진행 중인 민원의 호출로 우선 처리합니다."""
+
+    __slots__ = ("in_progress", "calls")
+
+    def __init__(self, in_progress: bool = False):
+        self.in_progress = in_progress
+        self.calls = 0
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("minone_request_context", default=None)
+
+
+@contextmanager
+def request_context(in_progress: bool = False) -> Iterator[RequestContext]:
+    """
+    이 블록에서 실행하는 에이전트의 호출 우선순위를 정합니다. (`in_progress`: 재질문에 대한 추가 답변)
+    그래프 노드는 실행 시점의 컨텍스트를 복사해 실행되므로 병렬 분기/스레드에서도 같은 상태를 봅니다.
+    """
+    context = RequestContext(in_progress)
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+
+
+def next_call_priority() -> int:
+    """현재 민원에서 나갈 다음 호출의 우선순위. 민원 밖의 호출(인덱스 빌드 등)은 새 민원과 같게 취급합니다."""
+    context = _request_context.get()
+    if context is None:
+        return PRIORITY_NEW
+    priority = PRIORITY_IN_PROGRESS if context.in_progress or context.calls else PRIORITY_NEW
+    context.calls += 1
+    return priority
+
+
+# --- 토큰 버킷 스케줄러 ---
+
+class TokenBucket:
+    """분당 `per_minute`씩 연속으로 채워지고 `burst_seconds` 분량까지 쌓이는 토큰 버킷 (잠금은 호출하는 쪽이 잡습니다)"""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """`amount`를 쓸 수 있을 때까지 남은 시간(초). 용량보다 큰 호출은 버킷이 가득 차면 보냅니다."""
+        self.refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        # 용량보다 큰 호출도 전부 차감하여(음수 허용) 이후 호출이 그만큼 기다리게 합니다.
+        self.tokens -= amount
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    requests: int = field(default=1, compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class ModelLimiter:
+    """모델 하나의 요청/토큰 버킷, 동시 호출 수, 우선순위 대기열"""
+
+    def __init__(self, model: str, rpm: float = 0, tpm: float = 0, concurrency: int = 0,
+                 burst_seconds: float = 10.0):
+        self.model = model
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm else None
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.waiting: List[_Ticket] = []
+
+    def _bucket_wait(self, ticket: _Ticket, now: float) -> float:
+        waits = [0.0, self.paused_until - now]
+        if self.requests is not None:
+            waits.append(self.requests.wait_time(ticket.requests, now))
+        if self.tokens is not None:
+            waits.append(self.tokens.wait_time(ticket.tokens, now))
+        return max(waits)
+
+    def try_grant(self, ticket: _Ticket, now: float) -> float:
+        """`ticket` 차례이고 여유가 있으면 버킷을 차감하고 0을, 아니면 다시 확인할 때까지 기다릴 시간(초)을 반환합니다."""
+        while self.waiting and self.waiting[0].cancelled:
+            heapq.heappop(self.waiting)
+        head = self.waiting[0]
+        wait = self._bucket_wait(head, now)
+        if head is not ticket:
+            return max(wait, POLL_INTERVAL)
+        if wait > 0:
+            return wait
+        if self.concurrency and self.in_flight >= self.concurrency:
+            return POLL_INTERVAL
+        heapq.heappop(self.waiting)
+        if self.requests is not None:
+            self.requests.consume(ticket.requests)
+        if self.tokens is not None:
+            self.tokens.consume(ticket.tokens)
+        self.in_flight += 1
+        return 0.0
+
+    def backlog_wait(self, priority: int, now: float) -> float:
+        """우선순위가 `priority` 이상인 대기 호출과 새 호출 하나가 모두 나가기까지의 예상 시간(초)"""
+        ahead = [ticket for ticket in self.waiting if not ticket.cancelled and ticket.priority <= priority]
+        waits = [0.0, self.paused_until - now]
+        if self.requests is not None:
+            self.requests.refill(now)
+            waits.append((sum(t.requests for t in ahead) + 1 - self.requests.tokens) / self.requests.rate)
+        if self.tokens is not None:
+            self.tokens.refill(now)
+            waits.append((sum(t.tokens for t in ahead) - self.tokens.tokens) / self.tokens.rate)
+        return max(waits)
+
+
+class Permit:
+    """버킷을 통과한 호출 하나. 호출이 끝나면 `release()`(또는 with 블록 종료)로 동시 호출 자리를 돌려줍니다."""
+
+    def __init__(self, lock: Optional[threading.Lock] = None, limiter: Optional[ModelLimiter] = None):
+        self._lock = lock
+        self._limiter = limiter
+
+    def release(self) -> None:
+        if self._limiter is not None:
+            with self._lock:
+                self._limiter.in_flight -= 1
+            self._limiter = None
+
+    def __enter__(self) -> "Permit":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class RateLimitScheduler:
+    """
+    모델별 `ModelLimiter`를 관리하는 프로세스 전역 스케줄러입니다.
+    스레드(동기 호출)와 이벤트 루프(비동기 호출)에서 함께 사용할 수 있습니다.
+    대기열의 맨 앞 호출만 버킷을 쓸 수 있으므로, 우선순위가 같으면 도착 순서대로 나갑니다.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, int]], headroom: float = 1.0, burst_seconds: float = 10.0,
+                 concurrency: int = 0, max_wait: float = 30.0):
+        self.limits = limits
+        self.headroom = headroom
+        self.burst_seconds = burst_seconds
+        self.concurrency = concurrency
+        self.max_wait = max_wait
+        self._limiters: Dict[str, Optional[ModelLimiter]] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_settings(cls) -> "RateLimitScheduler":
+        return cls(settings.RATE_LIMITS, settings.RATE_LIMIT_HEADROOM, settings.RATE_LIMIT_BURST_SECONDS,
+                   settings.RATE_LIMIT_CONCURRENCY, settings.RATE_LIMIT_MAX_WAIT_SECONDS)
+
+    def limiter(self, model: str) -> Optional[ModelLimiter]:
+        """모델의 제한. 설정(`limits`)에 모델도 "default"도 없으면 None(제한 없음)입니다."""
+        with self._lock:
+            if model not in self._limiters:
+                limit = self.limits.get(model, self.limits.get("default"))
+                self._limiters[model] = ModelLimiter(
+                    model,
+                    rpm=limit.get("rpm", 0) * self.headroom,
+                    tpm=limit.get("tpm", 0) * self.headroom,
+                    concurrency=limit.get("concurrency", self.concurrency),
+                    burst_seconds=self.burst_seconds,
+                ) if limit else None
+            return self._limiters[model]
+
+    def _enqueue(self, limiter: ModelLimiter, tokens: int, priority: int, requests: int) -> _Ticket:
+        ticket = _Ticket(priority, next(self._seq), tokens, requests)
+        with self._lock:
+            heapq.heappush(limiter.waiting, ticket)
+        return ticket
+
+    def _poll(self, limiter: ModelLimiter, ticket: _Ticket, start: float) -> float:
+        with self._lock:
+            delay = limiter.try_grant(ticket, time.monotonic())
+        if delay and time.monotonic() - start + delay > self.max_wait:
+            raise OverloadedError(f"'{limiter.model}' 호출 대기 시간이 {self.max_wait:.0f}초를 넘습니다.", delay)
+        return delay
+
+    def _cancel(self, ticket: _Ticket) -> None:
+        with self._lock:
+            ticket.cancelled = True
+
+    def _granted(self, limiter: ModelLimiter, priority: int, start: float) -> Permit:
+        metrics.RATE_LIMIT_WAIT.observe(time.monotonic() - start, model=limiter.model,
+                                        priority=PRIORITY_NAMES[priority])
+        return Permit(self._lock, limiter)
+
+    def acquire(self, model: str, tokens: int, priority: int = PRIORITY_NEW, requests: int = 1) -> Permit:
+        """
+        `model` 호출 `requests`건(추정 토큰 `tokens`)을 보낼 차례가 될 때까지 기다립니다.
+        `max_wait` 안에 차례가 오지 않을 것 같으면 `OverloadedError`를 발생시킵니다.
+        """
+        limiter = self.limiter(model)
+        if limiter is None:
+            return Permit()
+        start = time.monotonic()
+        ticket = self._enqueue(limiter, tokens, priority, requests)
+        try:
+            while delay := self._poll(limiter, ticket, start):
+                time.sleep(delay)
+        except BaseException:
+            self._cancel(ticket)
+            raise
+        return self._granted(limiter, priority, start)
+
+    async def aacquire(self, model: str, tokens: int, priority: int = PRIORITY_NEW, requests: int = 1) -> Permit:
+        """`acquire`의 비동기 버전입니다. 기다리는 동안 이벤트 루프를 막지 않습니다."""
+        limiter = self.limiter(model)
+        if limiter is None:
+            return Permit()
+        start = time.monotonic()
+        ticket = self._enqueue(limiter, tokens, priority, requests)
+        try:
+            while delay := self._poll(limiter, ticket, start):
+                await asyncio.sleep(delay)
+        except BaseException:
+            self._cancel(ticket)
+            raise
+        return self._granted(limiter, priority, start)
+
+    def pause(self, model: str, seconds: float) -> None:
+        """공급자가 429를 돌려준 모델의 모든 호출을 `seconds`초 동안 멈춥니다."""
+        limiter = self.limiter(model)
+        if limiter is not None:
+            with self._lock:
+                limiter.paused_until = max(limiter.paused_until, time.monotonic() + seconds)
+
+    def estimated_wait(self, priority: int = PRIORITY_NEW) -> float:
+        """`priority` 호출을 지금 보내면 버킷을 기다릴 예상 시간(초). 모델 중 가장 긴 값입니다."""
+        now = time.monotonic()
+        with self._lock:
+            limiters = [limiter for limiter in self._limiters.values() if limiter is not None]
+            return max((limiter.backlog_wait(priority, now) for limiter in limiters), default=0.0)
+
+    def stats(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                model: {
+                    "waiting": sum(not ticket.cancelled for ticket in limiter.waiting),
+                    "in_flight": limiter.in_flight,
+                    "paused": limiter.paused_until > now,
+                }
+                for model, limiter in self._limiters.items() if limiter is not None
+            }
+
+
+# --- 수락 제어 ---
+
+class AdmissionController:
+    """
+    API 서버가 동시에 처리하는 민원 수를 `max_in_flight`개로 제한합니다. (이벤트 루프 하나에서 사용)
+    자리가 없으면 우선순위 대기열(진행 중인 민원의 추가 답변이 먼저)에서 최대 `queue_timeout`초 기다립니다.
+    다음 경우에는 기다리지 않고 `OverloadedError`를 발생시킵니다.
+    - 대기열이 가득 찬 경우
+    - 새 민원인데, 스케줄러의 예상 대기 시간이 `max_estimated_wait`를 넘는 경우 (공급자 한도에 닿기 전에 거절)
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, max_estimated_wait: float,
+                 scheduler: Optional[RateLimitScheduler] = None):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_estimated_wait = max_estimated_wait
+        self.scheduler = scheduler
+        self.in_flight = 0
+        self._queue: List[tuple] = []  # (우선순위, 순번, Future)
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(
+            settings.ADMISSION_MAX_IN_FLIGHT,
+            settings.ADMISSION_MAX_QUEUE,
+            settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            settings.ADMISSION_MAX_ESTIMATED_WAIT_SECONDS,
+            get_rate_limiter() if settings.RATE_LIMIT_ENABLED else None,
+        )
+
+    def _reject(self, priority: int, message: str, retry_after: float):
+        metrics.ADMISSIONS.inc(priority=PRIORITY_NAMES[priority], result="rejected")
+        raise OverloadedError(message, retry_after)
+
+    def _dequeue(self, entry: tuple) -> None:
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+
+    async def acquire(self, priority: int = PRIORITY_NEW) -> None:
+        if priority == PRIORITY_NEW and self.scheduler is not None:
+            wait = self.scheduler.estimated_wait(priority)
+            if wait > self.max_estimated_wait:
+                self._reject(priority, "LLM 호출 한도에 가까워 새 민원을 잠시 받을 수 없습니다.", wait)
+        if self.in_flight < self.max_in_flight and not self._queue:
+            self.in_flight += 1
+            metrics.ADMISSIONS.inc(priority=PRIORITY_NAMES[priority], result="admitted")
+            return
+        if len(self._queue) >= self.max_queue:
+            self._reject(priority, "처리 대기 중인 민원이 많아 잠시 받을 수 없습니다.", self.queue_timeout)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._queue, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._dequeue(entry)
+                self._reject(priority, "처리 대기 시간이 초과되었습니다.", self.queue_timeout)
+        except BaseException:
+            # 기다리는 중에 연결이 끊긴 경우: 이미 자리를 넘겨받았으면 돌려주고, 아니면 대기열에서 뺍니다.
+            if future.done():
+                self.release()
+            else:
+                self._dequeue(entry)
+            raise
+        metrics.ADMISSIONS.inc(priority=PRIORITY_NAMES[priority], result="queued")
+
+    def release(self) -> None:
+        """자리를 반납합니다. 대기 중인 민원이 있으면 자리를 그대로 넘겨줍니다."""
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, priority: int = PRIORITY_NEW):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "queued": len(self._queue)}
+
+
+_rate_limiter: Optional[RateLimitScheduler] = None
+_rate_limiter_lock = threading.Lock()
+_admission: Optional[AdmissionController] = None
+_admission_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimitScheduler:
+    """프로세스 전역 속도 제한 스케줄러를 반환합니다. (모든 노드 모델과 임베딩이 공유)"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimitScheduler.from_settings()
+    return _rate_limiter
+
+
+def get_admission_controller() -> AdmissionController:
+    """API 서버의 수락 제어기를 반환합니다."""
+    global _admission
+    if _admission is None:
+        with _admission_lock:
+            if _admission is None:
+                _admission = AdmissionController.from_settings()
+    return _admission
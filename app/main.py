@@ -1,74 +1,57 @@
-# from fastapi import FastAPI
+import uuid
+from contextlib import asynccontextmanager
 
-# from app.core.logging_config import setup_logging
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 
-# setup_logging()
-# app = FastAPI()
+from app.ai.agent import get_compiled_agent
+from app.api import complaints
+from app.config import settings
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.core.metrics import registry
+from app.core.middleware import setup_middleware
+from app.core.rate_limit import OverloadedError
+from app.rag.retriever import warm_up_retriever
+from app.services.agent_service import run_minone_agent
 
+# .env 파일 로드 (OpenAI API 키 등)
+load_dotenv()
 
-# @app.get("/")
-# async def root():
-#     return {"message": "Hello World"}
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 첫 요청이 인덱스 로드/그래프 컴파일 비용을 떠안지 않도록 서버 시작 시 미리 준비합니다.
+    await run_in_threadpool(warm_up_retriever)
+    get_compiled_agent(sessions=settings.SESSION_ENABLED)
+    yield
+    # 큐에 남은 로그를 모두 기록한 뒤 종료합니다.
+    shutdown_logging()
 
-# @app.get("/hello/{name}")
-# async def say_hello(name: str):
-#     return {"message": f"Hello {name}"}
-from dotenv import load_dotenv
-from app.ai.agent import build_agent_workflow
-from app.ai.state import AgentState
-from app.rag.retriever import get_retriever
 
-# .env 파일 로드 (OpenAI API 키 등)
-load_dotenv()
+setup_logging()
+app = FastAPI(lifespan=lifespan)
+setup_middleware(app)
+app.include_router(complaints.router)
 
-# --- AI 에이전트 실행 함수 ---
-def run_minone_agent(question: str) -> str:
-    """
-    사용자의 질문을 받아 AI 에이전트 워크플로우를 실행하고,
-    최종 답변 또는 다음 행동(재질문)을 문자열로 반환합니다.
-    """
-    agent = build_agent_workflow()
-    
-    # ▼▼▼ initial_state 정의 수정 ▼▼▼
-    # AgentState에 정의된 모든 필드를 명시적으로 초기화해주는 것이
-    # 나중에 상태 관련 버그를 방지하는 데 도움이 됩니다.
-    initial_state = AgentState(
-        question=question,
-        cleaned_question="",
-        documents=[],
-        answer="",
-        assistant_answer="",
-        final_report={},
-        assessment_result="",
-        retries=0,
-        messages=[]
-    )
-    
-    print(f"\n{'='*20} 민 ONE 에이전트 실행 시작 {'='*20}")
-    print(f"입력된 질문: {question}")
-    print(f"{'='*55}\n")
 
-    final_state = None
-    for step_output in agent.stream(initial_state, stream_mode="values"):
-        current_node = list(step_output.keys())[-1]
-        print(f"--- 🏃 현재 실행 노드: {current_node} ---")
-        final_state = step_output
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    """수락 제어/속도 제한으로 받을 수 없는 요청은 다시 시도할 시점과 함께 503으로 응답합니다."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": exc.retry_after_header})
 
-    print(f"\n{'='*20} 민 ONE 에이전트 실행 종료 {'='*20}")
-    
-    if final_state:
-        # 최종 결과물은 항상 'answer' 필드에 저장되도록 통일했습니다.
-        final_result = final_state.get("answer", "")
-        if final_result and "■" in final_result: # 최종 보고서 형식인지 확인
-            return final_result
-        # 재질문 등 다른 메시지가 있다면 마지막 메시지를 반환
-        elif final_state.get("messages"):
-            return final_state["messages"][-1].content
-        else:
-            return "오류: 최종 답변을 생성하지 못했습니다."
-    else:
-        return "에이전트 실행 중 오류가 발생했습니다."
+
+@app.get("/")
+async def root():
+    return {"message": "민 ONE AI 서버가 실행 중입니다."}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """노드별 지연/토큰/비용/캐시/재시도 지표를 Prometheus 텍스트 형식으로 반환합니다."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 # --- 대화형 테스트용 코드 ---
@@ -77,42 +60,26 @@ if __name__ == "__main__":
     print("AI 에이전트 로컬 테스트를 시작합니다.")
     
     print("Vector Store를 준비합니다...")
-    get_retriever()
+    warm_up_retriever()
+    get_compiled_agent(sessions=True)
     print("Vector Store 준비 완료.\n")
 
     # --- 대화형 테스트 루프 ---
     
     print("대화를 시작합니다. 종료하려면 'exit' 또는 'quit'을 입력하세요.")
-    # 1. 첫 질문을 받습니다.
-    initial_question = input("🙋 사용자: ")
-    
-    if initial_question.lower() in ["exit", "quit"]:
-        print("대화를 종료합니다.")
-    else:
-        # 2. 대화 기록을 저장할 리스트를 만듭니다.
-        conversation_history = [f"사용자: {initial_question}"]
-
-        while True:
-            # 3. 현재까지의 대화 내용을 하나의 질문으로 합칩니다.
-            full_question = "\n".join(conversation_history)
-            
-            # 4. AI 에이전트를 실행합니다.
-            agent_response = run_minone_agent(full_question)
-            
-            print(f"\n🤖 AI: {agent_response}")
-            
-            # 5. AI의 답변을 확인하고 루프를 계속할지 결정합니다.
-            if "■" in agent_response:
-                print("\n--- 최종 답변이 생성되어 대화를 종료합니다. ---")
-                break
-            
-            # 6. 사용자의 다음 답변을 입력받습니다.
-            user_response = input("\n🙋 사용자: ")
-            
-            if user_response.lower() in ["exit", "quit"]:
-                print("대화를 종료합니다.")
-                break
-            
-            # 7. 사용자의 답변을 대화 기록에 추가하고 다시 루프를 시작합니다.
-            conversation_history.append(f"사용자: {user_response}")
-            conversation_history.append(f"AI: {agent_response}") # AI의 이전 질문도 맥락에 포함
\ No newline at end of file
+    # 대화 내용은 세션(체크포인트)에 저장되므로, 매 턴 새 입력만 에이전트에 전달합니다.
+    session_id = uuid.uuid4().hex
+
+    while True:
+        user_input = input("\n🙋 사용자: ")
+        if user_input.lower() in ["exit", "quit"]:
+            print("대화를 종료합니다.")
+            break
+
+        agent_response = run_minone_agent(user_input, session_id)
+        print(f"\n🤖 AI: {agent_response}")
+
+        # 최종 답변이 나오면 대화를 종료합니다.
+        if "■" in agent_response:
+            print("\n--- 최종 답변이 생성되어 대화를 종료합니다. ---")
+            break
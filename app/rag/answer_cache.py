@@ -0,0 +1,139 @@
+"""
+시맨틱 답변 캐시 모듈
+정제된 민원 내용을 임베딩하여 작은 전용 FAISS 인덱스에서 유사한 과거 민원을 찾습니다.
+유사도가 임계값 이상이면 당시의 검색 문서와 답변 초안을 재사용하여, 최종 보고서 생성 단계만 실행하도록 합니다.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+import faiss
+import numpy as np
+
+from app.config import settings
+from app.rag.retriever import vector_store_registry
+
+
+@dataclass
+class AnswerCacheEntry:
+    question: str
+    documents: List[str]
+    assistant_answer: str
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """
+    TTL과 LRU 삭제를 지원하는 시맨틱 답변 캐시입니다.
+    벡터는 정규화하여 내적(IndexFlatIP)으로 코사인 유사도를 계산합니다.
+    """
+
+    def __init__(self, embeddings, threshold: float, ttl_seconds: float, max_entries: int):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = None
+        self._entries: "OrderedDict[int, AnswerCacheEntry]" = OrderedDict()
+        self._next_id = 0
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray([vector], dtype=np.float32)
+        faiss.normalize_L2(array)
+        return array
+
+    def _remove(self, ids: List[int]) -> None:
+        for entry_id in ids:
+            self._entries.pop(entry_id, None)
+        if ids:
+            self._index.remove_ids(np.asarray(ids, dtype=np.int64))
+
+    def _lookup_vector(self, vector: np.ndarray) -> Optional[AnswerCacheEntry]:
+        with self._lock:
+            if self._index is None or not self._entries:
+                self.misses += 1
+                return None
+            # 만료된 항목을 먼저 정리합니다.
+            now = time.time()
+            expired = [entry_id for entry_id, entry in self._entries.items()
+                       if now - entry.created_at > self.ttl_seconds]
+            self._remove(expired)
+
+            if self._entries:
+                scores, ids = self._index.search(vector, 1)
+                entry_id = int(ids[0][0])
+                if entry_id != -1 and scores[0][0] >= self.threshold:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return self._entries[entry_id]
+            self.misses += 1
+            return None
+
+    def _store_vector(self, vector: np.ndarray, entry: AnswerCacheEntry) -> None:
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.asarray([entry_id], dtype=np.int64))
+            self._entries[entry_id] = entry
+            # 가장 오래 사용되지 않은 항목부터 삭제합니다.
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._remove(list(self._entries)[:overflow])
+
+    def lookup(self, question: str) -> Optional[AnswerCacheEntry]:
+        return self._lookup_vector(self._normalize(self.embeddings.embed_query(question)))
+
+    def store(self, question: str, documents: List[str], assistant_answer: str) -> None:
+        entry = AnswerCacheEntry(question, list(documents), assistant_answer, time.time())
+        self._store_vector(self._normalize(self.embeddings.embed_query(question)), entry)
+
+    async def alookup(self, question: str) -> Optional[AnswerCacheEntry]:
+        vector = self._normalize(await self.embeddings.aembed_query(question))
+        return await asyncio.to_thread(self._lookup_vector, vector)
+
+    async def astore(self, question: str, documents: List[str], assistant_answer: str) -> None:
+        entry = AnswerCacheEntry(question, list(documents), assistant_answer, time.time())
+        vector = self._normalize(await self.embeddings.aembed_query(question))
+        await asyncio.to_thread(self._store_vector, vector, entry)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index = None
+            self._entries.clear()
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """프로세스 전역 답변 캐시를 반환합니다. (Vector Store와 같은 임베딩 클라이언트를 사용)"""
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = SemanticAnswerCache(
+                    vector_store_registry.embeddings,
+                    threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+                    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+                )
+    return _answer_cache
@@ -1,109 +1,521 @@
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_core.output_parsers import StrOutputParser
+import logging
+import re
+from types import MappingProxyType
+from typing import Dict, List, Optional
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser
 from langchain_openai import ChatOpenAI
+from langgraph.types import interrupt
+from pydantic import BaseModel, ConfigDict, Field
 from app.rag import prompts
-from app.rag.retriever import get_retriever
+from app.rag.answer_cache import get_answer_cache
+from app.rag.context_packing import CONTEXT_SEPARATOR, get_token_counter, pack_documents
+from app.rag.llm_cache import CachedChatModel
+from app.rag.rate_limited import RateLimitedChatModel
+from app.rag.retriever import arefresh_vector_store, get_retriever, get_retry_retriever
+from app.ai.question_classifier import get_question_classifier, log_question_decision
 from app.ai.state import AgentState
+from app.config import settings
+from app.core.logging_config import log_payload
 
-# 모델 초기화
-llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.1)
+logger = logging.getLogger(__name__)
 
-# 모든 함수의 시그니처가 (state: AgentState) -> dict 형태로 변경
+# 분기용 평가 노드('질문 분석', '답변 품질 평가')와 출력 레이블
+CLASSIFICATION_NODES = ("assess_question", "assess_answer_quality")
+ASSESSMENT_LABELS = ("sufficient", "insufficient")
 
-def assess_question_node(state: AgentState) -> dict:
-    """1. 질문 분석 노드: 사용자의 질문이 민원 처리에 충분한 정보를 담고 있는지 평가합니다."""
-    print("--- 노드 1: 질문 분석 및 정보 충분성 평가 ---")
+
+def parse_assessment(text: Optional[str]) -> str:
+    """
+    평가 노드의 출력을 'sufficient' 또는 'insufficient'로 정규화합니다.
+    - 'insufficient'가 'sufficient'를 포함하므로 먼저 확인합니다. (따옴표/마침표/대소문자 무시)
+    - 한 토큰으로 제한된 출력('ins', 'suff' 등)은 레이블의 접두사로 판별합니다.
+    - 판별할 수 없으면 보수적으로 'insufficient'(재질문/재검색)로 봅니다.
+    """
+    word = re.sub(r"[^a-z가-힣]", "", (text or "").lower())
+    if "insufficient" in word or "불충분" in word:
+        return "insufficient"
+    if "sufficient" in word or "충분" in word:
+        return "sufficient"
+    if word:
+        for label in ASSESSMENT_LABELS:
+            if label.startswith(word):
+                return label
+    return "insufficient"
+
+
+class FinalReport(BaseModel):
+    """통합 보고서 노드의 구조화된 출력 (`AgentState.final_report`에 저장)"""
+    model_config = ConfigDict(extra="forbid")
+
+    citizen_answer: str = Field(description="민원인에게 제공할 공식 답변 (법령 조항 인용 포함)")
+    related_regulations: List[str] = Field(description="답변에서 인용한 법령 조항 목록")
+    cleaned_question: str = Field(description="공격적/감정적 표현을 제거하고 사실 관계로 요약한 민원 내용")
+    staff_notes: str = Field(description="담당자가 처리 시 확인할 사항")
+
+
+# OpenAI 구조화 출력(strict JSON Schema)으로 `FinalReport` 형식의 JSON만 생성하도록 강제합니다.
+FINAL_REPORT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "final_report", "strict": True, "schema": FinalReport.model_json_schema()},
+}
+
+
+def _is_valid_final_report(text: str) -> bool:
+    try:
+        FinalReport.model_validate_json(text)
+        return True
+    except ValueError:
+        return False
+
+
+def render_final_report(question: str, report: dict) -> str:
+    """`final_report`를 기존 최종 보고서와 같은 ■ 형식 문자열로 만듭니다. (`run_minone_agent`가 ■로 완료 여부를 판단)"""
+    regulations = "\n".join(f"  - {item}" for item in report["related_regulations"]) or "  - 없음"
+    return (
+        "### 민원 검토 결과 안내 (민원인에게 표시될 부분) ###\n"
+        f"■ 민원 내용: {question}\n"
+        f"■ 검토 결과: {report['citizen_answer']}\n"
+        f"■ 관련 규정:\n{regulations}\n\n"
+        "--------------------------------------------------\n\n"
+        "### 담당자 참고 정보 (내부 시스템용) ###\n"
+        f"■ 민원 요약 (정제됨): {report['cleaned_question']}\n"
+        f"■ 담당자 확인 사항: {report['staff_notes']}\n"
+        f"■ 민원인 원본 질문:\n\"\"\"\n{question}\n\"\"\""
+    )
+
+
+def node_llm_settings(node: Optional[str]) -> dict:
+    """노드의 모델 설정. 기본값(`LLM_*`)에 `LLM_NODE_SETTINGS[node]`를 덮어씁니다."""
+    config = {
+        "model": settings.LLM_MODEL,
+        "temperature": settings.LLM_TEMPERATURE,
+        "max_tokens": settings.LLM_MAX_TOKENS,
+        "timeout": settings.LLM_TIMEOUT_SECONDS,
+    }
+    config.update(settings.LLM_NODE_SETTINGS.get(node, {}))
+    return config
+
+
+def _label_logit_bias() -> Optional[Dict[int, int]]:
+    """
+    레이블의 첫 토큰만 생성되도록 하는 logit_bias를 만듭니다. (max_tokens=1과 함께 사용)
+    토크나이저(gpt-4.1 계열: o200k_base)를 불러올 수 없거나 두 레이블의 첫 토큰이 같으면 None을 반환합니다.
+    """
+    encoding = get_token_counter(settings.CONTEXT_TOKENIZER_ENCODING).encoding
+    if encoding is None:
+        return None
+    first_tokens = {encoding.encode(label)[0] for label in ASSESSMENT_LABELS}
+    if len(first_tokens) != len(ASSESSMENT_LABELS):
+        return None
+    return {token: 100 for token in first_tokens}
+
+
+def create_node_llm(node: Optional[str] = None) -> ChatOpenAI:
+    """
+    노드별 설정으로 채팅 모델을 만듭니다. (node가 None이면 기본 설정)
+    분기용 평가 노드는 `LLM_CLASSIFICATION_MODE=token`이면 레이블 첫 토큰 하나만 생성합니다.
+    """
+    config = node_llm_settings(node)
+    kwargs = {}
+    if node in CLASSIFICATION_NODES and settings.LLM_CLASSIFICATION_MODE == "token":
+        logit_bias = _label_logit_bias()
+        if logit_bias is not None:
+            kwargs.update(max_tokens=1, logit_bias=logit_bias)
+        else:
+            logger.warning("토크나이저를 불러오지 못해 '%s' 노드를 text 출력 방식으로 실행합니다.", node)
+    if node == "create_fused_report":
+        kwargs["model_kwargs"] = {"response_format": FINAL_REPORT_RESPONSE_FORMAT}
+    return ChatOpenAI(
+        model=config["model"],
+        temperature=config["temperature"],
+        max_tokens=kwargs.pop("max_tokens", config["max_tokens"]),
+        timeout=config["timeout"],
+        # stream_usage: 스트리밍 호출에서도 토큰 사용량을 받아 실행 추적(`AgentTrace`)에 기록합니다.
+        stream_usage=True,
+        # 속도 제한을 켜면 재시도는 `RateLimitedChatModel`이 스케줄러를 거쳐 지터 백오프로 조율합니다.
+        max_retries=0 if settings.RATE_LIMIT_ENABLED else None,
+        **kwargs,
+    )
+
+
+# 모델 초기화 (기본 설정 모델. 노드별 모델은 `build_chains`에서 설정에 따라 만듭니다)
+llm = create_node_llm()
+
+
+def build_chains(model=None) -> MappingProxyType:
+    """
+    노드별 `prompt | llm | parser` 파이프라인을 미리 구성합니다.
+    구성된 체인은 상태를 갖지 않으므로 여러 스레드/비동기 작업에서 공유해도 안전합니다.
+    `model`을 지정하면 모든 노드가 그 모델을 사용하고, 없으면 노드별 설정(`LLM_NODE_SETTINGS`)으로 모델을 만듭니다.
+    속도 제한을 켜면 모든 노드의 호출이 프로세스 전역 스케줄러를 거치고, LLM 응답 캐시를 켜면 그 앞에서 캐시를 조회합니다.
+    """
+    def node_model(node: str, validate=None):
+        node_llm = model if model is not None else create_node_llm(node)
+        if settings.RATE_LIMIT_ENABLED:
+            node_llm = RateLimitedChatModel(node_llm)
+        return CachedChatModel(node_llm, node, validate) if settings.LLM_CACHE_ENABLED else node_llm
+
+    return MappingProxyType({
+        "assess_question": prompts.assess_question_prompt | node_model("assess_question") | StrOutputParser(),
+        "request_clarification": prompts.request_clarification_prompt | node_model("request_clarification") | StrOutputParser(),
+        "assess_answer_quality": prompts.assess_answer_quality_prompt | node_model("assess_answer_quality") | StrOutputParser(),
+        "generate_answer": prompts.generate_answer_prompt | node_model("generate_answer") | StrOutputParser(),
+        "filter_and_sanitize": prompts.filter_and_sanitize_prompt | node_model("filter_and_sanitize") | StrOutputParser(),
+        "create_final_report": prompts.create_final_report_prompt | node_model("create_final_report") | StrOutputParser(),
+        "create_fused_report": (
+            prompts.create_fused_report_prompt
+            | node_model("create_fused_report", validate=_is_valid_final_report)
+            | PydanticOutputParser(pydantic_object=FinalReport)
+        ),
+    })
+
+
+# 모듈 로드 시 한 번만 구성하여 모든 요청에서 재사용합니다.
+chains = build_chains()
+
+
+def set_llm(model) -> None:
+    """모든 노드가 사용할 모델을 교체합니다. (벤치마크/로컬 테스트용)"""
+    global llm, chains
+    llm = model
+    chains = build_chains(model)
+
+
+def _classify_question(question: str):
+    """로컬 분류기로 질문 분석 결과를 예측합니다. 분류기가 없거나 불확실하면 None을 반환합니다."""
+    classifier = get_question_classifier()
+    if classifier is None:
+        return None
+    decision = classifier.decide(question)
+    if decision is not None:
+        logger.info("로컬 분류기로 질문 분석을 결정했습니다. (결정 %d / 위임 %d)", classifier.decided, classifier.deferred)
+    return decision
+
+
+def _retrieval_plan(state: AgentState):
+    """
+    이번 검색의 (시도 번호, 리트리버, 검색 질의)를 정합니다.
+    이미 검색한 문서가 있으면 재검색이며, 재검색 강화 모드에서는 k를 늘린 MMR 검색과
+    정제된 민원 내용(있는 경우)으로 확장한 질의를 사용합니다.
+    """
     question = state['question']
-    
-    assess_chain = prompts.assess_question_prompt | llm | StrOutputParser()
-    assessment_result = assess_chain.invoke({"question": question})
-    
-    print(f"평가 결과: {assessment_result}")
-    
+    attempt = state.get("retries", 0) + 1 if state.get("documents") else 0
+    if attempt == 0 or not settings.RETRY_ESCALATION_ENABLED:
+        return attempt, get_retriever(), question
+
+    cleaned_question = state.get("cleaned_question")
+    query = f"{question}\n{cleaned_question}" if cleaned_question and cleaned_question != question else question
+    logger.info("재검색 %d회차: 검색 범위를 넓혀 MMR로 다시 검색합니다.", attempt)
+    return attempt, get_retry_retriever(attempt), query
+
+
+def _retrieval_update(state: AgentState, attempt: int, documents) -> dict:
+    """
+    검색 결과로 상태 갱신값을 만듭니다.
+    재시도 횟수는 라우터가 아닌 이 노드가 기록합니다. (라우터에서 state를 수정해도 그래프 상태에 반영되지 않습니다.)
+    """
+    logger.info("%d개의 관련 문서를 검색했습니다.", len(documents))
+    update = {"retries": attempt}
+    if settings.CONTEXT_PACKING_ENABLED:
+        # 품질 평가/답변 생성 두 LLM 호출이 모두 같은 문서를 받으므로, 검색 직후 한 번만 정리합니다.
+        packed = pack_documents(documents)
+        logger.info("%s", packed.summary())
+        doc_contents = packed.passages
+        update["context_tokens_saved"] = state.get("context_tokens_saved", 0) + packed.tokens_saved
+    else:
+        doc_contents = [doc.page_content for doc in documents]
+    update["documents"] = doc_contents
+    if settings.RETRY_ESCALATION_ENABLED:
+        update["documents_unchanged"] = attempt > 0 and set(doc_contents) == set(state.get("documents") or [])
+    return update
+
+
+# 모든 함수의 시그니처가 (state: AgentState) -> dict 형태로 변경
+# 노드마다 LLM 호출 전후 처리는 공유 도우미로 두어, 동기/비동기 노드는 `invoke`/`ainvoke` 호출만 다릅니다.
+def _preset_assessment(state: AgentState) -> Optional[str]:
+    """일괄 처리에서 미리 분석한 결과 또는 로컬 분류기가 확신한 결과. 없으면 None (LLM 호출 필요)"""
+    logger.debug("노드 1: 질문 분석 및 정보 충분성 평가")
+    return state.get("assessment_result") or _classify_question(state['question'])
+
+
+def _question_assessment_update(state: AgentState, assessment_result: Optional[str], output=None) -> dict:
+    """질문 분석 결과로 상태 갱신값을 만듭니다. `output`이 있으면 LLM 출력을 해석해 사용합니다."""
+    if assessment_result is None:
+        assessment_result = parse_assessment(output)
+        log_question_decision(state['question'], assessment_result)
+    logger.info("질문 분석 결과: %s", assessment_result)
     # 반환값은 업데이트할 상태 필드만 담은 '딕셔너리'
+    return {"assessment_result": assessment_result}
+
+
+def _clarification_update(state: AgentState, clarification_message: str) -> dict:
+    log_payload(logger, logging.INFO, "생성된 재질문 (%d자)", clarification_message, len(clarification_message))
+    # 재질문 횟수는 세션 상태에 저장되어, 다음 턴에서 최대 횟수에 도달하면 검색을 강제합니다.
     return {
-        "assessment_result": assessment_result,
-        "messages": [HumanMessage(content=question)]
+        "retries": state.get("retries", 0) + 1,
+        "messages": [AIMessage(content=clarification_message)]
     }
 
-def request_clarification_node(state: AgentState) -> dict:
-    """2. 추가 정보 요청 노드: 정보가 불충분할 경우, 사용자에게 명확한 질문을 생성합니다."""
-    print("--- 노드 2: 추가 정보 요청 (재질문 생성) ---")
-    question = state['question']
-    
-    clarification_chain = prompts.request_clarification_prompt | llm | StrOutputParser()
-    clarification_message = clarification_chain.invoke({"question": question})
-    
-    print(f"생성된 재질문: {clarification_message}")
-    
+
+def _clarification_reply_update(state: AgentState, reply: str) -> dict:
+    """재질문에 대한 민원인의 답변을 질문에 덧붙이고, 질문 분석을 다시 하도록 이전 평가 결과를 지웁니다."""
+    log_payload(logger, logging.INFO, "재질문에 대한 답변 (%d자)", reply, len(reply))
     return {
-        "messages": [AIMessage(content=clarification_message)]
+        "question": f"{state['question']}\n{reply}",
+        "assessment_result": "",
+        "messages": [HumanMessage(content=reply)]
     }
 
 
+def _unchanged_quality(state: AgentState) -> Optional[dict]:
+    """재검색 결과가 직전과 같으면 평가 결과도 같으므로 LLM을 다시 호출하지 않습니다."""
+    logger.debug("노드 4: 검색된 문서의 유효성 평가")
+    if not state.get("documents_unchanged"):
+        return None
+    logger.info("재검색 문서가 이전과 같아 품질 평가를 건너뜁니다.")
+    return {"assessment_result": state["assessment_result"]}
+
+
+def _quality_inputs(state: AgentState) -> dict:
+    """품질 평가 프롬프트 입력. 문서 목록을 답변 생성과 같은 구분자로 이어 붙입니다. (리스트 표현 그대로 보내지 않도록)"""
+    return {"question": state['question'], "documents": CONTEXT_SEPARATOR.join(state['documents'])}
+
+
+def _quality_update(output) -> dict:
+    assessment_result = parse_assessment(output)
+    logger.info("문서 품질 평가 결과: %s", assessment_result)
+    return {"assessment_result": assessment_result}
+
+
+def _answer_inputs(state: AgentState) -> dict:
+    """답변 생성/통합 보고서 프롬프트 입력 (검색 문서를 구분자로 이어 붙인 컨텍스트와 질문)"""
+    return {"context": CONTEXT_SEPARATOR.join(state['documents']), "question": state['question']}
+
+
+def _answer_update(answer: str) -> dict:
+    log_payload(logger, logging.INFO, "생성된 답변 초안 (%d자)", answer, len(answer))
+    # 'assistant_answer' 필드에 초안을 저장
+    return {"assistant_answer": answer}
+
+
+def _sanitize_update(cleaned_question: str) -> dict:
+    log_payload(logger, logging.INFO, "정제된 민원 내용 (%d자)", cleaned_question, len(cleaned_question))
+    return {"cleaned_question": cleaned_question}
+
+
+def _final_report_inputs(state: AgentState) -> dict:
+    # 이전 단계의 `generate_answer_node`에서 생성한 답변 초안을 사용합니다.
+    return {
+        "question": state['question'],
+        "answer": state['assistant_answer'],
+        "cleaned_question": state['cleaned_question']
+    }
+
+
+def _final_report_update(final_report_str: str) -> dict:
+    log_payload(logger, logging.INFO, "최종 생성된 보고서 (%d자)", final_report_str, len(final_report_str))
+    # 최종 결과물을 'answer' 필드에 저장하여 출력을 통일합니다.
+    return {"answer": final_report_str}
+
+
+def _fused_report_update(state: AgentState, report: FinalReport) -> dict:
+    final_report = report.model_dump()
+    answer = render_final_report(state['question'], final_report)
+    log_payload(logger, logging.INFO, "통합 생성된 보고서 (%d자)", answer, len(answer))
+    return {
+        "assistant_answer": report.citizen_answer,
+        "cleaned_question": report.cleaned_question,
+        "final_report": final_report,
+        "answer": answer,
+    }
+
+
+def _fused_report_fallback(error: OutputParserException) -> None:
+    logger.warning("통합 보고서 출력을 해석하지 못해 답변 생성/정제/보고서 생성을 차례로 실행합니다: %s", error)
+
+
+def _answer_cache_update(entry, answer_cache) -> dict:
+    stats = answer_cache.stats()
+    if entry is None:
+        logger.info("답변 캐시 미스 (적중 %d / 미스 %d)", stats["hits"], stats["misses"])
+        return {"answer_cache_hit": False}
+    logger.info("답변 캐시 적중: 유사 민원의 답변 초안을 재사용합니다. (적중 %d / 미스 %d)", stats["hits"], stats["misses"])
+    return {
+        "answer_cache_hit": True,
+        "documents": entry.documents,
+        "assistant_answer": entry.assistant_answer,
+    }
+
+
+def _is_cacheable(state: AgentState) -> bool:
+    """문서 품질이 충분하다고 평가된 답변만 캐시합니다. (재검색 한도 초과로 강제 생성된 답변은 제외)"""
+    return parse_assessment(state.get("assessment_result")) == "sufficient" and bool(state.get("cleaned_question"))
+
+
+def assess_question_node(state: AgentState) -> dict:
+    """1. 질문 분석 노드: 사용자의 질문이 민원 처리에 충분한 정보를 담고 있는지 평가합니다."""
+    # 일괄 처리에서 미리 분석한 결과가 있으면 그대로 쓰고, 로컬 분류기가 확신하면 LLM 호출 없이 결정합니다.
+    assessment_result = _preset_assessment(state)
+    output = None if assessment_result else chains["assess_question"].invoke({"question": state['question']})
+    return _question_assessment_update(state, assessment_result, output)
+
+
+def request_clarification_node(state: AgentState) -> dict:
+    """2. 추가 정보 요청 노드: 정보가 불충분할 경우, 사용자에게 명확한 질문을 생성합니다."""
+    logger.debug("노드 2: 추가 정보 요청 (재질문 생성)")
+    return _clarification_update(state, chains["request_clarification"].invoke({"question": state['question']}))
+
+
+def await_clarification_node(state: AgentState) -> dict:
+    """
+    2-1. 답변 대기 노드 (세션 전용): 재질문을 보낸 뒤 실행을 멈춥니다.
+    민원인의 답변이 `Command(resume=답변)`으로 오면 저장된 스레드에서 이어서 질문 분석으로 돌아갑니다.
+    """
+    return _clarification_reply_update(state, interrupt(state["messages"][-1].content))
+
+
 def retrieve_documents_node(state: AgentState) -> dict:
     """3. 문서 검색 노드: Vector Store에서 관련 법령 문서를 검색합니다."""
-    print("--- 노드 3: 관련 법령 문서 검색 (RAG) ---")
-    question = state['question']
-    
-    retriever = get_retriever()
-    documents = retriever.invoke(question)
-    doc_contents = [doc.page_content for doc in documents]
-    
-    print(f"{len(doc_contents)}개의 관련 문서를 검색했습니다.")
-    return {"documents": doc_contents}
+    logger.debug("노드 3: 관련 법령 문서 검색 (RAG)")
+    attempt, retriever, query = _retrieval_plan(state)
+    return _retrieval_update(state, attempt, retriever.invoke(query))
+
 
 def assess_answer_quality_node(state: AgentState) -> dict:
     """4. 답변 품질 평가 노드: 검색된 문서가 답변 생성에 유효한지 평가합니다."""
-    print("--- 노드 4: 검색된 문서의 유효성 평가 ---")
-    
-    quality_assessment_chain = prompts.assess_answer_quality_prompt | llm | StrOutputParser()
-    assessment_result = quality_assessment_chain.invoke(state)
-    retries = state.get("retries", 0)
-    
-    print(f"문서 품질 평가 결과: {assessment_result}")
-    
-    return {
-        "assessment_result": assessment_result,
-        "retries": retries
-    }
+    return _unchanged_quality(state) or _quality_update(chains["assess_answer_quality"].invoke(_quality_inputs(state)))
 
 
 def generate_answer_node(state: AgentState) -> dict:
     """5. 답변 초안 생성 노드: 검색된 문서를 바탕으로 답변의 초안을 작성합니다."""
-    print("--- 노드 5: 답변 초안 생성 ---")
-    
-    rag_chain = prompts.generate_answer_prompt | llm | StrOutputParser()
-    context = "\n\n---\n\n".join(state['documents'])
-    answer = rag_chain.invoke({"context": context, "question": state['question']})
-    
-    print(f"생성된 답변 초안:\n{answer}")
-    # 'assistant_answer' 필드에 초안을 저장
-    return {"assistant_answer": answer}
+    logger.debug("노드 5: 답변 초안 생성")
+    return _answer_update(chains["generate_answer"].invoke(_answer_inputs(state)))
+
 
 def filter_and_sanitize_node(state: AgentState) -> dict:
     """6. 민원 필터링 및 정제 노드: 담당자가 볼 수 있도록 원본 질문을 정제합니다."""
-    print("---  노드 6: 민원 내용 필터링 및 정제 ---")
-    question = state['question']
-    
-    sanitize_chain = prompts.filter_and_sanitize_prompt | llm | StrOutputParser()
-    cleaned_question = sanitize_chain.invoke({"question": question})
-    
-    print(f"정제된 민원 내용: {cleaned_question}")
-    return {"cleaned_question": cleaned_question}
+    logger.debug("노드 6: 민원 내용 필터링 및 정제")
+    return _sanitize_update(chains["filter_and_sanitize"].invoke({"question": state['question']}))
+
 
 def create_final_report_node(state: AgentState) -> dict:
     """7. 최종 보고서 생성 노드: 모든 정보를 취합하여 최종 결과물을 생성합니다."""
-    print("--- 노드 7: 최종 보고서 생성 ---")
-    
-    # 이전 단계의 `generate_answer_node`에서 생성한 답변 초안을 사용합니다.
-    report_chain = prompts.create_final_report_prompt | llm | StrOutputParser()
-    final_report_str = report_chain.invoke({
-        "question": state['question'],
-        "answer": state['assistant_answer'],
-        "cleaned_question": state['cleaned_question']
-    })
-    
-    print(f"최종 생성된 보고서:\n{final_report_str}")
-    # 최종 결과물을 'answer' 필드에 저장하여 출력을 통일합니다.
-    return {"answer": final_report_str}
\ No newline at end of file
+    logger.debug("노드 7: 최종 보고서 생성")
+    return _final_report_update(chains["create_final_report"].invoke(_final_report_inputs(state)))
+
+
+def create_fused_report_node(state: AgentState) -> dict:
+    """
+    5~7. 통합 보고서 노드: 답변, 정제된 민원 내용, 담당자 정보를 한 번의 구조화된 LLM 호출로 생성합니다.
+    출력을 해석할 수 없으면(출력 길이 제한으로 잘린 경우 등) 기존 세 노드를 차례로 실행합니다.
+    """
+    logger.debug("노드 5~7: 답변/정제/최종 보고서 통합 생성")
+    try:
+        report = chains["create_fused_report"].invoke(_answer_inputs(state))
+    except OutputParserException as e:
+        _fused_report_fallback(e)
+        update = generate_answer_node(state)
+        update.update(filter_and_sanitize_node({**state, **update}))
+        update.update(create_final_report_node({**state, **update}))
+        return update
+    return _fused_report_update(state, report)
+
+
+def lookup_answer_cache_node(state: AgentState) -> dict:
+    """시맨틱 답변 캐시 조회 노드: 정제된 민원과 유사한 과거 민원의 검색 문서/답변 초안을 찾습니다."""
+    logger.debug("답변 캐시 조회")
+    answer_cache = get_answer_cache()
+    return _answer_cache_update(answer_cache.lookup(state['cleaned_question']), answer_cache)
+
+
+def store_answer_cache_node(state: AgentState) -> dict:
+    """시맨틱 답변 캐시 저장 노드: 품질 평가를 통과한 검색 문서/답변 초안을 캐시에 저장합니다."""
+    if _is_cacheable(state):
+        get_answer_cache().store(state['cleaned_question'], state['documents'], state['assistant_answer'])
+    return {}
+
+
+# --- 비동기 노드 ---
+# 동일한 노드 로직을 `ainvoke`로 실행합니다. 그래프를 `ainvoke`/`astream`으로 구동하면 이벤트 루프를 막지 않습니다.
+
+
+async def aassess_question_node(state: AgentState) -> dict:
+    """1. 질문 분석 노드 (비동기)"""
+    assessment_result = _preset_assessment(state)
+    output = None if assessment_result else await chains["assess_question"].ainvoke({"question": state['question']})
+    return _question_assessment_update(state, assessment_result, output)
+
+
+async def arequest_clarification_node(state: AgentState) -> dict:
+    """2. 추가 정보 요청 노드 (비동기)"""
+    logger.debug("노드 2: 추가 정보 요청 (재질문 생성)")
+    return _clarification_update(state, await chains["request_clarification"].ainvoke({"question": state['question']}))
+
+
+async def aawait_clarification_node(state: AgentState) -> dict:
+    """2-1. 답변 대기 노드 (비동기)"""
+    return _clarification_reply_update(state, interrupt(state["messages"][-1].content))
+
+
+async def aretrieve_documents_node(state: AgentState) -> dict:
+    """3. 문서 검색 노드 (비동기)"""
+    logger.debug("노드 3: 관련 법령 문서 검색 (RAG)")
+    # 인덱스 변경 확인/로드는 파일 I/O이므로 이벤트 루프 밖에서 실행합니다.
+    await arefresh_vector_store()
+    attempt, retriever, query = _retrieval_plan(state)
+    return _retrieval_update(state, attempt, await retriever.ainvoke(query))
+
+
+async def aassess_answer_quality_node(state: AgentState) -> dict:
+    """4. 답변 품질 평가 노드 (비동기)"""
+    return _unchanged_quality(state) or _quality_update(
+        await chains["assess_answer_quality"].ainvoke(_quality_inputs(state)))
+
+
+async def agenerate_answer_node(state: AgentState) -> dict:
+    """5. 답변 초안 생성 노드 (비동기)"""
+    logger.debug("노드 5: 답변 초안 생성")
+    return _answer_update(await chains["generate_answer"].ainvoke(_answer_inputs(state)))
+
+
+async def afilter_and_sanitize_node(state: AgentState) -> dict:
+    """6. 민원 필터링 및 정제 노드 (비동기)"""
+    logger.debug("노드 6: 민원 내용 필터링 및 정제")
+    return _sanitize_update(await chains["filter_and_sanitize"].ainvoke({"question": state['question']}))
+
+
+async def acreate_final_report_node(state: AgentState) -> dict:
+    """7. 최종 보고서 생성 노드 (비동기)"""
+    logger.debug("노드 7: 최종 보고서 생성")
+    return _final_report_update(await chains["create_final_report"].ainvoke(_final_report_inputs(state)))
+
+
+async def acreate_fused_report_node(state: AgentState) -> dict:
+    """5~7. 통합 보고서 노드 (비동기)"""
+    logger.debug("노드 5~7: 답변/정제/최종 보고서 통합 생성")
+    try:
+        report = await chains["create_fused_report"].ainvoke(_answer_inputs(state))
+    except OutputParserException as e:
+        _fused_report_fallback(e)
+        update = await agenerate_answer_node(state)
+        update.update(await afilter_and_sanitize_node({**state, **update}))
+        update.update(await acreate_final_report_node({**state, **update}))
+        return update
+    return _fused_report_update(state, report)
+
+
+async def alookup_answer_cache_node(state: AgentState) -> dict:
+    """시맨틱 답변 캐시 조회 노드 (비동기)"""
+    logger.debug("답변 캐시 조회")
+    answer_cache = get_answer_cache()
+    return _answer_cache_update(await answer_cache.alookup(state['cleaned_question']), answer_cache)
+
+
+async def astore_answer_cache_node(state: AgentState) -> dict:
+    """시맨틱 답변 캐시 저장 노드 (비동기)"""
+    if _is_cacheable(state):
+        await get_answer_cache().astore(state['cleaned_question'], state['documents'], state['assistant_answer'])
+    return {}
@@ -0,0 +1,199 @@
+"""
+검색 문서 컨텍스트 패킹 모듈
+검색된 청크를 LLM에 보내기 전에 정리하여 프롬프트 토큰을 줄입니다.
+
+1. 같은 출처/페이지에서 겹치거나 이어지는 청크를 하나의 구절로 병합합니다.
+   (분할 시 `chunk_overlap`만큼 이웃 청크의 내용이 반복됩니다)
+2. 내용이 거의 같은 구절을 제거합니다.
+3. 검색 순위가 높은 구절부터 토큰 예산 안에 담고, 예산을 넘는 구절은 잘라냅니다.
+"""
+import logging
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+from langchain_core.documents import Document
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+# 텍스트만으로 청크 간 겹침을 찾을 때의 최소/최대 겹침 길이 (분할 설정의 chunk_overlap=150 기준)
+MIN_TEXT_OVERLAP = 30
+MAX_TEXT_OVERLAP = 400
+# 시작 위치(start_index)가 이 글자 수 이내로 떨어져 있으면 이어지는 청크로 봅니다.
+ADJACENT_GAP = 10
+SHINGLE_SIZE = 5
+# 잘린 구절이 이보다 짧으면 넣지 않습니다.
+MIN_TRUNCATED_TOKENS = 50
+
+
+class TokenCounter:
+    """tiktoken 인코더가 있으면 정확히, 없으면(오프라인 등) UTF-8 길이로 근사하여 토큰 수를 셉니다."""
+
+    def __init__(self, encoding=None):
+        self.encoding = encoding
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        # 한국어는 대략 한 글자(UTF-8 3바이트)가 토큰 하나에 해당합니다.
+        return math.ceil(len(text.encode("utf-8")) / 3)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self.encoding is not None:
+            return self.encoding.decode(self.encoding.encode(text)[:max_tokens])
+        total = self.count(text)
+        return text[:int(len(text) * max_tokens / total)] if total else text
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(encoding_name: str) -> TokenCounter:
+    try:
+        import tiktoken
+        return TokenCounter(tiktoken.get_encoding(encoding_name))
+    except Exception as e:
+        # 인코딩 파일을 내려받을 수 없는 환경에서도 패킹은 동작하도록 근사치를 사용합니다.
+        logger.warning("⚠️ tiktoken 인코딩(%s)을 불러오지 못해 토큰 수를 근사합니다: %s", encoding_name, e)
+        return TokenCounter()
+
+
+@dataclass
+class PackedContext:
+    passages: List[str]
+    tokens_before: int
+    tokens_after: int
+    merged: int = 0      # 병합으로 줄어든 청크 수
+    duplicates: int = 0  # 중복으로 제거된 구절 수
+    truncated: int = 0   # 예산 초과로 잘리거나 빠진 구절 수
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def summary(self) -> str:
+        return (f"컨텍스트 {self.tokens_before} -> {self.tokens_after} 토큰 ({self.tokens_saved} 절약) | "
+                f"병합 {self.merged}, 중복 제거 {self.duplicates}, 예산 초과 {self.truncated}")
+
+
+@dataclass
+class _Passage:
+    text: str
+    rank: int
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """`left`의 끝과 `right`의 시작이 겹치는 길이. 겹침이 없으면 0을 반환합니다."""
+    for size in range(min(len(left), len(right), MAX_TEXT_OVERLAP), MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge_by_offset(chunks: List[_Passage]) -> List[_Passage]:
+    """시작 위치 메타데이터가 있는 같은 페이지의 청크를 위치 순으로 병합합니다."""
+    merged: List[_Passage] = []
+    for chunk in sorted(chunks, key=lambda c: c.start):
+        last = merged[-1] if merged else None
+        if last is not None and chunk.start <= last.end + ADJACENT_GAP:
+            overlap = max(0, last.end - chunk.start)
+            if chunk.end > last.end:
+                last.text += ("" if overlap else "\n") + chunk.text[overlap:]
+                last.end = chunk.end
+            last.rank = min(last.rank, chunk.rank)
+        else:
+            merged.append(_Passage(chunk.text, chunk.rank, chunk.start, chunk.end))
+    return merged
+
+
+def _merge_by_text(chunks: List[_Passage]) -> List[_Passage]:
+    """시작 위치를 모르는 청크는 앞뒤 텍스트가 겹치는지로 이웃 여부를 판단하여 병합합니다."""
+    merged: List[_Passage] = []
+    for chunk in sorted(chunks, key=lambda c: c.rank):
+        for passage in merged:
+            if chunk.text in passage.text:
+                break
+            overlap = _text_overlap(passage.text, chunk.text)
+            if overlap:
+                passage.text += chunk.text[overlap:]
+                break
+            overlap = _text_overlap(chunk.text, passage.text)
+            if overlap:
+                passage.text = chunk.text + passage.text[overlap:]
+                break
+        else:
+            merged.append(_Passage(chunk.text, chunk.rank))
+    return merged
+
+
+def _shingles(text: str) -> set:
+    compact = "".join(text.split())
+    return {compact[i:i + SHINGLE_SIZE] for i in range(max(len(compact) - SHINGLE_SIZE + 1, 1))}
+
+
+def _drop_near_duplicates(passages: List[_Passage], threshold: float) -> List[_Passage]:
+    """짧은 쪽 구절의 shingle 중 `threshold` 이상이 이미 넣은 구절에 있으면 중복으로 봅니다."""
+    kept, kept_shingles = [], []
+    for passage in passages:
+        shingles = _shingles(passage.text)
+        duplicate = False
+        for other in kept_shingles:
+            smaller = min(len(shingles), len(other))
+            if smaller and len(shingles & other) / smaller >= threshold:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(passage)
+            kept_shingles.append(shingles)
+    return kept
+
+
+def pack_documents(documents: List[Document], token_budget: Optional[int] = None,
+                   dedup_threshold: Optional[float] = None, counter: Optional[TokenCounter] = None) -> PackedContext:
+    """검색된 문서(검색 순위 순)를 병합/중복 제거/토큰 예산 적용하여 구절 목록으로 만듭니다."""
+    token_budget = settings.CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    dedup_threshold = settings.CONTEXT_DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+    counter = counter or get_token_counter(settings.CONTEXT_TOKENIZER_ENCODING)
+    tokens_before = counter.count(CONTEXT_SEPARATOR.join(doc.page_content for doc in documents))
+
+    # 1. 같은 출처/페이지끼리 모아 병합합니다.
+    groups = {}
+    for rank, doc in enumerate(documents):
+        start = doc.metadata.get("start_index")
+        end = start + len(doc.page_content) if start is not None else None
+        key = (doc.metadata.get("source"), doc.metadata.get("page"))
+        groups.setdefault(key, []).append(_Passage(doc.page_content, rank, start, end))
+    passages = []
+    for chunks in groups.values():
+        if all(chunk.start is not None for chunk in chunks):
+            passages.extend(_merge_by_offset(chunks))
+        else:
+            passages.extend(_merge_by_text(chunks))
+    passages.sort(key=lambda p: p.rank)
+    merged = len(documents) - len(passages)
+
+    # 2. 거의 같은 구절을 제거합니다.
+    unique = _drop_near_duplicates(passages, dedup_threshold)
+    duplicates = len(passages) - len(unique)
+
+    # 3. 순위가 높은 구절부터 토큰 예산 안에 담습니다.
+    packed, used, truncated = [], 0, 0
+    separator_tokens = counter.count(CONTEXT_SEPARATOR)
+    for passage in unique:
+        cost = counter.count(passage.text) + (separator_tokens if packed else 0)
+        if used + cost <= token_budget:
+            packed.append(passage.text)
+            used += cost
+            continue
+        truncated += 1
+        remaining = token_budget - used - (separator_tokens if packed else 0)
+        if remaining >= MIN_TRUNCATED_TOKENS:
+            packed.append(counter.truncate(passage.text, remaining))
+            used = token_budget
+
+    tokens_after = counter.count(CONTEXT_SEPARATOR.join(packed))
+    return PackedContext(packed, tokens_before, tokens_after, merged, duplicates, truncated)
@@ -0,0 +1,142 @@
+"""
+지연 로딩 문서 저장소(docstore) 모듈
+LangChain FAISS의 `index.pkl`은 모든 청크의 본문/메타데이터를 한 번에 역직렬화(pickle)합니다.
+SQLite 형식(`docstore.sqlite3`)은 시작 시 (인덱스 위치 -> 문서 ID) 목록만 읽고,
+검색된 청크의 본문은 필요할 때 한 건씩 읽어 zstd로 압축을 풉니다.
+
+- 본문은 청크 샘플로 학습한 zstd 사전으로 압축하여 짧은 청크도 압축률을 확보합니다.
+- 서버는 파일을 읽기 전용으로 열고, 스레드마다 별도의 연결을 사용합니다.
+"""
+import json
+import os
+import pickle
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Dict, Tuple, Union
+
+import zstandard
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+DOCSTORE_FORMATS = ("pickle", "sqlite")
+PICKLE_DOCSTORE_FILE = "index.pkl"
+SQLITE_DOCSTORE_FILE = "docstore.sqlite3"
+ZSTD_LEVEL = 9
+ZSTD_DICT_SIZE = 64 * 1024
+# 사전 학습에 필요한 최소 청크 수 (너무 적으면 사전 없이 압축합니다)
+ZSTD_DICT_MIN_SAMPLES = 100
+
+
+class SqliteDocstore(Docstore):
+    """SQLite 파일에서 청크를 한 건씩 읽는 읽기 전용 docstore입니다."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'zstd_dict'").fetchone()
+        self._dict_data = zstandard.ZstdCompressionDict(row[0]) if row else None
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+
+    def _thread_state(self):
+        """스레드별 (연결, 압축 해제기)를 반환합니다. zstd 압축 해제기는 스레드 간에 공유할 수 없습니다."""
+        state = getattr(self._local, "state", None)
+        if state is None:
+            decompressor = (zstandard.ZstdDecompressor(dict_data=self._dict_data)
+                            if self._dict_data else zstandard.ZstdDecompressor())
+            state = self._local.state = (self._connect(), decompressor)
+        return state
+
+    def search(self, search: str) -> Union[str, Document]:
+        conn, decompressor = self._thread_state()
+        row = conn.execute("SELECT content, metadata FROM documents WHERE id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(
+            id=search,
+            page_content=decompressor.decompress(row[0]).decode("utf-8"),
+            metadata=json.loads(row[1]),
+        )
+
+    def index_to_docstore_id(self) -> Dict[int, str]:
+        """FAISS 인덱스 위치 -> 문서 ID 매핑. 시작 시 읽는 유일한 데이터입니다."""
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT position, id FROM documents ORDER BY position"))
+
+    def to_memory(self) -> InMemoryDocstore:
+        """모든 청크를 메모리로 읽습니다. (증분 적재 시 문서 추가/삭제용)"""
+        return InMemoryDocstore({doc_id: self.search(doc_id) for doc_id in self.index_to_docstore_id().values()})
+
+
+def write_sqlite_docstore(path: str, docstore, index_to_docstore_id: Dict[int, str]) -> None:
+    """docstore를 SQLite 형식으로 저장합니다."""
+    positions = sorted(index_to_docstore_id)
+    documents = [(position, index_to_docstore_id[position]) for position in positions]
+    contents = [docstore.search(doc_id).page_content.encode("utf-8") for _, doc_id in documents]
+
+    dict_data = None
+    if len(contents) >= ZSTD_DICT_MIN_SAMPLES:
+        dict_data = zstandard.train_dictionary(ZSTD_DICT_SIZE, contents)
+    compressor = (zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data)
+                  if dict_data else zstandard.ZstdCompressor(level=ZSTD_LEVEL))
+
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value BLOB)")
+        conn.execute(
+            "CREATE TABLE documents ("
+            " position INTEGER PRIMARY KEY,"
+            " id TEXT NOT NULL UNIQUE,"
+            " content BLOB NOT NULL,"
+            " metadata TEXT NOT NULL)"
+        )
+        if dict_data:
+            conn.execute("INSERT INTO meta (key, value) VALUES ('zstd_dict', ?)", (dict_data.as_bytes(),))
+        conn.executemany(
+            "INSERT INTO documents (position, id, content, metadata) VALUES (?, ?, ?, ?)",
+            (
+                (position, doc_id, compressor.compress(content),
+                 json.dumps(docstore.search(doc_id).metadata, ensure_ascii=False))
+                for (position, doc_id), content in zip(documents, contents)
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def write_docstore(directory: str, vector_store, docstore_format: str) -> None:
+    """Vector Store의 docstore를 지정한 형식으로 저장합니다."""
+    if docstore_format not in DOCSTORE_FORMATS:
+        raise ValueError(f"지원하지 않는 docstore 형식입니다: {docstore_format} (가능: {', '.join(DOCSTORE_FORMATS)})")
+    if docstore_format == "pickle":
+        with open(os.path.join(directory, PICKLE_DOCSTORE_FILE), "wb") as f:
+            pickle.dump((vector_store.docstore, vector_store.index_to_docstore_id), f)
+    else:
+        write_sqlite_docstore(
+            os.path.join(directory, SQLITE_DOCSTORE_FILE), vector_store.docstore, vector_store.index_to_docstore_id
+        )
+
+
+def read_docstore(directory: str, docstore_format: str, lazy: bool = True) -> Tuple[Docstore, Dict[int, str]]:
+    """
+    저장된 docstore와 (인덱스 위치 -> 문서 ID) 매핑을 읽습니다.
+    `lazy`가 False면 SQLite 형식도 모든 청크를 메모리로 읽습니다. (문서를 추가/삭제해야 하는 경우)
+    """
+    if docstore_format == "sqlite":
+        docstore = SqliteDocstore(os.path.join(directory, SQLITE_DOCSTORE_FILE))
+        index_to_docstore_id = docstore.index_to_docstore_id()
+        return (docstore if lazy else docstore.to_memory()), index_to_docstore_id
+    with open(os.path.join(directory, PICKLE_DOCSTORE_FILE), "rb") as f:
+        return pickle.load(f)
+
+
+def recorded_format(manifest) -> str:
+    """매니페스트에 기록된 docstore 형식. 기록이 없는 이전 인덱스는 pickle 형식입니다."""
+    return (manifest or {}).get("docstore", "pickle")
@@ -0,0 +1,191 @@
+"""
+임베딩 캐시 모듈
+청크/질의 텍스트와 모델 이름의 해시를 키로 임베딩 벡터를 디스크(SQLite)에 저장합니다.
+인덱스를 다시 만들거나 같은 질의가 반복될 때 임베딩 API 호출을 건너뜁니다.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import xxhash
+from langchain_core.embeddings import Embeddings
+
+
+def embedding_cache_key(model: str, text: str) -> bytes:
+    """모델 이름과 텍스트로 128비트 캐시 키를 만듭니다."""
+    return xxhash.xxh3_128_digest(f"{model}\x00{text}".encode("utf-8"))
+
+
+def upsert_sized_rows(conn: sqlite3.Connection, table: str, columns: tuple, size_sql: str,
+                      rows: List[tuple], sizes: List[int]) -> int:
+    """
+    `INSERT OR REPLACE`로 행들을 한 트랜잭션에 저장하고, 테이블 전체 크기의 변화량(바이트)을 반환합니다.
+    첫 번째 열(`key`)이 같은 행은 마지막 것만 저장하고, 덮어쓴 기존 행의 크기(`size_sql`)는 빼서 두 번 세지 않습니다.
+    (크기 제한 캐시들이 함께 사용하며, 호출자는 캐시의 락을 잡고 있어야 합니다)
+    """
+    latest = {row[0]: (row, size) for row, size in zip(rows, sizes)}
+    keys = list(latest)
+    conn.execute("BEGIN")
+    try:
+        replaced = 0
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            replaced += conn.execute(
+                f"SELECT COALESCE(SUM({size_sql}), 0) FROM {table} WHERE key IN ({placeholders})", batch
+            ).fetchone()[0]
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({','.join('?' * len(columns))})",
+            [row for row, _ in latest.values()],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return sum(size for _, size in latest.values()) - replaced
+
+
+class EmbeddingCache:
+    """
+    SQLite 기반의 크기 제한 임베딩 캐시입니다.
+
+    - 벡터는 float32 바이트열로 저장하여 크기를 최소화합니다. (1536차원 = 6KB)
+    - 전체 크기가 `max_bytes`를 넘으면 가장 오래 사용되지 않은 항목부터 삭제합니다. (LRU)
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key BLOB PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_accessed ON embeddings(accessed_at)")
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """저장된 벡터를 찾아 {키: 벡터}로 반환하고, 찾은 항목의 사용 시각을 갱신합니다."""
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, vector in rows:
+                    found[bytes(key)] = np.frombuffer(vector, dtype=np.float32).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+        return found
+
+    def put_many(self, items: Dict[bytes, List[float]]) -> None:
+        """벡터를 저장하고 크기 제한을 넘으면 오래된 항목을 삭제합니다."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            self._total_bytes += upsert_sized_rows(
+                self._conn, "embeddings", ("key", "vector", "accessed_at"), "LENGTH(vector)",
+                rows, [len(row[1]) for row in rows],
+            )
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """전체 크기가 한도의 90% 이하가 될 때까지 LRU 순서로 삭제합니다. 호출자는 `_lock`을 잡고 있어야 합니다."""
+        target = int(self.max_bytes * 0.9)
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY accessed_at LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            removed = []
+            for key, size in rows:
+                removed.append((key,))
+                self._total_bytes -= size
+                if self._total_bytes <= target:
+                    break
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", removed)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    임베딩 클라이언트를 감싸 문서/질의 임베딩 모두에 디스크 캐시를 적용합니다.
+    캐시에 없는 텍스트만 모아서 한 번에 원래 클라이언트로 요청합니다.
+    """
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache, model: str):
+        self.underlying = underlying
+        self.cache = cache
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+
+    def _split(self, texts: List[str]):
+        keys = [embedding_cache_key(self.model, text) for text in texts]
+        return keys, self.cache.get_many(keys)
+
+    def _merge(self, texts: List[str], keys: List[bytes], found: Dict[bytes, List[float]],
+               missing_vectors: Optional[List[List[float]]]) -> List[List[float]]:
+        missing_index = [i for i, key in enumerate(keys) if key not in found]
+        self.hits += len(texts) - len(missing_index)
+        self.misses += len(missing_index)
+        if missing_index:
+            new_items = {keys[i]: vector for i, vector in zip(missing_index, missing_vectors)}
+            self.cache.put_many(new_items)
+            found = {**found, **new_items}
+        return [found[key] for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found = self._split(texts)
+        missing = [text for key, text in zip(keys, texts) if key not in found]
+        vectors = self.underlying.embed_documents(missing) if missing else []
+        return self._merge(texts, keys, found, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = embedding_cache_key(self.model, text)
+        found = self.cache.get_many([key])
+        vectors = None if found else [self.underlying.embed_query(text)]
+        return self._merge([text], [key], found, vectors)[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found = await asyncio.to_thread(self._split, texts)
+        missing = [text for key, text in zip(keys, texts) if key not in found]
+        vectors = await self.underlying.aembed_documents(missing) if missing else []
+        return await asyncio.to_thread(self._merge, texts, keys, found, vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = embedding_cache_key(self.model, text)
+        found = await asyncio.to_thread(self.cache.get_many, [key])
+        vectors = None if found else [await self.underlying.aembed_query(text)]
+        return (await asyncio.to_thread(self._merge, [text], [key], found, vectors))[0]
@@ -0,0 +1,163 @@
+"""
+임베딩 백엔드 모듈
+설정(`EMBEDDING_BACKEND`)에 따라 Vector Store 생성/검색에 사용할 임베딩 모델을 만듭니다.
+
+- openai: OpenAI 임베딩 API (`EMBEDDING_MODEL`)
+- local: 프로세스 안에서 NumPy로 계산하는 문자 n-gram 특징 해싱 임베딩 (CPU, 네트워크/모델 파일 불필요)
+
+인덱스 매니페스트에 백엔드/모델/차원(`EmbeddingSpec`)을 기록하고, 로드할 때 현재 설정과 비교하여
+다른 임베딩으로 만든 인덱스를 검색에 사용하지 않도록 바로 오류를 냅니다.
+"""
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.config import settings
+
+EMBEDDING_BACKENDS = ("openai", "local")
+LOCAL_EMBEDDING_MODEL = "char-ngram-hash-v1"
+# OpenAI 임베딩 모델별 기본 차원
+OPENAI_EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+class EmbeddingMismatchError(ValueError):
+    """인덱스를 만든 임베딩과 현재 설정한 임베딩이 다를 때 발생합니다."""
+
+
+@dataclass(frozen=True)
+class EmbeddingSpec:
+    """임베딩 백엔드/모델/차원. 인덱스 매니페스트의 `embedding` 항목으로 기록됩니다."""
+    backend: str
+    model: str
+    dimension: Optional[int] = None
+
+    @classmethod
+    def from_settings(cls) -> "EmbeddingSpec":
+        if settings.EMBEDDING_BACKEND == "local":
+            return cls("local", LOCAL_EMBEDDING_MODEL, settings.EMBEDDING_LOCAL_DIMENSION)
+        return cls(settings.EMBEDDING_BACKEND, settings.EMBEDDING_MODEL,
+                   OPENAI_EMBEDDING_DIMENSIONS.get(settings.EMBEDDING_MODEL))
+
+    @classmethod
+    def from_manifest(cls, manifest: Optional[dict]) -> Optional["EmbeddingSpec"]:
+        """매니페스트에 기록된 임베딩. 모델 이름만 기록된 이전 형식은 OpenAI 임베딩으로 간주합니다."""
+        if not manifest:
+            return None
+        if "embedding" in manifest:
+            return cls(**manifest["embedding"])
+        if "embedding_model" in manifest:
+            model = manifest["embedding_model"]
+            return cls("openai", model, OPENAI_EMBEDDING_DIMENSIONS.get(model))
+        return None
+
+    def to_manifest(self) -> dict:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        return f"{self.backend}/{self.model} ({self.dimension or '?'}차원)"
+
+
+def check_embedding_spec(manifest: Optional[dict], spec: EmbeddingSpec, index_dimension: Optional[int] = None) -> None:
+    """
+    인덱스를 만든 임베딩(매니페스트 기록, 인덱스 차원)이 `spec`과 같은지 확인합니다.
+    다르면 `EmbeddingMismatchError`를 발생시킵니다. (기록이 없는 항목은 비교하지 않습니다)
+    """
+    hint = "설정을 되돌리거나 `python -m app.rag.ingest rebuild`로 인덱스를 다시 만드세요."
+    recorded = EmbeddingSpec.from_manifest(manifest)
+    if recorded is not None and (
+        (recorded.backend, recorded.model) != (spec.backend, spec.model)
+        or (recorded.dimension and spec.dimension and recorded.dimension != spec.dimension)
+    ):
+        raise EmbeddingMismatchError(f"인덱스는 {recorded} 임베딩으로 만들어졌지만 현재 설정은 {spec}입니다. {hint}")
+    if index_dimension is not None and spec.dimension and index_dimension != spec.dimension:
+        raise EmbeddingMismatchError(
+            f"인덱스 벡터 차원({index_dimension})이 현재 임베딩 {spec}과 다릅니다. {hint}"
+        )
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    문자 n-gram 특징 해싱 임베딩입니다.
+
+    공백을 정규화한 텍스트의 문자 n-gram(기본 1~3글자)을 해시하여 `dimension`개 버킷에 부호와 함께 더하고,
+    로그 스케일 후 L2 정규화합니다. 배치의 모든 텍스트를 하나의 코드포인트 배열로 이어 붙여
+    n-gram 해시와 버킷 집계(`np.bincount`)를 한 번에 계산하므로, 텍스트마다 Python 루프를 돌지 않습니다.
+
+    학습된 모델이 아니므로 의미적 유사도가 아닌 표현(글자) 겹침을 반영합니다.
+    상태가 없어 여러 스레드에서 동시에 호출해도 안전합니다.
+    """
+
+    # 64비트 FNV-1a 파라미터와 n-gram 길이별 시드
+    _FNV_PRIME = np.uint64(0x100000001B3)
+    _FNV_OFFSET = 0xCBF29CE484222325
+
+    def __init__(self, dimension: int = 1024, ngram_sizes: Sequence[int] = (1, 2, 3), batch_size: int = 256):
+        self.dimension = dimension
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _codepoints(texts: List[str]):
+        """(코드포인트 배열, 텍스트별 길이)를 반환합니다. 대소문자와 연속 공백은 정규화합니다."""
+        codes = [np.frombuffer(" ".join(text.lower().split()).encode("utf-32-le"), dtype=np.uint32) for text in texts]
+        lengths = np.fromiter((len(code) for code in codes), dtype=np.int64, count=len(codes))
+        flat = np.concatenate(codes).astype(np.uint64) if lengths.sum() else np.zeros(0, dtype=np.uint64)
+        return flat, lengths
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        flat, lengths = self._codepoints(texts)
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        counts = np.zeros(len(texts) * self.dimension, dtype=np.float64)
+        for size in self.ngram_sizes:
+            count = len(flat) - size + 1
+            if count <= 0:
+                continue
+            hashes = np.full(count, self._FNV_OFFSET ^ size, dtype=np.uint64)
+            for offset in range(size):
+                hashes = (hashes ^ flat[offset:offset + count]) * self._FNV_PRIME
+            # 텍스트 경계를 넘는 n-gram은 제외합니다.
+            valid = rows[:count] == rows[size - 1:size - 1 + count]
+            hashes = hashes[valid]
+            hashes ^= hashes >> np.uint64(32)
+            buckets = rows[:count][valid] * self.dimension + (hashes % np.uint64(self.dimension)).astype(np.int64)
+            signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+            counts += np.bincount(buckets, weights=signs, minlength=len(counts))
+
+        vectors = counts.reshape(len(texts), self.dimension)
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """텍스트 목록을 (텍스트 수, 차원) float32 배열로 임베딩합니다."""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.vstack([self._embed_batch(texts[i:i + self.batch_size])
+                          for i in range(0, len(texts), self.batch_size)])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # 질의 하나는 수십 마이크로초면 끝나므로 스레드로 넘기지 않고 바로 계산합니다.
+        return self.embed_query(text)
+
+
+def create_embedding_backend(spec: EmbeddingSpec) -> Embeddings:
+    """`spec`의 백엔드로 임베딩 모델을 만듭니다. (캐시를 거치지 않는 원본)"""
+    if spec.backend == "local":
+        return HashingEmbeddings(dimension=spec.dimension)
+    if spec.backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        # 속도 제한을 켜면 재시도는 `RateLimitedEmbeddings`가 조율합니다.
+        return OpenAIEmbeddings(model=spec.model, max_retries=0 if settings.RATE_LIMIT_ENABLED else 2)
+    raise ValueError(f"지원하지 않는 임베딩 백엔드입니다: {spec.backend} (가능: {', '.join(EMBEDDING_BACKENDS)})")
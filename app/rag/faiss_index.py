@@ -0,0 +1,155 @@
+"""
+FAISS 인덱스 유형 모듈
+Flat(정확 검색) 인덱스를 원본으로 유지하고, 설정한 근사 검색(ANN) 인덱스(IVF-Flat, HNSW, IVF-PQ)를
+`index.ann.faiss`로 따로 만들어 검색에 사용합니다. 증분 적재(sync)는 항상 Flat 원본에 반영한 뒤
+ANN 인덱스를 다시 만들기 때문에, 삭제를 지원하지 않는 HNSW도 함께 사용할 수 있습니다.
+
+서버에서는 인덱스를 읽기 전용 메모리 맵으로 열어, 여러 프로세스가 같은 파일의 페이지 캐시를 공유합니다.
+"""
+import math
+import os
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from app.config import settings
+from app.rag.docstore import read_docstore, recorded_format
+
+INDEX_TYPES = ("Flat", "IVF-Flat", "HNSW", "IVF-PQ")
+FLAT_INDEX_FILE = "index.faiss"
+ANN_INDEX_FILE = "index.ann.faiss"
+
+
+@dataclass
+class IndexSpec:
+    """인덱스 유형과 빌드/검색 파라미터"""
+    index_type: str = "Flat"
+    ivf_nlist: int = 1024
+    ivf_nprobe: int = 16
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+    pq_m: int = 64
+    pq_nbits: int = 8
+
+    def __post_init__(self):
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"지원하지 않는 FAISS 인덱스 유형입니다: {self.index_type} (가능: {', '.join(INDEX_TYPES)})")
+
+    @classmethod
+    def from_settings(cls) -> "IndexSpec":
+        return cls(
+            index_type=settings.FAISS_INDEX_TYPE,
+            ivf_nlist=settings.FAISS_IVF_NLIST,
+            ivf_nprobe=settings.FAISS_IVF_NPROBE,
+            hnsw_m=settings.FAISS_HNSW_M,
+            hnsw_ef_construction=settings.FAISS_HNSW_EF_CONSTRUCTION,
+            hnsw_ef_search=settings.FAISS_HNSW_EF_SEARCH,
+            pq_m=settings.FAISS_PQ_M,
+            pq_nbits=settings.FAISS_PQ_NBITS,
+        )
+
+    @property
+    def is_ivf(self) -> bool:
+        return self.index_type.startswith("IVF")
+
+    def build_params(self) -> dict:
+        """저장된 인덱스 파일의 구조를 결정하는 파라미터 (검색 시점 파라미터 nprobe/efSearch 제외)"""
+        params = asdict(self)
+        params.pop("ivf_nprobe")
+        params.pop("hnsw_ef_search")
+        return params
+
+
+def create_index(spec: IndexSpec, vectors: np.ndarray) -> faiss.Index:
+    """벡터로 인덱스를 학습/생성합니다. 벡터 수가 적으면 nlist/nbits를 학습 가능한 값으로 줄입니다."""
+    count, dimension = vectors.shape
+    if spec.index_type == "Flat":
+        index = faiss.IndexFlatL2(dimension)
+    elif spec.index_type == "HNSW":
+        index = faiss.IndexHNSWFlat(dimension, spec.hnsw_m)
+        index.hnsw.efConstruction = spec.hnsw_ef_construction
+    else:
+        # k-means 학습에는 군집당 약 39개 이상의 벡터가 필요합니다.
+        nlist = max(1, min(spec.ivf_nlist, count // 39))
+        quantizer = faiss.IndexFlatL2(dimension)
+        if spec.index_type == "IVF-Flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+        else:
+            # 서브벡터 수는 차원의 약수여야 하고, 코드북 크기(2^nbits)는 학습 벡터 수를 넘을 수 없습니다.
+            pq_m = max(m for m in range(1, min(spec.pq_m, dimension) + 1) if dimension % m == 0)
+            nbits = max(1, min(spec.pq_nbits, int(math.log2(max(count, 2)))))
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, nbits)
+        index.train(vectors)
+    index.add(vectors)
+    apply_search_params(index, spec)
+    return index
+
+
+def apply_search_params(index: faiss.Index, spec: IndexSpec) -> None:
+    """검색 시점 파라미터(nprobe/efSearch)를 적용합니다."""
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = spec.ivf_nprobe
+        # MMR 검색은 저장된 벡터를 복원(reconstruct)하므로 ID -> 위치 매핑이 필요합니다.
+        index.make_direct_map()
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = spec.hnsw_ef_search
+
+
+def flat_vectors(index: faiss.Index) -> np.ndarray:
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def write_ann_index(directory: str, flat_index: faiss.Index, spec: IndexSpec) -> None:
+    """Flat 원본으로 설정된 유형의 ANN 인덱스를 만들어 저장합니다. Flat 유형이면 아무것도 하지 않습니다."""
+    if spec.index_type == "Flat":
+        return
+    index = create_index(spec, flat_vectors(flat_index))
+    faiss.write_index(index, os.path.join(directory, ANN_INDEX_FILE))
+    print(f"{spec.index_type} 인덱스를 생성했습니다. (벡터 {index.ntotal}개)")
+
+
+def read_index(path: str, mmap: bool, spec: IndexSpec) -> faiss.Index:
+    """인덱스 파일을 읽습니다. `mmap`이면 읽기 전용 메모리 맵으로 열고, 지원하지 않으면 일반 읽기로 대체합니다."""
+    if mmap:
+        # IVF 계열은 역색인 목록을, Flat/HNSW는 벡터 저장소를 메모리 맵으로 엽니다.
+        flags = faiss.IO_FLAG_READ_ONLY | (faiss.IO_FLAG_MMAP if spec.is_ivf else faiss.IO_FLAG_MMAP_IFC)
+        try:
+            return faiss.read_index(path, flags)
+        except RuntimeError as e:
+            print(f"⚠️ 메모리 맵으로 인덱스를 열지 못해 전체를 메모리로 읽습니다: {e}")
+    return faiss.read_index(path)
+
+
+def load_faiss_store(path: str, embeddings, manifest: Optional[dict], spec: Optional[IndexSpec] = None,
+                     mmap: bool = True) -> FAISS:
+    """
+    검색용 Vector Store를 로드합니다.
+    설정한 유형의 ANN 인덱스가 매니페스트와 일치하면 그것을, 아니면 Flat 원본을 사용합니다.
+    (ANN 인덱스가 없거나 설정이 바뀌었으면 Flat 원본으로 메모리에서 새로 만듭니다.)
+    """
+    spec = spec or IndexSpec.from_settings()
+    recorded = (manifest or {}).get("index")
+    ann_path = os.path.join(path, ANN_INDEX_FILE)
+    if spec.index_type == "Flat":
+        index = read_index(os.path.join(path, FLAT_INDEX_FILE), mmap, spec)
+    elif recorded == spec.build_params() and os.path.exists(ann_path):
+        index = read_index(ann_path, mmap, spec)
+    else:
+        print(f"⚠️ 저장된 {spec.index_type} 인덱스가 없거나 설정과 달라 메모리에서 생성합니다. "
+              f"(`python -m app.rag.ingest index`로 미리 만들 수 있습니다)")
+        index = create_index(spec, flat_vectors(faiss.read_index(os.path.join(path, FLAT_INDEX_FILE))))
+    apply_search_params(index, spec)
+
+    docstore, index_to_docstore_id = read_docstore(path, recorded_format(manifest))
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def load_flat_store(path: str, embeddings, manifest: Optional[dict]) -> FAISS:
+    """문서를 추가/삭제할 수 있도록 Flat 원본과 docstore 전체를 메모리로 읽습니다. (증분 적재용)"""
+    index = faiss.read_index(os.path.join(path, FLAT_INDEX_FILE))
+    docstore, index_to_docstore_id = read_docstore(path, recorded_format(manifest), lazy=False)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
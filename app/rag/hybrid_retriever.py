@@ -0,0 +1,107 @@
+"""
+하이브리드(BM25 + 벡터) 리트리버 모듈
+- 조문 번호가 들어간 짧은 조회형 질의는 BM25만으로 답하여 임베딩 API 호출을 건너뜁니다.
+- 그 밖의 질의는 BM25 순위와 벡터 검색 순위를 RRF(Reciprocal Rank Fusion)로 결합합니다.
+- 재검색용(`lambda_mult` 지정)은 벡터 후보를 MMR 순서로 바꿔 결합하므로 BM25를 유지하면서 다양한 청크를 고릅니다.
+"""
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import Field
+
+from app.rag.lexical import LexicalIndex, is_exact_term_query
+
+
+@dataclass
+class HybridSearchStats:
+    lexical_only: int = 0  # 임베딩 없이 BM25만으로 답한 질의 수
+    hybrid: int = 0        # 임베딩을 호출하여 결합 검색한 질의 수
+    # 공유 리트리버를 여러 스레드에서 동시에 사용하므로 카운터는 락을 잡고 갱신합니다.
+    _lock: Any = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def count(self, lexical_only: bool) -> None:
+        with self._lock:
+            if lexical_only:
+                self.lexical_only += 1
+            else:
+                self.hybrid += 1
+
+    @property
+    def embedding_skip_rate(self) -> float:
+        total = self.lexical_only + self.hybrid
+        return self.lexical_only / total if total else 0.0
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "lexical_only": self.lexical_only,
+                "hybrid": self.hybrid,
+                "embedding_skip_rate": self.embedding_skip_rate,
+            }
+
+
+class HybridRetriever(BaseRetriever):
+    """같은 청크에 대한 BM25 역색인과 FAISS 인덱스를 함께 사용하는 리트리버입니다."""
+
+    vector_store: FAISS
+    lexical_index: LexicalIndex
+    k: int = 5
+    fetch_k: int = 20  # 결합 전 각 검색에서 가져올 후보 수
+    rrf_k: int = 60
+    lambda_mult: Optional[float] = None  # 지정하면 벡터 후보를 MMR로 다시 정렬합니다. (재검색용)
+    stats: HybridSearchStats = Field(default_factory=HybridSearchStats)
+
+    def _documents(self, doc_ids: List[str]) -> List[Document]:
+        return [self.vector_store.docstore.search(doc_id) for doc_id in doc_ids]
+
+    def _lexical_only(self, query: str) -> Optional[List[Document]]:
+        """조회형 질의이고 BM25 결과가 있으면 그대로 반환합니다. 아니면 None. (재검색은 결합 검색으로 넓힙니다)"""
+        if self.lambda_mult is not None or not is_exact_term_query(query):
+            return None
+        hits = self.lexical_index.search(query, self.k)
+        if not hits:
+            return None
+        self.stats.count(lexical_only=True)
+        return self._documents([doc_id for doc_id, _ in hits])
+
+    def _vector_ids(self, embedding: List[float]) -> List[str]:
+        vector = np.asarray([embedding], dtype=np.float32)
+        _, positions = self.vector_store.index.search(vector, self.fetch_k)
+        positions = [int(i) for i in positions[0] if i != -1]
+        if self.lambda_mult is not None and positions:
+            vectors = [self.vector_store.index.reconstruct(i) for i in positions]
+            order = maximal_marginal_relevance(vector[0], vectors, lambda_mult=self.lambda_mult, k=len(positions))
+            positions = [positions[i] for i in order]
+        return [self.vector_store.index_to_docstore_id[i] for i in positions]
+
+    def _fuse(self, query: str, embedding: List[float]) -> List[Document]:
+        self.stats.count(lexical_only=False)
+        vector_ids = self._vector_ids(embedding)
+        lexical_ids = [doc_id for doc_id, _ in self.lexical_index.search(query, self.fetch_k)]
+
+        scores = defaultdict(float)
+        for ranking in (vector_ids, lexical_ids):
+            for rank, doc_id in enumerate(ranking):
+                scores[doc_id] += 1.0 / (self.rrf_k + rank + 1)
+        return self._documents(sorted(scores, key=scores.get, reverse=True)[:self.k])
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        documents = self._lexical_only(query)
+        if documents is not None:
+            return documents
+        return self._fuse(query, self.vector_store.embeddings.embed_query(query))
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        documents = self._lexical_only(query)
+        if documents is not None:
+            return documents
+        return self._fuse(query, await self.vector_store.embeddings.aembed_query(query))
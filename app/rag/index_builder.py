@@ -0,0 +1,178 @@
+"""
+병렬 인덱스 빌드 파이프라인
+PDF 파싱/분할(프로세스 풀) -> 임베딩(동시 실행 수가 제한된 스레드 풀) -> 단일 FAISS 인덱스에 추가
+세 단계를 스트리밍으로 겹쳐 실행하고, 단계별 처리량을 담은 빌드 리포트를 만듭니다.
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.vectorstores import FAISS
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+@dataclass
+class StageTiming:
+    """파이프라인 단계 하나의 처리량 측정값 (처음 시작 ~ 마지막 종료 구간 기준)"""
+    count: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def record(self, count: int, started_at: float, finished_at: float) -> None:
+        self.count += count
+        self.started_at = started_at if self.started_at is None else min(self.started_at, started_at)
+        self.finished_at = finished_at if self.finished_at is None else max(self.finished_at, finished_at)
+
+    @property
+    def seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    @property
+    def per_second(self) -> float:
+        return self.count / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class BuildReport:
+    """인덱스 빌드 결과 리포트"""
+    files: int = 0
+    parse: StageTiming = field(default_factory=StageTiming)   # 페이지 수
+    split: StageTiming = field(default_factory=StageTiming)   # 청크 수
+    embed: StageTiming = field(default_factory=StageTiming)   # 벡터 수
+    total_seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"PDF {self.files}개 | "
+            f"파싱 {self.parse.count}페이지 ({self.parse.per_second:.1f} pages/s) | "
+            f"분할 {self.split.count}청크 ({self.split.per_second:.1f} chunks/s) | "
+            f"임베딩 {self.embed.count}벡터 ({self.embed.per_second:.1f} vectors/s) | "
+            f"총 {self.total_seconds:.2f}s"
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "files": self.files,
+            "pages": self.parse.count,
+            "chunks": self.split.count,
+            "vectors": self.embed.count,
+            "pages_per_second": self.parse.per_second,
+            "chunks_per_second": self.split.per_second,
+            "vectors_per_second": self.embed.per_second,
+            "total_seconds": self.total_seconds,
+        }
+
+
+def parse_and_split_pdf(path: str, chunk_size: int, chunk_overlap: int) -> dict:
+    """
+    PDF 하나를 파싱/분할합니다. 프로세스 풀에서 실행되므로 모듈 최상위 함수로 둡니다.
+    단계별 시작/종료 시각을 함께 돌려주어 메인 프로세스에서 처리량을 집계합니다.
+    """
+    parse_started = time.time()
+    pages = PyPDFLoader(path).load()
+    parse_finished = time.time()
+    # 청크의 페이지 내 시작 위치(start_index)를 기록하여, 검색 후 이웃 청크를 병합할 때 사용합니다.
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+    )
+    splits = text_splitter.split_documents(pages)
+    return {
+        "path": path,
+        "pages": len(pages),
+        "splits": splits,
+        "parse": (parse_started, parse_finished),
+        "split": (parse_finished, time.time()),
+    }
+
+
+def _embed_batch(embeddings, texts: List[str]) -> Tuple[List[List[float]], float, float]:
+    started = time.time()
+    vectors = embeddings.embed_documents(texts)
+    return vectors, started, time.time()
+
+
+def build_index(
+    embeddings,
+    paths: List[str],
+    make_ids: Callable[[str, int], List[str]],
+    chunk_size: int,
+    chunk_overlap: int,
+    vector_store: Optional[FAISS] = None,
+    parse_workers: int = 0,
+    embed_concurrency: int = 4,
+    batch_size: int = 100,
+) -> Tuple[Optional[FAISS], Dict[str, List[str]], BuildReport]:
+    """
+    PDF 목록을 병렬로 파싱/분할/임베딩하여 하나의 FAISS 인덱스에 추가합니다.
+
+    Args:
+        embeddings: 임베딩 클라이언트 (여러 스레드에서 동시에 호출됩니다)
+        paths: 적재할 PDF 경로 목록
+        make_ids: (경로, 청크 수) -> 벡터 ID 목록. 파일별 ID를 결정적으로 만들기 위해 사용합니다.
+        vector_store: 추가할 기존 인덱스. None이면 첫 배치로 새 인덱스를 만듭니다.
+        parse_workers: 파싱/분할 프로세스 수 (0이면 CPU 수, 1이면 현재 프로세스에서 실행)
+        embed_concurrency: 동시에 진행할 임베딩 배치 수
+        batch_size: 임베딩 배치 크기
+
+    Returns:
+        (인덱스, {경로: 벡터 ID 목록}, 빌드 리포트)
+    """
+    report = BuildReport(files=len(paths))
+    file_ids: Dict[str, List[str]] = {}
+    build_started = time.time()
+    parse_workers = parse_workers or os.cpu_count() or 1
+
+    embed_pool = ThreadPoolExecutor(max_workers=embed_concurrency, thread_name_prefix="embed")
+    pending: Dict[Future, Tuple[list, list]] = {}
+
+    def drain(limit: int) -> None:
+        """진행 중인 임베딩 배치가 `limit` 이하가 될 때까지 완료된 배치를 인덱스에 추가합니다."""
+        nonlocal vector_store
+        while len(pending) > limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch, batch_ids = pending.pop(future)
+                vectors, started, finished = future.result()
+                text_embeddings = list(zip([doc.page_content for doc in batch], vectors))
+                metadatas = [doc.metadata for doc in batch]
+                # 인덱스 추가는 메인 스레드에서만 하므로 별도 잠금이 필요 없습니다.
+                if vector_store is None:
+                    vector_store = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=batch_ids)
+                else:
+                    vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=batch_ids)
+                report.embed.record(len(batch), started, finished)
+
+    def submit(parsed: dict) -> None:
+        path, splits = parsed["path"], parsed["splits"]
+        report.parse.record(parsed["pages"], *parsed["parse"])
+        report.split.record(len(splits), *parsed["split"])
+        ids = make_ids(path, len(splits))
+        file_ids[path] = ids
+        for i in range(0, len(splits), batch_size):
+            batch = splits[i:i + batch_size]
+            texts = [doc.page_content for doc in batch]
+            # 동시에 진행하는 임베딩 배치 수를 제한하여 메모리와 API 동시 요청 수를 묶어 둡니다.
+            drain(embed_concurrency * 2 - 1)
+            pending[embed_pool.submit(_embed_batch, embeddings, texts)] = (batch, ids[i:i + batch_size])
+
+    try:
+        if parse_workers == 1 or len(paths) <= 1:
+            for path in paths:
+                submit(parse_and_split_pdf(path, chunk_size, chunk_overlap))
+        else:
+            with ProcessPoolExecutor(max_workers=min(parse_workers, len(paths))) as parse_pool:
+                futures = [parse_pool.submit(parse_and_split_pdf, path, chunk_size, chunk_overlap) for path in paths]
+                # 먼저 끝난 PDF부터 바로 임베딩 단계로 넘깁니다.
+                for future in as_completed(futures):
+                    submit(future.result())
+        drain(0)
+    finally:
+        embed_pool.shutdown(wait=True, cancel_futures=True)
+
+    report.total_seconds = time.time() - build_started
+    return vector_store, file_ids, report
@@ -0,0 +1,287 @@
+"""
+법령 PDF 증분 적재 모듈
+PDF별 내용 해시와 각 파일이 만든 벡터 ID를 매니페스트(manifest.json)에 기록하여,
+추가/변경/삭제된 PDF만 Vector Store에 반영합니다.
+
+사용법:
+    python -m app.rag.ingest sync      # 변경된 PDF만 반영 (인덱스/매니페스트가 없으면 전체 재생성)
+    python -m app.rag.ingest rebuild   # 전체 재생성
+    python -m app.rag.ingest index     # 임베딩 없이 BM25 역색인/ANN 인덱스/docstore만 다시 생성 (FAISS_INDEX_TYPE, DOCSTORE_FORMAT 변경 시)
+
+샤드 인덱스(`SHARDED_INDEX_ENABLED`)를 사용하면 위 명령이 샤드마다 실행되며, `--shard`로 일부 샤드만 처리할 수 있습니다.
+    python -m app.rag.ingest rebuild --shard noise   # 소음 샤드만 재생성 (다른 샤드는 그대로)
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import faiss
+import xxhash
+
+from app.config import settings
+from app.rag.docstore import write_docstore
+from app.rag.embeddings import EmbeddingSpec
+from app.rag.faiss_index import FLAT_INDEX_FILE, IndexSpec, load_flat_store, write_ann_index
+from app.rag.index_builder import build_index
+from app.rag.lexical import LexicalIndex
+from app.rag.shards import ShardRouter
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 150
+
+
+def file_hash(path: str) -> str:
+    """PDF 파일 내용의 해시를 계산합니다."""
+    hasher = xxhash.xxh3_128()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def list_pdfs(law_data_path: str) -> list:
+    """법령 폴더의 PDF 경로 목록을 정렬하여 반환합니다."""
+    return sorted(glob.glob(os.path.join(law_data_path, "**", "*.pdf"), recursive=True))
+
+
+def chunk_ids(relative_path: str, content_hash: str, count: int) -> list:
+    """
+    (법령 폴더 기준 상대 경로, 파일 해시)로부터 청크별 벡터 ID를 결정적으로 만듭니다.
+    경로를 함께 쓰므로 내용이 같은 PDF가 여러 경로에 있어도 ID가 겹치지 않습니다.
+    """
+    seed = xxhash.xxh3_64_hexdigest(f"{relative_path}\0{content_hash}")
+    return [f"{seed}-{i:05d}" for i in range(count)]
+
+
+def read_manifest(vector_store_path: str):
+    path = os.path.join(vector_store_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf8") as f:
+        return json.load(f)
+
+
+def new_manifest(embedding: EmbeddingSpec) -> dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "embedding": embedding.to_manifest(),
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "files": {},
+    }
+
+
+def save_vector_store(vector_store, manifest: dict, vector_store_path: str) -> None:
+    """
+    Vector Store와 매니페스트를 저장합니다.
+    Flat 원본과 docstore(`DOCSTORE_FORMAT` 형식), 같은 청크의 BM25 역색인, 설정한 유형의 ANN 인덱스를 함께 저장합니다.
+    임시 폴더에 먼저 저장한 뒤 파일 단위로 교체하고, 매니페스트를 마지막에 기록합니다.
+    (실행 중인 서버의 레지스트리는 매니페스트 변경을 보고 새 인덱스로 교체합니다.)
+    """
+    os.makedirs(vector_store_path, exist_ok=True)
+    spec = IndexSpec.from_settings()
+    manifest["index"] = spec.build_params()
+    manifest["docstore"] = settings.DOCSTORE_FORMAT
+    manifest["updated_at"] = time.time()
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=vector_store_path)
+    try:
+        faiss.write_index(vector_store.index, os.path.join(tmp_dir, FLAT_INDEX_FILE))
+        write_docstore(tmp_dir, vector_store, settings.DOCSTORE_FORMAT)
+        LexicalIndex.from_vector_store(vector_store).save(tmp_dir)
+        write_ann_index(tmp_dir, vector_store.index, spec)
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        for name in sorted(os.listdir(tmp_dir), key=lambda n: n == MANIFEST_FILE):
+            os.replace(os.path.join(tmp_dir, name), os.path.join(vector_store_path, name))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _build(embeddings, law_data_path: str, paths: list, hashes: dict, vector_store=None):
+    """병렬 빌드 파이프라인으로 PDF들을 인덱스에 추가하고 빌드 리포트를 출력합니다."""
+    vector_store, file_ids, report = build_index(
+        embeddings,
+        paths,
+        make_ids=lambda path, count: chunk_ids(os.path.relpath(path, law_data_path), hashes[path], count),
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        vector_store=vector_store,
+        parse_workers=settings.INDEX_BUILD_PARSE_WORKERS,
+        embed_concurrency=settings.INDEX_BUILD_EMBED_CONCURRENCY,
+        batch_size=settings.INDEX_BUILD_EMBED_BATCH_SIZE,
+    )
+    print(f"📊 빌드 리포트: {report.summary()}")
+    return vector_store, file_ids, report
+
+
+def rebuild_vector_store(embeddings, law_data_path: str, vector_store_path: str, embedding: EmbeddingSpec,
+                         paths: Optional[List[str]] = None):
+    """모든 PDF(`paths`를 지정하면 그 PDF만)로 Vector Store를 새로 만들고 매니페스트를 함께 저장합니다."""
+    if paths is None:
+        print(f"'{law_data_path}'의 모든 PDF로 Vector Store를 새로 생성합니다.")
+        paths = list_pdfs(law_data_path)
+    else:
+        print(f"PDF {len(paths)}개로 '{vector_store_path}'에 Vector Store를 새로 생성합니다.")
+    hashes = {path: file_hash(path) for path in paths}
+    vector_store, file_ids, _ = _build(embeddings, law_data_path, paths, hashes)
+    if vector_store is None:
+        raise ValueError(f"'{law_data_path}'에서 적재할 PDF를 찾지 못했습니다.")
+
+    manifest = new_manifest(embedding)
+    for path in paths:
+        manifest["files"][path] = {"hash": hashes[path], "ids": file_ids.get(path, [])}
+    save_vector_store(vector_store, manifest, vector_store_path)
+    print(f"Vector Store를 '{vector_store_path}' 경로에 저장했습니다.")
+    return vector_store
+
+
+def sync_vector_store(embeddings, law_data_path: str, vector_store_path: str, embedding: EmbeddingSpec,
+                      paths: Optional[List[str]] = None):
+    """
+    매니페스트와 현재 PDF 목록(`paths`를 지정하면 그 PDF들)을 비교하여 변경분만 반영합니다.
+    - 새 PDF: 청크 추가
+    - 삭제된 PDF: 해당 벡터 삭제
+    - 변경된 PDF: 기존 벡터 삭제 후 새 청크 추가
+    인덱스/매니페스트가 없거나 분할 설정·임베딩(백엔드/모델/차원)이 바뀌었으면 전체 재생성합니다.
+    """
+    manifest = read_manifest(vector_store_path)
+    index_exists = os.path.exists(os.path.join(vector_store_path, FLAT_INDEX_FILE))
+    if (
+        manifest is None
+        or not index_exists
+        or manifest.get("version") != MANIFEST_VERSION
+        or EmbeddingSpec.from_manifest(manifest) != embedding
+        or manifest.get("chunk_size") != CHUNK_SIZE
+        or manifest.get("chunk_overlap") != CHUNK_OVERLAP
+    ):
+        print("매니페스트가 없거나 설정이 달라 전체 재생성으로 전환합니다.")
+        return rebuild_vector_store(embeddings, law_data_path, vector_store_path, embedding, paths)
+
+    current = {path: file_hash(path) for path in (list_pdfs(law_data_path) if paths is None else paths)}
+    recorded = manifest["files"]
+    added = [path for path in current if path not in recorded]
+    removed = [path for path in recorded if path not in current]
+    changed = [path for path in current if path in recorded and recorded[path]["hash"] != current[path]]
+    print(f"추가 {len(added)}개, 변경 {len(changed)}개, 삭제 {len(removed)}개 PDF를 반영합니다.")
+    if not (added or removed or changed):
+        return None
+
+    vector_store = load_flat_store(vector_store_path, embeddings, manifest)
+    # 모델 이름만 기록된 이전 형식의 매니페스트를 현재 형식으로 바꿔 저장합니다.
+    manifest.pop("embedding_model", None)
+    manifest["embedding"] = embedding.to_manifest()
+
+    stale_ids = [vector_id for path in removed + changed for vector_id in recorded[path]["ids"]]
+    if stale_ids:
+        vector_store.delete(stale_ids)
+    for path in removed:
+        del recorded[path]
+        print(f"  - {path}")
+    vector_store, file_ids, _ = _build(embeddings, law_data_path, changed + added, current, vector_store)
+    for path in changed + added:
+        recorded[path] = {"hash": current[path], "ids": file_ids.get(path, [])}
+        print(f"  + {path} ({len(recorded[path]['ids'])}개 청크)")
+
+    save_vector_store(vector_store, manifest, vector_store_path)
+    print(f"Vector Store를 '{vector_store_path}' 경로에 저장했습니다. (PDF {len(manifest['files'])}개)")
+    return vector_store
+
+
+def reindex_vector_store(embeddings, vector_store_path: str):
+    """
+    저장된 Flat 원본으로 BM25 역색인과 ANN 인덱스, docstore를 현재 설정대로 다시 만듭니다.
+    (임베딩 API를 호출하지 않습니다)
+    """
+    manifest = read_manifest(vector_store_path)
+    if manifest is None:
+        raise ValueError(f"'{vector_store_path}'에 매니페스트가 없습니다. 먼저 `sync` 또는 `rebuild`를 실행하세요.")
+    vector_store = load_flat_store(vector_store_path, embeddings, manifest)
+    save_vector_store(vector_store, manifest, vector_store_path)
+    print(f"'{vector_store_path}'의 검색 인덱스를 다시 만들었습니다. ({manifest['index']['index_type']})")
+    return vector_store
+
+
+def existing_shards(shards_path: str) -> List[str]:
+    """매니페스트가 저장된 샤드 이름 목록"""
+    if not os.path.isdir(shards_path):
+        return []
+    return sorted(name for name in os.listdir(shards_path)
+                  if os.path.exists(os.path.join(shards_path, name, MANIFEST_FILE)))
+
+
+def shard_pdfs(law_data_path: str, router: ShardRouter) -> Dict[str, List[str]]:
+    """법령 폴더의 PDF를 배정된 샤드별로 나눕니다."""
+    groups = defaultdict(list)
+    for path in list_pdfs(law_data_path):
+        groups[router.assign(os.path.relpath(path, law_data_path))].append(path)
+    return dict(groups)
+
+
+def sync_shards(embeddings, law_data_path: str, shards_path: str, embedding: EmbeddingSpec,
+                names: Optional[List[str]] = None, rebuild: bool = False, router: Optional[ShardRouter] = None) -> dict:
+    """
+    샤드마다 변경분을 반영(`rebuild`면 전체 재생성)합니다.
+    `names`를 지정하면 그 샤드만 처리하고 나머지 샤드는 그대로 둡니다. PDF가 모두 사라진 샤드는 삭제합니다.
+    반환: {샤드 이름: 새 Vector Store (변경이 없거나 삭제했으면 None)}
+    """
+    router = router or ShardRouter.from_settings()
+    groups = shard_pdfs(law_data_path, router)
+    existing = existing_shards(shards_path)
+    known = set(groups) | set(existing) | set(router.shards) | {router.default}
+    unknown = sorted(set(names or ()) - known)
+    if unknown:
+        raise ValueError(f"알 수 없는 샤드입니다: {', '.join(unknown)} (가능: {', '.join(sorted(known))})")
+
+    results = {}
+    for name in sorted(names or set(groups) | set(existing)):
+        shard_path = os.path.join(shards_path, name)
+        paths = groups.get(name, [])
+        print(f"🧩 샤드 '{name}': PDF {len(paths)}개")
+        if not paths:
+            if name in existing:
+                shutil.rmtree(shard_path)
+                print(f"PDF가 없어 샤드 '{name}'을(를) 삭제했습니다.")
+            results[name] = None
+            continue
+        build = rebuild_vector_store if rebuild else sync_vector_store
+        results[name] = build(embeddings, law_data_path, shard_path, embedding, paths)
+    return results
+
+
+def main() -> None:
+    from app.rag.retriever import LAW_DATA_PATH, VECTOR_STORE_PATH, create_embeddings
+
+    parser = argparse.ArgumentParser(description="법령 PDF를 Vector Store에 적재합니다.")
+    parser.add_argument("command", choices=["sync", "rebuild", "index"], nargs="?", default="sync")
+    parser.add_argument("--shard", action="append", help="처리할 샤드 (여러 번 지정 가능, 기본: 모든 샤드)")
+    args = parser.parse_args()
+    if args.shard and not settings.SHARDED_INDEX_ENABLED:
+        parser.error("--shard는 SHARDED_INDEX_ENABLED가 True일 때만 사용할 수 있습니다.")
+
+    embedding = EmbeddingSpec.from_settings()
+    embeddings = create_embeddings(embedding)
+    if settings.SHARDED_INDEX_ENABLED:
+        shards_path = settings.SHARDED_VECTOR_STORE_PATH
+        if args.command == "index":
+            for name in args.shard or existing_shards(shards_path):
+                reindex_vector_store(embeddings, os.path.join(shards_path, name))
+        else:
+            sync_shards(embeddings, LAW_DATA_PATH, shards_path, embedding, args.shard, rebuild=args.command == "rebuild")
+    elif args.command == "rebuild":
+        rebuild_vector_store(embeddings, LAW_DATA_PATH, VECTOR_STORE_PATH, embedding)
+    elif args.command == "index":
+        reindex_vector_store(embeddings, VECTOR_STORE_PATH)
+    else:
+        sync_vector_store(embeddings, LAW_DATA_PATH, VECTOR_STORE_PATH, embedding)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+법령 문서 어휘(BM25) 인덱스 모듈
+Vector Store와 같은 청크로 역색인을 만들어, 법령명·조문 번호(제N조)처럼 정확한 용어를
+임베딩 API 호출 없이 로컬에서 찾습니다.
+
+형태소 분석기 없이 다음 규칙으로 한국어를 토큰화합니다.
+- 조문 번호는 `제32조`, `제32조의2` 형태의 하나의 토큰으로 정규화합니다.
+- 한글 어절은 끝의 조사를 떼어낸 어간과, 어간의 글자 2-gram을 함께 사용합니다. (복합명사 부분 일치)
+"""
+import json
+import os
+import re
+from collections import Counter
+from typing import List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+LEXICAL_MATRIX_FILE = "lexical.npz"
+LEXICAL_VOCAB_FILE = "lexical.json"
+
+ARTICLE_PATTERN = re.compile(r"제\s*(\d+)\s*조(?:\s*의\s*(\d+))?")
+WORD_PATTERN = re.compile(r"[가-힣]+|[A-Za-z]+|\d+")
+# 어절 끝에서 떼어낼 조사 (긴 것부터 검사)
+JOSA_SUFFIXES = (
+    "으로부터", "에서부터", "에게서", "에서는", "으로는", "이라는", "이라고",
+    "에서", "에게", "한테", "으로", "부터", "까지", "마다", "이나", "이며", "에는", "와는", "과는", "라는",
+    "은", "는", "이", "가", "을", "를", "의", "에", "와", "과", "로", "도", "만",
+)
+# 짧은 조회형 질의 판단 기준 (이보다 길면 일반 민원 문장으로 봅니다)
+EXACT_QUERY_MAX_LENGTH = 40
+
+
+def article_token(match: re.Match) -> str:
+    number, branch = match.group(1), match.group(2)
+    return f"제{number}조의{branch}" if branch else f"제{number}조"
+
+
+def strip_josa(word: str) -> str:
+    for suffix in JOSA_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """한국어 법령/민원 텍스트를 BM25용 토큰 목록으로 바꿉니다."""
+    tokens = [article_token(match) for match in ARTICLE_PATTERN.finditer(text)]
+    for word in WORD_PATTERN.findall(ARTICLE_PATTERN.sub(" ", text)):
+        if "가" <= word[0] <= "힣":
+            stem = strip_josa(word)
+            tokens.append(stem)
+            if len(stem) > 2:
+                tokens.extend(stem[i:i + 2] for i in range(len(stem) - 1))
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+def is_exact_term_query(query: str) -> bool:
+    """`도로교통법 제32조`처럼 조문 번호가 들어간 짧은 조회형 질의인지 판단합니다."""
+    return len(query) <= EXACT_QUERY_MAX_LENGTH and ARTICLE_PATTERN.search(query) is not None
+
+
+class LexicalIndex:
+    """
+    BM25 역색인입니다.
+    (문서 x 용어) BM25 가중치 행렬을 미리 계산해 두어, 검색은 질의 용어 열의 합만 구합니다.
+    """
+
+    def __init__(self, ids: List[str], vocabulary: dict, weights: sparse.csc_matrix):
+        self.ids = ids
+        self.vocabulary = vocabulary
+        self.weights = weights
+
+    @classmethod
+    def build(cls, ids: List[str], texts: List[str], k1: float = 1.5, b: float = 0.75) -> "LexicalIndex":
+        vocabulary, rows, cols, counts = {}, [], [], []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            term_counts = Counter(tokenize(text))
+            lengths[row] = sum(term_counts.values())
+            for term, count in term_counts.items():
+                rows.append(row)
+                cols.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+
+        rows = np.asarray(rows, dtype=np.int64)
+        tf = np.asarray(counts, dtype=np.float32)
+        doc_freq = np.bincount(cols, minlength=len(vocabulary))
+        idf = np.log1p((len(texts) - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        average_length = max(float(lengths.mean()), 1.0) if len(texts) else 1.0
+        norm = k1 * (1 - b + b * lengths / average_length)
+        data = idf[cols] * tf * (k1 + 1) / (tf + norm[rows])
+        weights = sparse.csc_matrix((data, (rows, cols)), shape=(len(texts), len(vocabulary)), dtype=np.float32)
+        return cls(list(ids), vocabulary, weights)
+
+    @classmethod
+    def from_vector_store(cls, vector_store) -> "LexicalIndex":
+        """FAISS Vector Store의 청크로 역색인을 만듭니다. (인덱스 위치 순서 유지)"""
+        ids = [vector_store.index_to_docstore_id[i] for i in range(len(vector_store.index_to_docstore_id))]
+        texts = [vector_store.docstore.search(doc_id).page_content for doc_id in ids]
+        return cls.build(ids, texts)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """BM25 점수가 높은 순으로 (문서 ID, 점수)를 최대 k개 반환합니다. 일치하는 용어가 없으면 빈 목록입니다."""
+        term_counts = Counter(term for term in tokenize(query) if term in self.vocabulary)
+        if not term_counts or not self.ids:
+            return []
+        columns = [self.vocabulary[term] for term in term_counts]
+        query_weights = np.fromiter(term_counts.values(), dtype=np.float32)
+        scores = self.weights[:, columns] @ query_weights
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def save(self, directory: str) -> None:
+        sparse.save_npz(os.path.join(directory, LEXICAL_MATRIX_FILE), self.weights)
+        with open(os.path.join(directory, LEXICAL_VOCAB_FILE), "w", encoding="utf8") as f:
+            json.dump({"ids": self.ids, "vocabulary": self.vocabulary}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str) -> "LexicalIndex":
+        with open(os.path.join(directory, LEXICAL_VOCAB_FILE), "r", encoding="utf8") as f:
+            data = json.load(f)
+        weights = sparse.load_npz(os.path.join(directory, LEXICAL_MATRIX_FILE)).tocsc()
+        return cls(data["ids"], data["vocabulary"], weights)
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return all(os.path.exists(os.path.join(directory, name)) for name in (LEXICAL_MATRIX_FILE, LEXICAL_VOCAB_FILE))
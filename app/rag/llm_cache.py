@@ -0,0 +1,309 @@
+"""
+LLM 응답 캐시 모듈
+(모델, 파라미터, 렌더링된 프롬프트)의 해시를 키로 LLM 응답을 디스크(SQLite)에 저장합니다.
+같은 입력의 '민원 내용 정제'나 재검색 후 반복되는 품질 평가처럼 같은 프롬프트가 다시 오면 API를 호출하지 않습니다.
+
+- 항목은 `ttl_seconds`가 지나면 만료되고, 전체 크기가 `max_bytes`를 넘으면 오래 사용되지 않은 항목부터 삭제합니다.
+- 같은 프롬프트가 동시에 들어오면 하나만 API를 호출하고 나머지는 그 결과를 기다립니다. (in-flight 병합)
+  호출하던 요청이 취소되면 기다리던 요청은 실패하지 않고, 그중 하나가 다시 API를 호출합니다.
+- 노드별 적중/미스/병합 횟수를 집계합니다.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+import xxhash
+from langchain_core.callbacks import adispatch_custom_event, dispatch_custom_event
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from langgraph.config import get_stream_writer
+
+from app.config import settings
+from app.core import metrics
+from app.rag.embedding_cache import upsert_sized_rows
+from app.rag.rate_limited import RateLimitedChatModel
+
+# 요청 단위 추적(`AgentTrace`)이 받는 사용자 정의 이벤트 이름
+LLM_CACHE_EVENT = "llm_cache"
+
+
+class LeaderCancelled(Exception):
+    """in-flight 병합에서 API를 호출하던 요청이 취소되었음을 기다리던 요청에 알립니다."""
+
+
+def llm_cache_key(model, prompt_value) -> bytes:
+    """모델 이름/파라미터와 렌더링된 프롬프트 메시지로 128비트 캐시 키를 만듭니다."""
+    # 속도 제한 래퍼는 응답에 영향을 주지 않으므로 감싼 모델로 키를 만듭니다.
+    model = model.model if isinstance(model, RateLimitedChatModel) else model
+    params = json.dumps(
+        {"type": type(model).__name__, **model._identifying_params}, sort_keys=True, ensure_ascii=False, default=str
+    )
+    messages = "\x00".join(f"{message.type}\x01{message.content}" for message in prompt_value.to_messages())
+    return xxhash.xxh3_128_digest(f"{params}\x00{messages}".encode("utf-8"))
+
+
+class LLMResponseCache:
+    """SQLite 기반의 TTL + LRU 응답 캐시입니다. (구조는 `EmbeddingCache`와 같습니다)"""
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key BLOB PRIMARY KEY,"
+            " node TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(CAST(response AS BLOB))), 0) FROM responses"
+        ).fetchone()[0]
+        # 진행 중인 요청: 키 -> 결과를 기다리는 Future (스레드/이벤트 루프 모두에서 기다릴 수 있습니다)
+        self._in_flight: Dict[bytes, Future] = {}
+
+    def get(self, key: bytes) -> Optional[str]:
+        """저장된 응답을 반환합니다. 만료된 항목은 삭제하고 None을 반환합니다."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= len(response.encode("utf-8"))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return response
+
+    def put(self, key: bytes, node: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._total_bytes += upsert_sized_rows(
+                self._conn, "responses", ("key", "node", "response", "created_at", "accessed_at"),
+                "LENGTH(CAST(response AS BLOB))", [(key, node, response, now, now)], [len(response.encode("utf-8"))],
+            )
+            if self._total_bytes > self.max_bytes:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """만료된 항목을 지운 뒤, 전체 크기가 한도의 90% 이하가 될 때까지 LRU 순서로 삭제합니다. (`_lock` 필요)"""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(CAST(response AS BLOB))), 0) FROM responses"
+        ).fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, LENGTH(CAST(response AS BLOB)) FROM responses ORDER BY accessed_at LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            removed = []
+            for key, size in rows:
+                removed.append((key,))
+                self._total_bytes -= size
+                if self._total_bytes <= target:
+                    break
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", removed)
+
+    def record(self, node: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._stats.setdefault(node, {"hits": 0, "misses": 0, "coalesced": 0})
+            counts[outcome] += 1
+        metrics.LLM_CACHE.inc(node=node, result=outcome)
+
+    def claim(self, key: bytes):
+        """(Future, 직접 호출 여부)를 반환합니다. 같은 키의 요청이 진행 중이면 그 Future를 기다리면 됩니다."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = self._in_flight[key] = Future()
+            return future, True
+
+    def release(self, key: bytes) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """노드별 {hits, misses, coalesced, hit_rate}. 병합된 요청도 API를 호출하지 않았으므로 적중률에 포함합니다."""
+        with self._lock:
+            result = {}
+            for node, counts in self._stats.items():
+                total = counts["hits"] + counts["misses"] + counts["coalesced"]
+                saved = counts["hits"] + counts["coalesced"]
+                result[node] = {**counts, "hit_rate": saved / total if total else 0.0}
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+            self._stats.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class CachedChatModel(Runnable):
+    """
+    체인의 `prompt | model` 사이에서 채팅 모델을 감싸 응답 캐시와 in-flight 병합을 적용합니다.
+    캐시 적중(병합 포함) 시에는 모델을 호출하지 않으므로 토큰 스트림이 없습니다. 대신 전체 응답을
+    그래프의 custom 스트림(`{"node", "content"}`)으로 한 번에 보내며, SSE는 이를 한 개의 token 이벤트로 전달합니다.
+    `validate`를 지정하면 검사를 통과한 응답만 저장합니다. (형식이 깨진 응답이 TTL 동안 재사용되지 않도록)
+    """
+
+    def __init__(self, model, node: str, validate: Optional[Callable[[str], bool]] = None):
+        self.model = model
+        self.node = node
+        self.validate = validate
+
+    def _cacheable(self, content: str) -> bool:
+        return self.validate is None or self.validate(content)
+
+    def _record(self, outcome: str, config: Optional[RunnableConfig]) -> None:
+        get_llm_cache().record(self.node, outcome)
+        try:
+            dispatch_custom_event(LLM_CACHE_EVENT, {"node": self.node, "result": outcome}, config=config)
+        except RuntimeError:
+            pass  # 체인 밖에서 직접 호출된 경우 (부모 실행 없음)
+
+    async def _arecord(self, outcome: str, config: Optional[RunnableConfig]) -> None:
+        get_llm_cache().record(self.node, outcome)
+        try:
+            await adispatch_custom_event(LLM_CACHE_EVENT, {"node": self.node, "result": outcome}, config=config)
+        except RuntimeError:
+            pass
+
+    def _cached(self, content: str) -> AIMessage:
+        """모델을 호출하지 않은 응답. 스트리밍 중이면 전체 응답을 한 덩어리로 보냅니다."""
+        try:
+            get_stream_writer()({"node": self.node, "content": content})
+        except RuntimeError:
+            pass  # 그래프 밖에서 직접 호출된 경우
+        return AIMessage(content=content)
+
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs) -> AIMessage:
+        cache = get_llm_cache()
+        key = llm_cache_key(self.model, input)
+        while True:
+            cached = cache.get(key)
+            if cached is not None:
+                self._record("hits", config)
+                return self._cached(cached)
+
+            future, leader = cache.claim(key)
+            if leader:
+                break
+            try:
+                content = future.result()
+            except LeaderCancelled:
+                continue  # 대표 요청이 취소되었으므로 다시 시도합니다. (하나가 새 대표가 됩니다)
+            self._record("coalesced", config)
+            return self._cached(content)
+
+        try:
+            # 직전에 끝난 요청이 방금 캐시에 저장했을 수 있으므로 다시 확인합니다.
+            cached = cache.get(key)
+            if cached is not None:
+                cache.release(key)
+                future.set_result(cached)
+                self._record("coalesced", config)
+                return self._cached(cached)
+            message = self.model.invoke(input, config, **kwargs)
+            if self._cacheable(message.content):
+                cache.put(key, self.node, message.content)
+        except Exception as e:
+            cache.release(key)
+            future.set_exception(e)
+            raise
+        except BaseException:
+            # 취소/종료는 이 요청만의 사정이므로 기다리던 요청을 실패시키지 않습니다.
+            cache.release(key)
+            future.set_exception(LeaderCancelled())
+            raise
+        # 기다리던 요청이 깨어나 다시 시도할 때 끝난 대표를 보지 않도록, 결과를 알리기 전에 반납합니다.
+        cache.release(key)
+        future.set_result(message.content)
+        self._record("misses", config)
+        return message
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs) -> AIMessage:
+        cache = get_llm_cache()
+        key = llm_cache_key(self.model, input)
+        while True:
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                await self._arecord("hits", config)
+                return self._cached(cached)
+
+            future, leader = cache.claim(key)
+            if leader:
+                break
+            try:
+                content = await asyncio.wrap_future(future)
+            except LeaderCancelled:
+                continue
+            await self._arecord("coalesced", config)
+            return self._cached(content)
+
+        try:
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                cache.release(key)
+                future.set_result(cached)
+                await self._arecord("coalesced", config)
+                return self._cached(cached)
+            message = await self.model.ainvoke(input, config, **kwargs)
+            if self._cacheable(message.content):
+                await asyncio.to_thread(cache.put, key, self.node, message.content)
+        except Exception as e:
+            cache.release(key)
+            future.set_exception(e)
+            raise
+        except BaseException:
+            cache.release(key)
+            future.set_exception(LeaderCancelled())
+            raise
+        cache.release(key)
+        future.set_result(message.content)
+        await self._arecord("misses", config)
+        return message
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """프로세스 전역 LLM 응답 캐시를 반환합니다."""
+    global _llm_cache
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMResponseCache(
+                    settings.LLM_CACHE_PATH,
+                    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+                    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                )
+    return _llm_cache
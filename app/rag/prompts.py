@@ -145,4 +145,27 @@ create_final_report_prompt = ChatPromptTemplate.from_messages(
         "■ 민원인 원본 질문:\n\"\"\"\n{question}\n\"\"\""
         )
     ]
-)
\ No newline at end of file
+)
+
+# 7. 답변/정제/최종 보고서 통합 생성 프롬프트 (Fused Report)
+# '답변 생성', '민원 내용 정제', '최종 보고서 생성' 세 번의 호출을 한 번의 JSON 출력으로 대신합니다.
+# 출력 형식은 `app.rag.chain.FinalReport` 스키마로 강제되며, ■ 형식 보고서는 코드에서 조립합니다.
+create_fused_report_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system",
+        """
+        **역할:** 당신은 '민원 처리 통합 AI'입니다. 대한민국 법률에 해박하며, 오직 주어진 '컨텍스트'(관련 법령 정보)만을 사용하여 민원인의 질문에 답변하고, 담당 공무원을 위한 정보를 함께 정리합니다.
+
+        **목표:** 아래 항목을 모두 채운 JSON 객체 하나를 출력합니다.
+        - citizen_answer: 민원인에게 제공할 공식 답변. 공식적이고 정중한 문체로 작성하고, 모든 내용에 대해 **반드시 어떤 법률의 몇 조 몇 항에 근거하는지 명확하게 인용**하십시오. 컨텍스트에 답변이 없다면 "제공된 법령 정보 내에서는 해당 질문에 대한 명확한 답변을 찾을 수 없습니다."라고 명시하십시오.
+        - related_regulations: citizen_answer에서 인용한 모든 법령 조항의 목록 (예: "도로교통법 제32조")
+        - cleaned_question: 민원인의 원본 질문에서 욕설, 비속어, 인신공격 등 공격적 표현을 제거하고 감정적인 호소를 객관적인 사실 관계로 바꾸어, 육하원칙에 따라 하나의 문단으로 요약한 '정제된 민원 내용'
+        - staff_notes: 담당자가 처리 시 확인할 사항 (확인이 필요한 사실, 관련 부서 등)을 한두 문장으로 작성
+
+        **제약조건:**
+        - 어떠한 경우에도 제공된 '컨텍스트'를 넘어서는 외부 지식을 사용하거나 추측하지 마십시오.
+        - JSON 객체 외의 텍스트를 출력하지 마십시오.
+        """),
+        ("human", "[컨텍스트]\n{context}\n\n[사용자 원본 질문]\n{question}")
+    ]
+)
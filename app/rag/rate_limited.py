@@ -0,0 +1,196 @@
+"""
+속도 제한 모델 래퍼 모듈
+채팅 모델/임베딩 호출을 프로세스 전역 스케줄러(`app.core.rate_limit`)에 통과시키고,
+공급자의 일시적 오류(429, 시간 초과, 연결 오류, 5xx)는 tenacity의 지터 지수 백오프로 다시 시도합니다.
+
+- 호출 토큰은 프롬프트를 tiktoken으로 센 값에 max_tokens를 더해 추정합니다. (OpenAI가 토큰 한도를 계산하는 방식)
+- 429를 받으면 `Retry-After`(없으면 `RATE_LIMIT_PAUSE_SECONDS`) 동안 그 모델의 모든 호출을 멈추고,
+  재시도는 그 이상 + 무작위 지터만큼 기다린 뒤 진행 중인 민원의 우선순위로 다시 버킷을 기다립니다.
+- 감싼 모델의 자체 재시도(`max_retries`)는 끄고 여기서 한 번에 조율합니다. (`RATE_LIMIT_ENABLED`)
+- 응답 토큰이 이미 스트리밍되기 시작한 호출은 다시 시도하지 않습니다. (SSE에 같은 토큰이 두 번 가지 않도록)
+"""
+import math
+from typing import List, Optional
+
+import openai
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import merge_configs
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from app.config import settings
+from app.core import metrics
+from app.core.rate_limit import PRIORITY_IN_PROGRESS, RateLimitScheduler, get_rate_limiter, next_call_priority
+from app.rag.context_packing import get_token_counter
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+# 메시지마다 붙는 형식 토큰 수 (역할/구분자)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _error_kind(error: BaseException) -> str:
+    if isinstance(error, openai.RateLimitError):
+        return "rate_limit"
+    if isinstance(error, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection"
+    return "server"
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """응답 헤더(`retry-after-ms`, `retry-after`)에 공급자가 알려준 대기 시간(초). 없으면 None입니다."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        pass  # HTTP 날짜 형식은 지원하지 않습니다.
+    return None
+
+
+class _UpstreamRetry:
+    """모델 하나의 재시도 정책 (tenacity `Retrying`/`AsyncRetrying` 인자)"""
+
+    def __init__(self, model: str, scheduler: RateLimitScheduler):
+        self.model = model
+        self.scheduler = scheduler
+        self.jitter = wait_random_exponential(multiplier=settings.LLM_RETRY_BASE_SECONDS,
+                                              max=settings.LLM_RETRY_MAX_WAIT_SECONDS)
+
+    def wait(self, retry_state) -> float:
+        return max(self.jitter(retry_state), retry_after_seconds(retry_state.outcome.exception()) or 0.0)
+
+    def before_sleep(self, retry_state) -> None:
+        error = retry_state.outcome.exception()
+        metrics.UPSTREAM_RETRIES.inc(model=self.model, error=_error_kind(error))
+        if isinstance(error, openai.RateLimitError):
+            self.scheduler.pause(self.model, retry_after_seconds(error) or settings.RATE_LIMIT_PAUSE_SECONDS)
+
+    def kwargs(self, streamed: Optional["_StreamWatcher"] = None) -> dict:
+        def retryable(error: BaseException) -> bool:
+            return isinstance(error, RETRYABLE_ERRORS) and not (streamed and streamed.started)
+
+        return {
+            "retry": retry_if_exception(retryable),
+            "wait": self.wait,
+            "stop": stop_after_attempt(settings.LLM_RETRY_ATTEMPTS),
+            "before_sleep": self.before_sleep,
+            "reraise": True,
+        }
+
+
+class _StreamWatcher(BaseCallbackHandler):
+    """호출 하나에서 응답 토큰이 스트리밍되기 시작했는지 기록합니다."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.started = False
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self.started = True
+
+
+def _priority(attempt, priority: int) -> int:
+    # 재시도는 이미 시작한 호출이므로 진행 중인 민원의 우선순위로 기다립니다.
+    return priority if attempt.retry_state.attempt_number == 1 else PRIORITY_IN_PROGRESS
+
+
+class RateLimitedChatModel(Runnable):
+    """
+    체인의 `prompt | model` 사이에서 채팅 모델을 감싸 호출마다 스케줄러의 차례를 기다리고, 일시적 오류를 재시도합니다.
+    LLM 응답 캐시(`CachedChatModel`) 안쪽에 두므로 캐시 적중은 한도를 쓰지 않습니다.
+    그래프를 `stream_mode="messages"`로 실행하면 모델이 토큰을 스트리밍하므로, 첫 토큰 이후의 오류는 재시도하지 않고 그대로 올립니다.
+    """
+
+    def __init__(self, model, scheduler: Optional[RateLimitScheduler] = None):
+        self.model = model
+        self.model_name = getattr(model, "model_name", None) or type(model).__name__
+        self._scheduler = scheduler
+
+    @property
+    def scheduler(self) -> RateLimitScheduler:
+        return self._scheduler or get_rate_limiter()
+
+    def estimate_tokens(self, input) -> int:
+        """프롬프트 토큰 + 최대 완성 토큰 (max_tokens가 없으면 `RATE_LIMIT_DEFAULT_COMPLETION_TOKENS`)"""
+        counter = get_token_counter(settings.CONTEXT_TOKENIZER_ENCODING)
+        messages = input.to_messages() if hasattr(input, "to_messages") else [AIMessage(content=str(input))]
+        prompt = sum(counter.count(str(message.content)) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+        completion = getattr(self.model, "max_tokens", None) or settings.RATE_LIMIT_DEFAULT_COMPLETION_TOKENS
+        return prompt + completion
+
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs) -> AIMessage:
+        tokens, priority = self.estimate_tokens(input), next_call_priority()
+        streamed = _StreamWatcher()
+        config = merge_configs(config, {"callbacks": [streamed]})
+        for attempt in Retrying(**_UpstreamRetry(self.model_name, self.scheduler).kwargs(streamed)):
+            with attempt:
+                with self.scheduler.acquire(self.model_name, tokens, _priority(attempt, priority)):
+                    return self.model.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs) -> AIMessage:
+        tokens, priority = self.estimate_tokens(input), next_call_priority()
+        streamed = _StreamWatcher()
+        config = merge_configs(config, {"callbacks": [streamed]})
+        async for attempt in AsyncRetrying(**_UpstreamRetry(self.model_name, self.scheduler).kwargs(streamed)):
+            with attempt:
+                with await self.scheduler.aacquire(self.model_name, tokens, _priority(attempt, priority)):
+                    return await self.model.ainvoke(input, config, **kwargs)
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """
+    임베딩 호출을 스케줄러에 통과시키고 일시적 오류를 재시도합니다.
+    임베딩 캐시(`CachedEmbeddings`) 안쪽에 두므로 캐시에 없는 텍스트만 한도를 씁니다.
+    """
+
+    def __init__(self, underlying: Embeddings, model: str, scheduler: Optional[RateLimitScheduler] = None):
+        self.underlying = underlying
+        self.model = model
+        self._scheduler = scheduler
+
+    @property
+    def scheduler(self) -> RateLimitScheduler:
+        return self._scheduler or get_rate_limiter()
+
+    def _cost(self, texts: List[str]) -> tuple:
+        """(추정 토큰 수, API 요청 수). 모델은 텍스트를 `chunk_size`개씩 나누어 요청합니다."""
+        counter = get_token_counter(settings.CONTEXT_TOKENIZER_ENCODING)
+        chunk_size = getattr(self.underlying, "chunk_size", None) or len(texts) or 1
+        return sum(counter.count(text) for text in texts), max(1, math.ceil(len(texts) / chunk_size))
+
+    def _call(self, fn, texts: List[str]):
+        tokens, requests = self._cost(texts)
+        priority = next_call_priority()
+        for attempt in Retrying(**_UpstreamRetry(self.model, self.scheduler).kwargs()):
+            with attempt:
+                with self.scheduler.acquire(self.model, tokens, _priority(attempt, priority), requests):
+                    return fn()
+
+    async def _acall(self, fn, texts: List[str]):
+        tokens, requests = self._cost(texts)
+        priority = next_call_priority()
+        async for attempt in AsyncRetrying(**_UpstreamRetry(self.model, self.scheduler).kwargs()):
+            with attempt:
+                with await self.scheduler.aacquire(self.model, tokens, _priority(attempt, priority), requests):
+                    return await fn()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._call(lambda: self.underlying.embed_documents(texts), texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._call(lambda: self.underlying.embed_query(text), [text])
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._acall(lambda: self.underlying.aembed_documents(texts), texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self._acall(lambda: self.underlying.aembed_query(text), [text])
@@ -1,58 +1,326 @@
+import asyncio
+import logging
 import os
-from langchain_community.document_loaders import PyPDFDirectoryLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
+import threading
+import time
 from dotenv import load_dotenv
+from app.config import settings
+from app.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+from app.rag.embeddings import EmbeddingSpec, check_embedding_spec, create_embedding_backend
+from app.rag.faiss_index import FLAT_INDEX_FILE, load_faiss_store
+from app.rag.hybrid_retriever import HybridRetriever
+from app.rag.ingest import existing_shards, read_manifest, rebuild_vector_store, sync_shards
+from app.rag.lexical import LexicalIndex
+from app.rag.rate_limited import RateLimitedEmbeddings
+from app.rag.shards import ShardedRetriever, ShardedVectorStore, ShardRouter
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-VECTOR_STORE_PATH = "data/vector_store/faiss_index"
-LAW_DATA_PATH = "data/laws"
-
-def batch_faiss_build(splits, embeddings, batch_size=100):
-    """splits를 여러 FAISS 인덱스로 나눠 생성 후 병합"""
-    vectorstores = []
-    for i in range(0, len(splits), batch_size):
-        batch = splits[i:i+batch_size]
-        vs = FAISS.from_documents(batch, embeddings)
-        vectorstores.append(vs)
-    main_vs = vectorstores[0]
-    for vs in vectorstores[1:]:
-        main_vs.merge_from(vs)
-    return main_vs
+VECTOR_STORE_PATH = settings.VECTOR_STORE_PATH
+SHARDED_VECTOR_STORE_PATH = settings.SHARDED_VECTOR_STORE_PATH
+LAW_DATA_PATH = settings.LAW_DATA_PATH
+
+
+def create_embeddings(spec: EmbeddingSpec = None):
+    """
+    Vector Store 생성/검색에 사용할 임베딩 모델을 생성합니다. (기본: 설정한 `EMBEDDING_BACKEND`)
+    임베딩 캐시가 켜져 있으면 문서/질의 임베딩 모두 디스크 캐시를 거칩니다.
+    local 백엔드는 캐시 조회보다 직접 계산이 빠르므로 캐시를 사용하지 않습니다.
+    OpenAI 백엔드는 속도 제한을 켜면 캐시에 없는 텍스트만 스케줄러를 거쳐 API를 호출합니다.
+    """
+    spec = spec or EmbeddingSpec.from_settings()
+    embeddings = create_embedding_backend(spec)
+    if settings.RATE_LIMIT_ENABLED and spec.backend == "openai":
+        embeddings = RateLimitedEmbeddings(embeddings, spec.model)
+    if not settings.EMBEDDING_CACHE_ENABLED or spec.backend == "local":
+        return embeddings
+    cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH, settings.EMBEDDING_CACHE_MAX_BYTES)
+    return CachedEmbeddings(embeddings, cache, model=spec.model)
+
+
+def build_vector_store(embeddings, path=VECTOR_STORE_PATH, embedding_spec: EmbeddingSpec = None):
+    """
+    data/laws 폴더의 PDF로 Vector Store를 새로 생성하고 로컬에 저장합니다.
+    PDF별 해시/벡터 ID를 매니페스트에 함께 기록하므로 이후에는 `python -m app.rag.ingest sync`로 변경분만 반영할 수 있습니다.
+    """
+    print("저장된 Vector Store가 없어 새로 생성합니다.")
+    embedding_spec = embedding_spec or EmbeddingSpec.from_settings()
+    vector_store = rebuild_vector_store(embeddings, LAW_DATA_PATH, path, embedding_spec)
+    if isinstance(embeddings, CachedEmbeddings):
+        # 임베딩 캐시를 사용하면 이전에 임베딩한 청크는 API를 호출하지 않습니다.
+        print(f"임베딩 캐시: 적중 {embeddings.hits}건, 신규 {embeddings.misses}건")
+    return vector_store
+
+
+def load_vector_store(embeddings, path=VECTOR_STORE_PATH, embedding_spec: EmbeddingSpec = None):
+    """
+    로컬에 저장된 Vector Store를 로드합니다.
+    설정한 FAISS 인덱스 유형(`FAISS_INDEX_TYPE`)을 사용하며, 인덱스는 읽기 전용 메모리 맵으로 엽니다.
+    SQLite 형식 docstore는 검색된 청크만 필요할 때 읽습니다.
+    인덱스를 만든 임베딩(매니페스트 기록/벡터 차원)이 `embedding_spec`과 다르면 `EmbeddingMismatchError`가 발생합니다.
+    """
+    embedding_spec = embedding_spec or EmbeddingSpec.from_settings()
+    manifest = read_manifest(path)
+    check_embedding_spec(manifest, embedding_spec)
+    print(f"'{path}' 경로에서 기존 Vector Store를 로드합니다. ({settings.FAISS_INDEX_TYPE}, 임베딩 {embedding_spec})")
+    vector_store = load_faiss_store(path, embeddings, manifest, mmap=settings.FAISS_INDEX_MMAP)
+    check_embedding_spec(None, embedding_spec, vector_store.index.d)
+    return vector_store
+
+
+def build_sharded_vector_store(embeddings, path=SHARDED_VECTOR_STORE_PATH, embedding_spec: EmbeddingSpec = None):
+    """data/laws 폴더의 PDF를 샤드별로 나누어 샤드 인덱스를 새로 생성하고 로드합니다."""
+    print("저장된 샤드 인덱스가 없어 새로 생성합니다.")
+    embedding_spec = embedding_spec or EmbeddingSpec.from_settings()
+    sync_shards(embeddings, LAW_DATA_PATH, path, embedding_spec, rebuild=True)
+    return load_sharded_vector_store(embeddings, path, embedding_spec)
+
+
+def load_sharded_vector_store(embeddings, path=SHARDED_VECTOR_STORE_PATH, embedding_spec: EmbeddingSpec = None,
+                              router: ShardRouter = None):
+    """
+    저장된 샤드 인덱스를 모두 로드하여 하나의 `ShardedVectorStore`로 묶습니다.
+    샤드마다 `load_vector_store`와 같이 임베딩 일치 여부를 확인하며, hybrid 모드면 샤드별 BM25 역색인도 로드합니다.
+    """
+    names = existing_shards(path)
+    if not names:
+        raise ValueError(f"'{path}'에 샤드 인덱스가 없습니다. 먼저 `python -m app.rag.ingest sync`를 실행하세요.")
+    shards = {name: load_vector_store(embeddings, os.path.join(path, name), embedding_spec) for name in names}
+    lexical = {}
+    if settings.RETRIEVER_MODE == "hybrid":
+        for name, vector_store in shards.items():
+            shard_path = os.path.join(path, name)
+            lexical[name] = (LexicalIndex.load(shard_path) if LexicalIndex.exists(shard_path)
+                             else LexicalIndex.from_vector_store(vector_store))
+    elif settings.RETRIEVER_MODE != "vector":
+        raise ValueError(f"지원하지 않는 검색 방식입니다: {settings.RETRIEVER_MODE} (가능: vector, hybrid)")
+    return ShardedVectorStore(shards, embeddings, router or ShardRouter.from_settings(), lexical)
+
+
+def create_retriever(vector_store, path=None, search_kwargs=None):
+    """
+    설정한 검색 방식(`RETRIEVER_MODE`)의 리트리버를 만듭니다.
+    hybrid 모드는 저장된 BM25 역색인을 사용하고, 없으면 Vector Store의 청크로 새로 만듭니다.
+    샤드 인덱스는 로드할 때 검색 방식에 맞게 준비되므로 샤드 리트리버를 그대로 반환합니다.
+    """
+    search_kwargs = search_kwargs or {'k': 5}
+    if isinstance(vector_store, ShardedVectorStore):
+        return vector_store.as_retriever(search_kwargs=search_kwargs)
+    if settings.RETRIEVER_MODE == "vector":
+        return vector_store.as_retriever(search_kwargs=search_kwargs)
+    if settings.RETRIEVER_MODE != "hybrid":
+        raise ValueError(f"지원하지 않는 검색 방식입니다: {settings.RETRIEVER_MODE} (가능: vector, hybrid)")
+
+    if path and LexicalIndex.exists(path):
+        lexical_index = LexicalIndex.load(path)
+    else:
+        print("BM25 역색인을 Vector Store의 청크로 생성합니다.")
+        lexical_index = LexicalIndex.from_vector_store(vector_store)
+    return HybridRetriever(
+        vector_store=vector_store,
+        lexical_index=lexical_index,
+        k=search_kwargs.get('k', 5),
+        fetch_k=settings.HYBRID_FETCH_K,
+        rrf_k=settings.HYBRID_RRF_K,
+    )
+
+
+class VectorStoreRegistry:
+    """
+    프로세스 전역에서 Vector Store를 한 번만 로드하여 공유하는 레지스트리입니다.
+
+    - 최초 요청(또는 `warm_up`) 시 인덱스를 로드하고, 이후에는 같은 리트리버를 재사용합니다.
+    - 저장(`save_vector_store`)은 파일을 하나씩 교체하고 매니페스트를 마지막에 교체하므로,
+      매니페스트의 `updated_at`이 바뀌었을 때만 새 인덱스를 로드한 뒤 참조를 원자적으로 교체합니다.
+      로드하는 동안 `updated_at`이 다시 바뀌면(다른 저장이 끝나면) 파일이 섞였을 수 있으므로 로드 결과를 버립니다.
+      교체 전까지 진행 중인 검색은 기존 인덱스를 그대로 사용합니다.
+    - 변경 확인은 `VECTOR_STORE_CHECK_INTERVAL_SECONDS`마다 한 번만 하며,
+      비동기 경로는 `arefresh`로 확인/로드를 스레드에서 실행하여 이벤트 루프를 막지 않습니다.
+    - FAISS 검색은 읽기 전용이므로 여러 스레드/비동기 작업에서 동시에 사용해도 안전합니다.
+    """
+
+    def __init__(self, path=VECTOR_STORE_PATH, search_kwargs=None, embedding_spec: EmbeddingSpec = None):
+        self.path = path
+        self.search_kwargs = search_kwargs or {'k': 5}
+        self.embedding_spec = embedding_spec or EmbeddingSpec.from_settings()
+        self._load_lock = threading.RLock()
+        self._embeddings = None
+        # (signature, vector_store, retriever) 튜플을 한 번에 교체하여 원자성을 보장합니다.
+        self._current = None
+        # True면 디스크 변경 감지를 하지 않고 주입된 Vector Store를 그대로 사용합니다.
+        self._pinned = False
+        self.check_interval = settings.VECTOR_STORE_CHECK_INTERVAL_SECONDS
+        self._checked_at = 0.0
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            with self._load_lock:
+                if self._embeddings is None:
+                    self._embeddings = create_embeddings(self.embedding_spec)
+        return self._embeddings
+
+    def _signature(self):
+        return index_version(self.path)
+
+    def _build(self):
+        return build_vector_store(self.embeddings, self.path, self.embedding_spec)
+
+    def _open(self):
+        return load_vector_store(self.embeddings, self.path, self.embedding_spec)
+
+    def _load(self):
+        """인덱스를 로드(없으면 생성)하고 현재 참조를 교체합니다. 호출자는 `_load_lock`을 잡고 있어야 합니다."""
+        signature = self._signature()
+        if signature is None:
+            vector_store = self._build()
+            signature = self._signature()
+        else:
+            vector_store = self._open()
+            if self._signature() != signature:
+                raise RuntimeError("로드하는 동안 인덱스가 다시 저장되었습니다.")
+        retriever = create_retriever(vector_store, self.path, self.search_kwargs)
+        self._current = (signature, vector_store, retriever)
+        return self._current
+
+    def _check_due(self) -> bool:
+        return self._current is None or (
+            not self._pinned and time.monotonic() - self._checked_at >= self.check_interval)
+
+    def _ensure_current(self):
+        current = self._current
+        if not self._check_due():
+            return current
+
+        with self._load_lock:
+            # 다른 스레드가 먼저 확인/로드를 끝냈는지 다시 확인합니다.
+            if not self._check_due():
+                return self._current
+            current = self._current
+            if current is None:
+                self._checked_at = time.monotonic()
+                return self._load()
+            signature = self._signature()
+            self._checked_at = time.monotonic()
+            if signature is None or signature == current[0]:
+                return current
+            logger.info("🔄 Vector Store 변경을 감지하여 새 인덱스로 교체합니다.")
+            try:
+                return self._load()
+            except Exception as e:
+                # 저장이 진행 중이거나 파일이 손상된 경우, 기존 인덱스로 계속 서비스하고 다음 확인 때 다시 시도합니다.
+                logger.warning("⚠️ 새 Vector Store 로드 실패, 기존 인덱스를 유지합니다: %s", e)
+                return current
+
+    async def arefresh(self):
+        """변경 확인(필요하면 로드)을 스레드에서 실행합니다. 확인할 때가 아니면 바로 반환합니다."""
+        if self._check_due():
+            await asyncio.to_thread(self._ensure_current)
+
+    def warm_up(self):
+        """서버 시작 시 인덱스를 미리 로드하여 첫 요청의 지연을 제거합니다."""
+        self._ensure_current()
+
+    def get_vector_store(self):
+        return self._ensure_current()[1]
+
+    def get_retriever(self):
+        return self._ensure_current()[2]
+
+    def get_retry_retriever(self, attempt: int):
+        """
+        재검색용 리트리버를 반환합니다. 시도 횟수마다 검색 문서 수(k)를 늘리고,
+        MMR로 이미 본 문서와 비슷한 청크 대신 다양한 청크를 고르도록 합니다.
+        hybrid 모드는 같은 BM25 역색인을 쓰는 하이브리드 리트리버의 MMR 변형을 반환하여 BM25 결과를 유지합니다.
+        """
+        k = self.search_kwargs.get('k', 4) + settings.RETRY_ESCALATION_K_STEP * attempt
+        _, vector_store, retriever = self._ensure_current()
+        if isinstance(retriever, HybridRetriever):
+            # 통계 객체는 공유하여 재검색도 같은 하이브리드 검색 통계에 집계합니다.
+            return retriever.model_copy(update={'k': k, 'fetch_k': max(retriever.fetch_k, k * 4), 'lambda_mult': 0.5})
+        return vector_store.as_retriever(
+            search_type="mmr",
+            search_kwargs={'k': k, 'fetch_k': k * 4, 'lambda_mult': 0.5},
+        )
+
+    def use_vector_store(self, vector_store):
+        """이미 만들어진 Vector Store를 주입하여 사용합니다. (벤치마크/로컬 테스트용)"""
+        with self._load_lock:
+            retriever = create_retriever(vector_store, search_kwargs=self.search_kwargs)
+            self._embeddings = vector_store.embeddings
+            self._current = (None, vector_store, retriever)
+            self._pinned = True
+
+    def reset(self):
+        """로드된 인덱스를 버립니다. 다음 요청 시 다시 로드합니다."""
+        with self._load_lock:
+            self._current = None
+            self._pinned = False
+
+
+class ShardedVectorStoreRegistry(VectorStoreRegistry):
+    """
+    샤드 인덱스용 레지스트리입니다. (`SHARDED_INDEX_ENABLED`)
+    어느 샤드든 파일이 바뀌면 모든 샤드를 다시 로드합니다. 인덱스는 메모리 맵으로 열므로 바뀌지 않은 샤드의 로드 비용은 작습니다.
+    """
+
+    def __init__(self, path=SHARDED_VECTOR_STORE_PATH, search_kwargs=None, embedding_spec: EmbeddingSpec = None):
+        super().__init__(path, search_kwargs, embedding_spec)
+
+    def _signature(self):
+        """샤드별 (이름, 인덱스 버전) 목록. 샤드가 하나도 없으면 None을 반환합니다."""
+        names = existing_shards(self.path)
+        if not names:
+            return None
+        return tuple((name, index_version(os.path.join(self.path, name))) for name in names)
+
+    def _build(self):
+        return build_sharded_vector_store(self.embeddings, self.path, self.embedding_spec)
+
+    def _open(self):
+        return load_sharded_vector_store(self.embeddings, self.path, self.embedding_spec)
+
+
+def index_version(path):
+    """
+    매니페스트의 `updated_at`. 저장할 때 매니페스트를 마지막에 교체하므로 이 값이 바뀌면 저장이 끝난 것입니다.
+    매니페스트 없는 이전 인덱스는 0.0, 인덱스가 없으면 None을 반환합니다.
+    """
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return manifest.get("updated_at", 0.0)
+    return 0.0 if os.path.exists(os.path.join(path, FLAT_INDEX_FILE)) else None
+
+
+# 프로세스 전역 레지스트리
+vector_store_registry = ShardedVectorStoreRegistry() if settings.SHARDED_INDEX_ENABLED else VectorStoreRegistry()
+
 
 def get_retriever():
     """
     저장된 Vector Store를 로드하여 리트리버를 반환합니다.
     만약 Vector Store가 없다면 새로 생성합니다.
+    프로세스당 한 번만 로드하며, 이후 호출은 공유 리트리버를 반환합니다.
     """
-    if not os.path.exists(VECTOR_STORE_PATH):
-        print("저장된 Vector Store가 없어 새로 생성합니다.")
-        # 1. 문서 로드 (data/laws 폴더의 모든 PDF)
-        loader = PyPDFDirectoryLoader(LAW_DATA_PATH)
-        documents = loader.load()
-        print(f"총 {len(documents)}개의 PDF 문서를 로드했습니다.")
-
-        # 2. 텍스트 분할
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
-        splits = text_splitter.split_documents(documents)
-        print(f"문서를 총 {len(splits)}개로 분할했습니다.")
-
-        # 3. 임베딩 및 Vector Store 생성 (배치 처리) 추후 large model로 변경 가능
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        vector_store = batch_faiss_build(splits, embeddings, batch_size=100)
-
-        # 4. 로컬에 저장
-        vector_store.save_local(VECTOR_STORE_PATH)
-        print(f"Vector Store를 '{VECTOR_STORE_PATH}' 경로에 저장했습니다.")
-    else:
-        print(f"'{VECTOR_STORE_PATH}' 경로에서 기존 Vector Store를 로드합니다.")
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        vector_store = FAISS.load_local(VECTOR_STORE_PATH, embeddings, allow_dangerous_deserialization=True)
-
     # 검색기(Retriever) 반환 (가장 유사한 문서 5개 검색)
-    return vector_store.as_retriever(search_kwargs={'k': 5})
+    return vector_store_registry.get_retriever()
+
+
+def get_retry_retriever(attempt: int):
+    """`attempt`번째 재검색에 사용할 리트리버를 반환합니다. (k 확대 + MMR)"""
+    return vector_store_registry.get_retry_retriever(attempt)
+
+
+async def arefresh_vector_store():
+    """비동기 경로에서 검색 전에 호출합니다. Vector Store 변경 확인/로드를 이벤트 루프 밖에서 실행합니다."""
+    await vector_store_registry.arefresh()
+
+
+def warm_up_retriever():
+    """Vector Store를 미리 로드합니다. (서버 시작 시 호출)"""
+    vector_store_registry.warm_up()
 
 #python app/rag/retriever.py 테스트용
 if __name__ == '__main__':
@@ -63,3 +331,7 @@ if __name__ == '__main__':
     print(f"\n테스트 쿼리 '{test_query}'에 대한 검색 결과:")
     for doc in results:
         print(f"- (Source: {doc.metadata.get('source', 'N/A')}) {doc.page_content[:100]}...")
+    if isinstance(retriever, HybridRetriever):
+        print(f"\n하이브리드 검색 통계: {retriever.stats.to_dict()}")
+    if isinstance(retriever, ShardedRetriever):
+        print(f"\n샤드 검색 통계: {retriever.store.stats.to_dict()}")
@@ -0,0 +1,238 @@
+"""
+샤드 인덱스 모듈
+법령 PDF를 분야별 샤드(교통, 소음, 건축 등)로 나누어 샤드마다 독립된 FAISS 인덱스를 두고,
+질의 키워드로 관련 샤드만 골라 동시에 검색한 뒤 상위 k개를 합칩니다.
+
+- 라우팅: 샤드별 키워드가 질의에 나온 횟수로 최대 `SHARD_MAX_ROUTED`개 샤드를 고르고,
+  공통 샤드(`SHARD_ALWAYS_SEARCH`)를 함께 검색합니다. 맞는 키워드가 없으면 모든 샤드를 검색합니다.
+- 병합: 모든 샤드가 같은 임베딩이므로 벡터 검색은 L2 거리로 그대로 합칩니다. (샤드별 상위 k개면 전체 상위 k개가 정확합니다)
+  hybrid 모드는 샤드별 벡터/BM25 후보를 각각 합친 전체 순위를 RRF로 결합합니다.
+- 질의 임베딩은 샤드 수와 관계없이 한 번만 계산합니다.
+"""
+import asyncio
+import fnmatch
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.config import settings
+from app.rag.lexical import LexicalIndex, is_exact_term_query
+
+
+class ShardRouter:
+    """PDF를 샤드에 배정하고, 질의를 검색할 샤드로 라우팅합니다."""
+
+    def __init__(self, shards: Dict[str, dict], default: str, always: Sequence[str] = (), max_routed: int = 2):
+        self.shards = shards
+        self.default = default
+        self.always = tuple(always)
+        self.max_routed = max_routed
+
+    @classmethod
+    def from_settings(cls) -> "ShardRouter":
+        return cls(settings.SHARDS, settings.SHARD_DEFAULT, settings.SHARD_ALWAYS_SEARCH, settings.SHARD_MAX_ROUTED)
+
+    def assign(self, relative_path: str) -> str:
+        """법령 폴더 기준 PDF 경로가 처음으로 맞는 패턴의 샤드. 맞는 패턴이 없으면 기본 샤드입니다."""
+        relative_path = relative_path.replace(os.sep, "/")
+        for name, shard in self.shards.items():
+            if any(fnmatch.fnmatch(relative_path, pattern) for pattern in shard.get("patterns", ())):
+                return name
+        return self.default
+
+    def route(self, query: str, available: Iterable[str]) -> List[str]:
+        """`available` 샤드 중 질의를 검색할 샤드 목록 (키워드 점수가 높은 순, 공통 샤드는 마지막)"""
+        available = sorted(available)
+        query = query.lower()
+        scores = {
+            name: sum(query.count(keyword.lower()) for keyword in self.shards[name].get("keywords", ()))
+            for name in available if name in self.shards
+        }
+        routed = sorted((name for name, score in scores.items() if score > 0), key=lambda n: -scores[n])
+        if not routed:
+            return available
+        routed = routed[:self.max_routed]
+        return routed + [name for name in self.always if name in available and name not in routed]
+
+
+@dataclass
+class ShardSearchStats:
+    queries: int = 0
+    shards_searched: int = 0  # 질의마다 검색한 샤드 수의 합
+    lexical_only: int = 0     # 임베딩 없이 BM25만으로 답한 질의 수
+
+    def to_dict(self) -> dict:
+        return {
+            "queries": self.queries,
+            "shards_per_query": self.shards_searched / self.queries if self.queries else 0.0,
+            "lexical_only": self.lexical_only,
+        }
+
+
+# (점수, 샤드 이름, 인덱스 위치 또는 문서 ID)
+Hit = Tuple[float, str, object]
+
+_search_pool: Optional[ThreadPoolExecutor] = None
+_search_pool_lock = threading.Lock()
+
+
+def get_shard_search_pool() -> ThreadPoolExecutor:
+    """샤드 동시 검색에 사용할 프로세스 전역 스레드 풀 (인덱스를 다시 로드해도 공유합니다)"""
+    global _search_pool
+    if _search_pool is None:
+        with _search_pool_lock:
+            if _search_pool is None:
+                _search_pool = ThreadPoolExecutor(max_workers=max(1, settings.SHARD_SEARCH_WORKERS),
+                                                  thread_name_prefix="shard-search")
+    return _search_pool
+
+
+class ShardedVectorStore:
+    """
+    샤드별 FAISS Vector Store(와 hybrid 모드의 BM25 역색인)를 묶어 하나의 Vector Store처럼 사용합니다.
+    레지스트리가 사용하는 `embeddings`, `as_retriever`를 FAISS와 같은 형태로 제공합니다.
+    """
+
+    def __init__(self, shards: Dict[str, FAISS], embeddings, router: ShardRouter,
+                 lexical: Optional[Dict[str, LexicalIndex]] = None, executor: Optional[ThreadPoolExecutor] = None):
+        self.shards = shards
+        self.embeddings = embeddings
+        self.router = router
+        self.lexical = lexical or {}
+        self.stats = ShardSearchStats()
+        self._executor = executor or get_shard_search_pool()
+
+    @property
+    def names(self) -> List[str]:
+        return sorted(self.shards)
+
+    @property
+    def ntotal(self) -> int:
+        return sum(store.index.ntotal for store in self.shards.values())
+
+    def route(self, query: str) -> List[str]:
+        return self.router.route(query, self.shards)
+
+    def _map(self, fn, names: List[str]) -> List[list]:
+        """샤드별로 `fn(샤드 이름)`을 실행합니다. 샤드가 둘 이상이면 스레드 풀에서 동시에 실행합니다. (FAISS 검색은 GIL을 놓습니다)"""
+        if len(names) == 1:
+            return [fn(names[0])]
+        return list(self._executor.map(fn, names))
+
+    def _vector_hits(self, names: List[str], embedding: np.ndarray, k: int) -> List[Hit]:
+        def search(name: str) -> List[Hit]:
+            distances, positions = self.shards[name].index.search(embedding, k)
+            return [(float(d), name, int(i)) for d, i in zip(distances[0], positions[0]) if i != -1]
+        return sorted(hit for hits in self._map(search, names) for hit in hits)
+
+    def _lexical_hits(self, names: List[str], query: str, k: int) -> List[Hit]:
+        def search(name: str) -> List[Hit]:
+            return [(score, name, doc_id) for doc_id, score in self.lexical[name].search(query, k)]
+        return sorted((hit for hits in self._map(search, names) for hit in hits), key=lambda hit: -hit[0])
+
+    def _document(self, name: str, key) -> Document:
+        store = self.shards[name]
+        doc_id = store.index_to_docstore_id[key] if isinstance(key, int) else key
+        return store.docstore.search(doc_id)
+
+    def _doc_key(self, name: str, key) -> Tuple[str, str]:
+        """샤드 이름과 문서 ID. (벡터 결과는 인덱스 위치, BM25 결과는 문서 ID로 오므로 통일합니다)"""
+        return name, self.shards[name].index_to_docstore_id[key] if isinstance(key, int) else key
+
+    def lexical_search(self, query: str, names: List[str], k: int) -> Optional[List[Document]]:
+        """hybrid 모드의 조회형 질의이고 BM25 결과가 있으면 반환합니다. 아니면 None. (`HybridRetriever`와 같은 규칙)"""
+        if not self.lexical or not is_exact_term_query(query):
+            return None
+        hits = self._lexical_hits(names, query, k)[:k]
+        if not hits:
+            return None
+        self.stats.lexical_only += 1
+        return [self._document(name, doc_id) for _, name, doc_id in hits]
+
+    def search_by_vector(self, query: str, embedding: List[float], names: List[str], k: int, fetch_k: int,
+                         mmr: bool = False, lambda_mult: float = 0.5, rrf_k: int = 60) -> List[Document]:
+        vector = np.asarray([embedding], dtype=np.float32)
+        if mmr:
+            candidates = self._vector_hits(names, vector, fetch_k)[:fetch_k]
+            vectors = [self.shards[name].index.reconstruct(position) for _, name, position in candidates]
+            # hybrid 모드는 후보 전체를 MMR 순서로 바꿔 BM25 순위와 결합합니다. (`HybridRetriever`의 재검색과 같은 규칙)
+            limit = len(candidates) if self.lexical else k
+            selected = maximal_marginal_relevance(vector[0], vectors, lambda_mult=lambda_mult, k=limit) if vectors else []
+            if not self.lexical:
+                return [self._document(candidates[i][1], candidates[i][2]) for i in selected]
+            vector_ranking = [candidates[i] for i in selected]
+        elif not self.lexical:
+            return [self._document(name, position) for _, name, position in self._vector_hits(names, vector, k)[:k]]
+        else:
+            vector_ranking = self._vector_hits(names, vector, fetch_k)[:fetch_k]
+
+        scores = defaultdict(float)
+        rankings = (vector_ranking, self._lexical_hits(names, query, fetch_k)[:fetch_k])
+        for ranking in rankings:
+            for rank, (_, name, key) in enumerate(ranking):
+                scores[self._doc_key(name, key)] += 1.0 / (rrf_k + rank + 1)
+        return [self._document(name, doc_id) for name, doc_id in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+    def as_retriever(self, search_type: str = "similarity", search_kwargs: Optional[dict] = None) -> "ShardedRetriever":
+        """
+        샤드 리트리버를 만듭니다. MMR(재검색)은 라우팅이 틀렸을 수 있으므로 모든 샤드를 검색합니다.
+        """
+        search_kwargs = search_kwargs or {}
+        mmr = search_type == "mmr"
+        return ShardedRetriever(
+            store=self,
+            k=search_kwargs.get("k", 4),
+            fetch_k=search_kwargs.get("fetch_k", settings.HYBRID_FETCH_K),
+            lambda_mult=search_kwargs.get("lambda_mult", 0.5),
+            rrf_k=settings.HYBRID_RRF_K,
+            routed=not mmr,
+            mmr=mmr,
+        )
+
+
+class ShardedRetriever(BaseRetriever):
+    """질의를 관련 샤드로 라우팅하여 검색하는 리트리버입니다."""
+
+    store: ShardedVectorStore
+    k: int = 5
+    fetch_k: int = 20  # hybrid/MMR 결합 전 가져올 후보 수
+    lambda_mult: float = 0.5
+    rrf_k: int = 60
+    routed: bool = True  # False면 모든 샤드를 검색합니다.
+    mmr: bool = False
+
+    def _plan(self, query: str) -> List[str]:
+        names = self.store.route(query) if self.routed else self.store.names
+        self.store.stats.queries += 1
+        self.store.stats.shards_searched += len(names)
+        return names
+
+    def _search(self, query: str, names: List[str], embedding: List[float]) -> List[Document]:
+        return self.store.search_by_vector(query, embedding, names, self.k, self.fetch_k,
+                                           self.mmr, self.lambda_mult, self.rrf_k)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        names = self._plan(query)
+        documents = None if self.mmr else self.store.lexical_search(query, names, self.k)
+        if documents is not None:
+            return documents
+        return self._search(query, names, self.store.embeddings.embed_query(query))
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        names = self._plan(query)
+        documents = None if self.mmr else self.store.lexical_search(query, names, self.k)
+        if documents is not None:
+            return documents
+        embedding = await self.store.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self._search, query, names, embedding)
@@ -0,0 +1,247 @@
+"""
+AI 에이전트 실행 서비스
+로컬 대화형 테스트(동기)와 API 서버(비동기)가 같은 실행 로직을 공유합니다.
+
+`session_id`를 지정하면 민원인별 세션(LangGraph thread_id)으로 실행합니다.
+재질문을 보낸 실행은 '답변 대기' 노드에서 멈추며(`interrupt`) 그 시점의 상태가 체크포인트로 저장됩니다.
+추가 답변은 민원인의 발화만 `Command(resume=답변)`으로 보내 멈춘 지점에서 이어서 실행합니다.
+답변은 원래 민원에 덧붙여 질문 분석부터 다시 평가하고, 재질문 횟수가 `MAX_RETRIES`에 도달하면 검색으로 진행합니다.
+최종 보고서가 나오면 세션을 삭제하므로 세션 하나에는 민원 하나만 담기고, 질문과 `messages`는 최대 재질문 횟수만큼만 늘어납니다.
+(실행 중에는 체크포인트를 쓰지 않고(`checkpoint_during=False`) 멈추거나 끝날 때만 저장합니다)
+
+모든 실행에는 `AgentTrace` 콜백이 붙어 노드별 지연/토큰/비용을 `/metrics` 지표로 남깁니다.
+요청 단위 요약이 필요하면 `trace`를 직접 만들어 넘기고 실행 후 `trace.summary()`를 읽습니다.
+
+실행마다 속도 제한 우선순위(`request_context`)를 정합니다. 재질문에 대한 추가 답변과 첫 호출을 마친 실행의
+LLM/임베딩 호출은 새 민원의 첫 호출보다 먼저 처리됩니다.
+"""
+from typing import Any, AsyncIterator, Dict, Optional
+
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
+
+from app.ai.agent import get_compiled_agent
+from app.ai.checkpoint import get_checkpointer
+from app.ai.state import AgentState
+from app.ai.tracing import AgentTrace
+from app.config import settings
+from app.core.rate_limit import request_context
+
+
+# 토큰 단위로 스트리밍할 노드 (사용자에게 직접 보여지는 출력을 만드는 노드)
+# '통합 보고서 생성'은 JSON을 출력하므로 토큰을 보내지 않고, 조립된 보고서를 final 이벤트로만 전달합니다.
+STREAMING_NODES = ("create_final_report", "request_clarification")
+
+
+def create_initial_state(question: str) -> AgentState:
+    """AgentState에 정의된 모든 필드를 명시적으로 초기화한 초기 상태를 만듭니다."""
+    # AgentState에 정의된 모든 필드를 명시적으로 초기화해주는 것이
+    # 나중에 상태 관련 버그를 방지하는 데 도움이 됩니다.
+    return AgentState(
+        question=question,
+        cleaned_question="",
+        documents=[],
+        answer="",
+        assistant_answer="",
+        final_report={},
+        assessment_result="",
+        retries=0,
+        documents_unchanged=False,
+        context_tokens_saved=0,
+        answer_cache_hit=False,
+        messages=[HumanMessage(content=question)]
+    )
+
+
+def _awaiting_reply(snapshot) -> bool:
+    """세션 스레드가 재질문을 보낸 뒤 '답변 대기' 노드에서 멈춰 있으면 True (이번 입력은 그 민원에 대한 추가 답변)"""
+    return "await_clarification" in snapshot.next
+
+
+def _session_config(session_id: str) -> dict:
+    return {"configurable": {"thread_id": session_id}}
+
+
+def _traced(config: Optional[dict], trace: AgentTrace) -> dict:
+    return {**(config or {}), "callbacks": [trace]}
+
+
+def _outcome(answer: str) -> str:
+    return "completed" if "■" in answer else "clarification"
+
+
+def _prepare_run(question: str, session_id: Optional[str]):
+    """
+    (에이전트, 입력, 실행 설정, 추가 답변 여부)를 준비합니다.
+    - 세션이 '답변 대기'에서 멈춰 있으면 민원인의 답변만 `Command(resume=답변)`으로 보내 멈춘 지점에서 이어서 실행합니다.
+    - 그 밖에는 새 민원으로 시작합니다. 이전 민원의 스레드가 남아 있으면 지워 `messages`가 섞이지 않게 합니다.
+    """
+    if session_id is None:
+        return get_compiled_agent(), create_initial_state(question), None, False
+    agent = get_compiled_agent(sessions=True)
+    config = _session_config(session_id)
+    snapshot = agent.get_state(config)
+    if _awaiting_reply(snapshot):
+        return agent, Command(resume=question), config, True
+    if snapshot.values:
+        get_checkpointer().delete_thread(session_id)
+    return agent, create_initial_state(question), config, False
+
+
+async def asession_in_progress(session_id: Optional[str]) -> bool:
+    """세션이 재질문 후 답변을 기다리는 중이면 True. (API의 수락 제어 우선순위를 서버에서 정할 때 사용)"""
+    if session_id is None or not settings.SESSION_ENABLED:
+        return False
+    config = _session_config(session_id)
+    return _awaiting_reply(await get_compiled_agent(sessions=True).aget_state(config))
+
+
+async def _aprepare_run(question: str, session_id: Optional[str]):
+    if session_id is None:
+        return get_compiled_agent(), create_initial_state(question), None, False
+    agent = get_compiled_agent(sessions=True)
+    config = _session_config(session_id)
+    snapshot = await agent.aget_state(config)
+    if _awaiting_reply(snapshot):
+        return agent, Command(resume=question), config, True
+    if snapshot.values:
+        await get_checkpointer().adelete_thread(session_id)
+    return agent, create_initial_state(question), config, False
+
+
+def _end_session(session_id: Optional[str], answer: str) -> None:
+    """
+    최종 보고서가 나오면 세션을 삭제합니다. (같은 session_id의 다음 입력은 새 민원으로 시작합니다)
+    재질문으로 끝난 실행은 '답변 대기'에서 멈출 때 체크포인트가 이미 저장되어 있습니다.
+    """
+    if session_id is not None and "■" in answer:
+        get_checkpointer().delete_thread(session_id)
+
+
+async def _aend_session(session_id: Optional[str], answer: str) -> None:
+    if session_id is not None and "■" in answer:
+        await get_checkpointer().adelete_thread(session_id)
+
+
+def extract_agent_response(final_state) -> str:
+    """그래프 실행이 끝난 상태에서 사용자에게 돌려줄 문자열을 꺼냅니다."""
+    if final_state:
+        # 최종 결과물은 항상 'answer' 필드에 저장되도록 통일했습니다.
+        final_result = final_state.get("answer", "")
+        if final_result and "■" in final_result: # 최종 보고서 형식인지 확인
+            return final_result
+        # 재질문 등 다른 메시지가 있다면 마지막 메시지를 반환
+        elif final_state.get("messages"):
+            return final_state["messages"][-1].content
+        else:
+            return "오류: 최종 답변을 생성하지 못했습니다."
+    else:
+        return "에이전트 실행 중 오류가 발생했습니다."
+
+
+def run_minone_agent(question: str, session_id: Optional[str] = None, trace: Optional[AgentTrace] = None) -> str:
+    """
+    사용자의 질문을 받아 AI 에이전트 워크플로우를 실행하고,
+    최종 답변 또는 다음 행동(재질문)을 문자열로 반환합니다.
+    `session_id`를 지정하면 같은 세션이 재질문 후 답변을 기다리는 중일 때 멈춘 지점에서 이어서 실행합니다.
+    """
+    trace = trace or AgentTrace()
+    agent, run_input, config, followup = _prepare_run(question, session_id)
+
+    print(f"\n{'='*20} 민 ONE 에이전트 실행 시작 {'='*20}")
+    print(f"입력된 질문: {question}")
+    print(f"{'='*55}\n")
+
+    final_state = None
+    try:
+        with request_context(in_progress=followup):
+            for step_output in agent.stream(run_input, _traced(config, trace), stream_mode="values",
+                                            checkpoint_during=False):
+                current_node = list(step_output.keys())[-1]
+                print(f"--- 🏃 현재 실행 노드: {current_node} ---")
+                final_state = step_output
+    except BaseException:
+        trace.finish("error")
+        raise
+
+    print(f"\n{'='*20} 민 ONE 에이전트 실행 종료 {'='*20}")
+    answer = extract_agent_response(final_state)
+    _end_session(session_id, answer)
+    trace.finish(_outcome(answer))
+    return answer
+
+
+async def arun_minone_agent(question: str, session_id: Optional[str] = None,
+                            trace: Optional[AgentTrace] = None) -> str:
+    """
+    `run_minone_agent`의 비동기 버전입니다.
+    그래프를 `astream`으로 구동하므로 하나의 이벤트 루프에서 여러 민원을 동시에 처리할 수 있습니다.
+    """
+    trace = trace or AgentTrace()
+    agent, run_input, config, followup = await _aprepare_run(question, session_id)
+
+    final_state = None
+    try:
+        with request_context(in_progress=followup):
+            async for step_output in agent.astream(run_input, _traced(config, trace), stream_mode="values",
+                                                         checkpoint_during=False):
+                final_state = step_output
+    except BaseException:
+        trace.finish("error")
+        raise
+
+    answer = extract_agent_response(final_state)
+    await _aend_session(session_id, answer)
+    trace.finish(_outcome(answer))
+    return answer
+
+
+async def astream_minone_agent(question: str, session_id: Optional[str] = None,
+                               trace: Optional[AgentTrace] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    에이전트 실행 과정을 이벤트로 흘려보냅니다. (SSE 응답용)
+
+    - node: 노드 실행이 끝날 때마다 노드 이름을 전달합니다. (`run_minone_agent`가 출력하는 진행 정보와 동일)
+    - token: `STREAMING_NODES`에서 생성되는 LLM 토큰을 도착하는 즉시 전달합니다.
+      LLM 응답 캐시에 적중하면 전체 응답이 token 이벤트 하나로 옵니다.
+    - final: 최종 보고서 또는 재질문 전체를 전달합니다. (재질문이면 이어서 답할 `session_id`, `TRACE_IN_RESPONSE`면 `trace` 포함)
+    """
+    trace = trace or AgentTrace()
+    agent, run_input, config, followup = await _aprepare_run(question, session_id)
+
+    final_state = None
+    try:
+        with request_context(in_progress=followup):
+            async for mode, chunk in agent.astream(run_input, _traced(config, trace),
+                                                   stream_mode=["updates", "messages", "custom", "values"],
+                                                   checkpoint_during=False):
+                if mode == "messages":
+                    message, metadata = chunk
+                    node = metadata.get("langgraph_node")
+                    if node in STREAMING_NODES and message.content:
+                        yield {"event": "token", "data": {"node": node, "content": message.content}}
+                elif mode == "custom":
+                    # LLM 응답 캐시 적중은 모델 토큰 대신 전체 응답을 한 덩어리로 보냅니다.
+                    if chunk.get("node") in STREAMING_NODES and chunk.get("content"):
+                        yield {"event": "token", "data": {"node": chunk["node"], "content": chunk["content"]}}
+                elif mode == "updates":
+                    # 재질문 후 '답변 대기'에서 멈추면 노드가 아닌 `__interrupt__` 업데이트가 옵니다.
+                    for node in chunk:
+                        if node.startswith("__"):
+                            continue
+                        yield {"event": "node", "data": {"node": node}}
+                else:
+                    final_state = chunk
+    except BaseException:
+        # 클라이언트 연결이 끊겨 중단된 경우(GeneratorExit/CancelledError)도 오류로 기록합니다.
+        trace.finish("error")
+        raise
+
+    answer = extract_agent_response(final_state)
+    await _aend_session(session_id, answer)
+    trace.finish(_outcome(answer))
+    completed = "■" in answer
+    data = {"answer": answer, "completed": completed, "session_id": None if completed else session_id}
+    if settings.TRACE_IN_RESPONSE:
+        data["trace"] = trace.summary()
+    yield {"event": "final", "data": data}
@@ -0,0 +1,176 @@
+"""
+민원 일괄 처리 서비스
+밤사이 쌓인 민원(JSONL/CSV)을 동시 실행 수를 제한하여 처리하고, 결과를 한 건씩 JSONL로 기록합니다.
+
+- 결과는 처리되는 즉시 파일에 추가되므로 중간에 중단되어도 처리한 결과는 남고,
+  다시 실행하면 이미 처리한 ID는 건너뜁니다. (오류가 난 건은 다시 처리합니다)
+- '질문 분석'은 처리할 민원 전체를 로컬 분류기로 한 번에 분류하여 결과를 상태에 담아 그래프를 실행합니다.
+  분류기가 확신하지 못한 질문만 그래프 안에서 LLM으로 분석합니다.
+
+사용법:
+    python -m app.services.batch_service complaints.jsonl --output results.jsonl
+    python -m app.services.batch_service complaints.csv --output results.jsonl --concurrency 16
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.ai.agent import get_compiled_agent
+from app.ai.question_classifier import get_question_classifier
+from app.config import settings
+from app.services.agent_service import create_initial_state, extract_agent_response
+
+
+@dataclass
+class BatchReport:
+    total: int = 0
+    skipped: int = 0      # 이전 실행에서 이미 처리한 건
+    succeeded: int = 0
+    failed: int = 0
+    local_assessments: int = 0  # 로컬 분류기로 묶어서 미리 분석한 건
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        processed = self.succeeded + self.failed
+        return processed / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (f"전체 {self.total}건 | 처리 {self.succeeded}건, 실패 {self.failed}건, 건너뜀 {self.skipped}건 | "
+                f"{self.elapsed:.1f}s, {self.throughput:.2f}건/s | "
+                f"로컬 분류기 사전 분석 {self.local_assessments}건")
+
+
+def read_complaints(path: str, id_field: str = "id", question_field: str = "question") -> List[Dict[str, str]]:
+    """
+    JSONL 또는 CSV(확장자로 구분)에서 (id, question) 목록을 읽습니다.
+    ID 필드가 없으면 행 번호를 ID로 사용합니다. (입력 파일이 바뀌지 않아야 재실행 시 건너뛰기가 맞습니다)
+    """
+    if path.lower().endswith(".csv"):
+        # 엑셀에서 저장한 CSV는 BOM이 붙어 있는 경우가 많습니다.
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, "r", encoding="utf8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    complaints = []
+    for number, row in enumerate(rows, 1):
+        question = (row.get(question_field) or "").strip()
+        if not question:
+            print(f"⚠️ {number}번째 행에 '{question_field}' 내용이 없어 건너뜁니다.")
+            continue
+        complaints.append({"id": str(row.get(id_field) or number), "question": question})
+    return complaints
+
+
+def load_completed_ids(output_path: str) -> set:
+    """결과 파일에서 정상 처리된 ID를 읽습니다. 중단으로 잘린 마지막 줄은 무시합니다."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" not in record:
+                completed.add(record["id"])
+    return completed
+
+
+def preassess_questions(questions: List[str], report: BatchReport) -> List[str]:
+    """
+    로컬 분류기로 여러 민원의 '질문 분석'을 한 번에 실행합니다.
+    분류기가 확신하지 못한 질문은 빈 문자열로 두어, 그래프의 '질문 분석' 노드가 LLM으로 분석하게 합니다.
+    (채팅 API는 여러 질문을 한 호출로 묶을 수 없으므로, LLM 분석은 동시 실행으로 처리량을 확보합니다)
+    """
+    classifier = get_question_classifier()
+    if classifier is None:
+        return [""] * len(questions)
+    decisions = classifier.decide_many(questions)
+    report.local_assessments += sum(decision is not None for decision in decisions)
+    return [decision or "" for decision in decisions]
+
+
+def _open_output(output_path: str):
+    """결과 파일을 추가 모드로 엽니다. 이전 실행이 줄 중간에 중단되었으면 줄을 바꿔 이어 씁니다."""
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    needs_newline = False
+    if os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    output = open(output_path, "a", encoding="utf8")
+    if needs_newline:
+        output.write("\n")
+    return output
+
+
+def run_batch(input_path: str, output_path: str, concurrency: Optional[int] = None,
+              group_assessment: bool = True, id_field: str = "id", question_field: str = "question") -> BatchReport:
+    """입력 파일의 민원을 일괄 처리하여 결과를 `output_path`(JSONL)에 추가합니다."""
+    concurrency = concurrency or settings.BATCH_CONCURRENCY
+    complaints = read_complaints(input_path, id_field, question_field)
+    completed = load_completed_ids(output_path)
+    pending = [complaint for complaint in complaints if complaint["id"] not in completed]
+    report = BatchReport(total=len(complaints), skipped=len(complaints) - len(pending))
+    print(f"민원 {report.total}건 중 {len(pending)}건을 처리합니다. (이미 처리 {report.skipped}건, 동시 실행 {concurrency})")
+
+    agent = get_compiled_agent()
+    start = time.perf_counter()
+    states = [create_initial_state(complaint["question"]) for complaint in pending]
+    if group_assessment:
+        assessments = preassess_questions([complaint["question"] for complaint in pending], report)
+        for state, assessment in zip(states, assessments):
+            state["assessment_result"] = assessment
+
+    with _open_output(output_path) as output:
+        # 끝나는 순서대로 바로 기록하여, 느린 민원 하나가 다른 결과의 기록을 막지 않게 합니다.
+        for i, result in agent.batch_as_completed(
+            states, config={"max_concurrency": concurrency}, return_exceptions=True
+        ):
+            record = {"id": pending[i]["id"], "question": pending[i]["question"]}
+            if isinstance(result, Exception):
+                record["error"] = f"{type(result).__name__}: {result}"
+                report.failed += 1
+            else:
+                answer = extract_agent_response(result)
+                record.update(answer=answer, completed="■" in answer)
+                report.succeeded += 1
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+
+            processed = report.succeeded + report.failed
+            if processed % settings.BATCH_PROGRESS_EVERY == 0:
+                report.elapsed = time.perf_counter() - start
+                print(f"📦 {processed}/{len(pending)}건 처리 ({report.throughput:.2f}건/s)")
+
+    report.elapsed = time.perf_counter() - start
+    print(f"✅ 일괄 처리 완료: {report.summary()}")
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="민원을 일괄 처리합니다.")
+    parser.add_argument("input", help="민원 파일 (JSONL 또는 CSV)")
+    parser.add_argument("--output", required=True, help="결과 파일 (JSONL, 이어 쓰기)")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_CONCURRENCY)
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--question-field", default="question")
+    parser.add_argument("--no-group-assessment", action="store_true", help="로컬 분류기로 질문 분석을 묶어서 미리 실행하지 않습니다.")
+    args = parser.parse_args()
+
+    run_batch(args.input, args.output, args.concurrency, not args.no_group_assessment,
+              args.id_field, args.question_field)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+시맨틱 답변 캐시 효과 측정 벤치마크
+
+같은 유형의 민원이 반복해서 들어오는 상황을 가짜 LLM/임베딩으로 재현하여,
+캐시 사용 전후의 민원당 평균 LLM 호출 수와 캐시 적중률을 비교합니다.
+
+실행: python -m benchmarks.bench_answer_cache [민원 수]
+"""
+import sys
+
+from benchmarks.fakes import FakeChatModel, install_fake_vector_store
+
+from app.ai.agent import build_agent_workflow
+from app.rag import chain
+from app.rag.answer_cache import get_answer_cache
+from app.services.agent_service import create_initial_state
+
+QUESTIONS = [
+    "7월 20일 오후 3시 강남구 테헤란로 123 앞에 불법 주차된 차량을 신고합니다.",
+    "매일 밤 11시 이후 윗집에서 발생하는 층간 소음 때문에 잠을 못 잡니다.",
+    "서초구 반포대로 공사장에서 새벽 6시부터 공사를 시작합니다.",
+]
+
+
+def _run(answer_cache: bool, total: int) -> dict:
+    model = FakeChatModel()
+    chain.set_llm(model)
+    agent = build_agent_workflow(answer_cache=answer_cache)
+    for i in range(total):
+        agent.invoke(create_initial_state(QUESTIONS[i % len(QUESTIONS)]))
+    return {"llm_calls_per_complaint": len(model.calls) / total}
+
+
+def main(total: int = 30) -> None:
+    install_fake_vector_store()
+    baseline = _run(False, total)
+    # 가짜 정제 결과는 항상 같으므로, 실제로는 유사 민원이 반복되는 상황에 해당합니다.
+    cached = _run(True, total)
+    stats = get_answer_cache().stats()
+
+    print(f"\n민원 수: {total}")
+    print(f"캐시 미사용: 민원당 LLM 호출 {baseline['llm_calls_per_complaint']:.2f}회")
+    print(f"캐시 사용:   민원당 LLM 호출 {cached['llm_calls_per_complaint']:.2f}회 "
+          f"(적중 {stats['hits']}, 미스 {stats['misses']}, 적중률 {stats['hit_rate']:.0%})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30)
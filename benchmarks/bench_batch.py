@@ -0,0 +1,61 @@
+"""
+일괄 처리 처리량 벤치마크
+
+가짜 LLM(호출당 지연 시간 지정)으로 민원 파일을 만들어 동시 실행 수별 처리량을 비교하고,
+중단 후 재실행 시 이미 처리한 ID를 건너뛰는지 확인합니다.
+
+실행: python -m benchmarks.bench_batch [민원 수] [LLM 지연(초)]
+"""
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.fakes import FakeChatModel, install_fake_vector_store
+
+from app.rag import chain
+from app.services.batch_service import run_batch
+
+QUESTIONS = [
+    "7월 20일 오후 3시 강남구 테헤란로 123 앞에 불법 주차된 차량을 신고합니다.",
+    "매일 밤 11시 이후 윗집에서 발생하는 층간 소음 때문에 잠을 못 잡니다.",
+    "서초구 반포대로 공사장에서 새벽 6시부터 공사를 시작합니다.",
+]
+
+
+def main(total: int = 48, latency: float = 0.02) -> None:
+    install_fake_vector_store()
+    chain.set_llm(FakeChatModel(latency=latency))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "complaints.jsonl")
+        with open(input_path, "w", encoding="utf8") as f:
+            for i in range(total):
+                f.write(json.dumps({"id": f"c{i}", "question": QUESTIONS[i % len(QUESTIONS)]}, ensure_ascii=False) + "\n")
+
+        results = {}
+        for concurrency, group in ((1, False), (8, False), (8, True), (16, True)):
+            output_path = os.path.join(tmp_dir, f"results_{concurrency}_{group}.jsonl")
+            results[(concurrency, group)] = run_batch(input_path, output_path, concurrency, group)
+
+        # 결과 파일의 절반만 남기고(중단 상황) 다시 실행하면 나머지만 처리해야 합니다.
+        output_path = os.path.join(tmp_dir, "results_8_True.jsonl")
+        with open(output_path, "r", encoding="utf8") as f:
+            lines = f.readlines()
+        with open(output_path, "w", encoding="utf8") as f:
+            f.writelines(lines[:total // 2])
+            f.write(lines[total // 2][:10])  # 기록 도중 중단되어 잘린 줄
+        resumed = run_batch(input_path, output_path, 8)
+        with open(output_path, "r", encoding="utf8") as f:
+            ids = [json.loads(line)["id"] for line in f if line.strip().endswith("}")]
+
+    print(f"\n민원 {total}건, LLM 호출당 지연 {latency * 1000:.0f}ms")
+    print(f"{'동시 실행':>8} {'질문 분석 묶음':>12} {'소요(s)':>8} {'처리량(건/s)':>12}")
+    for (concurrency, group), report in results.items():
+        print(f"{concurrency:>8} {str(group):>12} {report.elapsed:>8.2f} {report.throughput:>12.2f}")
+    print(f"재실행: 건너뜀 {resumed.skipped}건, 처리 {resumed.succeeded}건, "
+          f"결과 ID 중복 {len(ids) - len(set(ids))}건, 누락 {total - len(set(ids))}건")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 48, float(sys.argv[2]) if len(sys.argv) > 2 else 0.02)
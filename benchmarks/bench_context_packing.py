@@ -0,0 +1,48 @@
+"""
+컨텍스트 패킹 효과 측정 벤치마크
+
+저장된 Vector Store의 청크에서 예시 민원으로 BM25 검색(임베딩 API 없이)을 하고,
+검색 결과를 그대로 이어 붙였을 때와 패킹했을 때의 프롬프트 토큰 수를 비교합니다.
+품질 평가/답변 생성 두 LLM 호출이 같은 컨텍스트를 받으므로 요청당 절약량은 표의 두 배입니다.
+
+실행: python -m benchmarks.bench_context_packing [검색 문서 수]
+"""
+import sys
+
+from app.config import settings
+from app.rag.docstore import read_docstore, recorded_format
+from app.rag.context_packing import pack_documents
+from app.rag.ingest import read_manifest
+from app.rag.lexical import LexicalIndex
+
+QUESTIONS = [
+    "아파트 앞 소방시설 주변에 불법 주차된 차량을 신고합니다. 도로교통법상 주차금지 장소 아닌가요?",
+    "윗집 층간소음이 심해서 관리사무소에 얘기했는데 해결이 안 됩니다. 공동주택관리법에 따른 조치가 궁금합니다.",
+    "민원을 접수했는데 처리 기간이 지나도 답이 없습니다. 처리 기간 연장은 어떻게 되나요?",
+    "식당에서 유통기한이 지난 식재료를 사용하는 것 같습니다. 식품위생법 위반으로 신고하고 싶습니다.",
+    "공사장 소음이 새벽부터 계속됩니다. 생활소음 규제 기준을 알려주세요.",
+    "동네 가게가 CCTV로 손님을 촬영하고 있는데 개인정보 보호법상 문제가 없나요?",
+]
+
+
+def main(k: int = 5) -> None:
+    path = settings.VECTOR_STORE_PATH
+    docstore, index_to_docstore_id = read_docstore(path, recorded_format(read_manifest(path)))
+    ids = [index_to_docstore_id[i] for i in range(len(index_to_docstore_id))]
+    lexical_index = LexicalIndex.build(ids, [docstore.search(doc_id).page_content for doc_id in ids])
+
+    print(f"청크 {len(ids)}개, 검색 문서 {k}개, 토큰 예산 {settings.CONTEXT_TOKEN_BUDGET}")
+    print(f"{'이전':>6} {'이후':>6} {'절약':>6}  {'병합':>4} {'중복':>4} {'초과':>4}  질문")
+    before = after = 0
+    for question in QUESTIONS:
+        documents = [docstore.search(doc_id) for doc_id, _ in lexical_index.search(question, k)]
+        packed = pack_documents(documents)
+        before += packed.tokens_before
+        after += packed.tokens_after
+        print(f"{packed.tokens_before:>6} {packed.tokens_after:>6} {packed.tokens_saved:>6}  "
+              f"{packed.merged:>4} {packed.duplicates:>4} {packed.truncated:>4}  {question[:30]}")
+    print(f"\n합계: {before} -> {after} 토큰 ({(before - after) / before:.1%} 절약)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
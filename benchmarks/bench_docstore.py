@@ -0,0 +1,78 @@
+"""
+docstore 형식(pickle vs SQLite) 비교 벤치마크
+
+저장된 `index.pkl`의 청크로 두 형식의 docstore를 만든 뒤, 각각 새 프로세스에서
+- 로드 시간 (콜드 스타트)
+- 로드 후 늘어난 상주 메모리
+- 검색 1건(청크 5개) 조회 지연
+을 측정합니다. 임베딩/FAISS 인덱스 없이 docstore만 비교합니다.
+
+실행: python -m benchmarks.bench_docstore [Vector Store 경로]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.stats import percentile
+
+from app.config import settings
+from app.rag.docstore import PICKLE_DOCSTORE_FILE, SQLITE_DOCSTORE_FILE, read_docstore, write_sqlite_docstore
+
+
+def _rss_anon_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _measure(directory: str, docstore_format: str, lookups: int) -> dict:
+    before = _rss_anon_mb()
+    start = time.perf_counter()
+    docstore, index_to_docstore_id = read_docstore(directory, docstore_format)
+    load_ms = (time.perf_counter() - start) * 1000
+    rss_mb = _rss_anon_mb() - before
+
+    ids = list(index_to_docstore_id.values())
+    rng = random.Random(0)
+    timings = []
+    for _ in range(lookups):
+        batch = rng.sample(ids, min(5, len(ids)))
+        start = time.perf_counter()
+        for doc_id in batch:
+            docstore.search(doc_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "load_ms": load_ms,
+        "rss_mb": rss_mb,
+        "lookup_p50_ms": percentile(timings, 0.50),
+        "lookup_p99_ms": percentile(timings, 0.99),
+    }
+
+
+def main(path: str = settings.VECTOR_STORE_PATH, lookups: int = 1000) -> None:
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.symlink(os.path.abspath(os.path.join(path, PICKLE_DOCSTORE_FILE)), os.path.join(tmp_dir, PICKLE_DOCSTORE_FILE))
+        docstore, index_to_docstore_id = read_docstore(tmp_dir, "pickle")
+        write_sqlite_docstore(os.path.join(tmp_dir, SQLITE_DOCSTORE_FILE), docstore, index_to_docstore_id)
+        sizes = {
+            "pickle": os.path.getsize(os.path.join(path, PICKLE_DOCSTORE_FILE)) / 2 ** 20,
+            "sqlite": os.path.getsize(os.path.join(tmp_dir, SQLITE_DOCSTORE_FILE)) / 2 ** 20,
+        }
+        print(f"청크 {len(index_to_docstore_id)}개")
+        print(f"{'형식':<7} {'파일(MB)':>8} {'로드(ms)':>9} {'RSS(MB)':>8} {'조회 p50(ms)':>12} {'조회 p99(ms)':>12}")
+        for docstore_format in ("pickle", "sqlite"):
+            # 프로세스마다 한 형식만 로드하여 콜드 스타트와 메모리를 따로 측정합니다.
+            with context.Pool(1) as pool:
+                result = pool.apply(_measure, (tmp_dir, docstore_format, lookups))
+            print(f"{docstore_format:<7} {sizes[docstore_format]:>8.2f} {result['load_ms']:>9.1f} "
+                  f"{result['rss_mb']:>8.1f} {result['lookup_p50_ms']:>12.3f} {result['lookup_p99_ms']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,96 @@
+"""
+임베딩 백엔드별 질의 지연/인덱스 빌드 처리량 벤치마크
+
+- remote: 원격 임베딩 API를 흉내 낸 가짜 임베딩 (호출당 지연 시간 지정, 1536차원)
+- local: 프로세스 안에서 계산하는 문자 n-gram 해싱 임베딩 (`EMBEDDING_BACKEND=local`)
+
+측정 항목
+- 질의 지연: 질의 임베딩 + FAISS 검색(k=5) p50/p95
+- 빌드 처리량: 가짜 법령 PDF -> 파싱/분할/임베딩/저장 (`rebuild_vector_store`, 청크/초)
+- local 백엔드 검색 적중: 주제별 질의의 1순위 문서가 기대한 법령인지 (가짜 법령 6건)
+
+실행: python -m benchmarks.bench_embeddings [질의 수] [원격 호출당 지연(초)] [PDF 수]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from langchain_community.vectorstores import FAISS
+
+from benchmarks.fakes import FAKE_LAW_TEXTS, FakeEmbeddings, write_fake_pdf
+from benchmarks.stats import percentile
+
+from app.rag.embeddings import LOCAL_EMBEDDING_MODEL, EmbeddingSpec, HashingEmbeddings
+from app.rag.ingest import rebuild_vector_store
+
+REMOTE = EmbeddingSpec("fake", "remote-api", 1536)
+LOCAL = EmbeddingSpec("local", LOCAL_EMBEDDING_MODEL, 1024)
+ARTICLE = ("Article {n} (Parking restrictions) No driver shall stop or park a vehicle at an intersection, "
+           "a crosswalk, a railroad crossing or on the sidewalk of a road where the sidewalk and the roadway "
+           "are separated. The head of the local government may designate additional restricted zones. ")
+# (질의, 기대하는 1순위 문서의 FAKE_LAW_TEXTS 인덱스)
+TOPIC_QUERIES = [
+    ("횡단보도 앞에 차를 세워 둔 불법 주차 신고", 0),
+    ("터널 안에 주차된 차량이 있어요", 1),
+    ("밤마다 윗집 생활소음이 너무 심합니다", 2),
+    ("민원 처리기간이 얼마나 걸리나요", 3),
+    ("허가 없이 건축물을 대수선하고 있습니다", 4),
+    ("생활폐기물을 아무 데나 버리는 사람이 있어요", 5),
+]
+
+
+def bench_query(embeddings, queries: int) -> tuple:
+    """질의 임베딩 + 검색 지연(ms)의 (p50, p95)"""
+    texts = [text * 8 for text in FAKE_LAW_TEXTS] * 50
+    vector_store = FAISS.from_embeddings(list(zip(texts, embeddings.embed_documents(texts))), embeddings)
+    samples = []
+    for i in range(queries):
+        start = time.perf_counter()
+        vector_store.similarity_search(f"{TOPIC_QUERIES[i % len(TOPIC_QUERIES)][0]} ({i})", k=5)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentile(samples, 0.50), percentile(samples, 0.95)
+
+
+def bench_build(embeddings, spec: EmbeddingSpec, laws_dir: str, store_dir: str) -> tuple:
+    """(청크 수, 소요 시간, 청크/초)"""
+    start = time.perf_counter()
+    vector_store = rebuild_vector_store(embeddings, laws_dir, store_dir, spec)
+    seconds = time.perf_counter() - start
+    return vector_store.index.ntotal, seconds, vector_store.index.ntotal / seconds
+
+
+def topic_hits(embeddings) -> int:
+    vector_store = FAISS.from_texts(FAKE_LAW_TEXTS, embeddings, metadatas=[{"i": i} for i in range(len(FAKE_LAW_TEXTS))])
+    return sum(vector_store.similarity_search(query, k=1)[0].metadata["i"] == expected
+               for query, expected in TOPIC_QUERIES)
+
+
+def main(queries: int = 50, remote_latency: float = 0.15, files: int = 8) -> None:
+    backends = {
+        "remote": (REMOTE, FakeEmbeddings(size=REMOTE.dimension, latency=remote_latency)),
+        "local": (LOCAL, HashingEmbeddings(dimension=LOCAL.dimension)),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        laws_dir = os.path.join(tmp_dir, "laws")
+        os.makedirs(laws_dir)
+        for i in range(files):
+            pages = ["".join(ARTICLE.format(n=i * 1000 + p * 10 + j) for j in range(12)) for p in range(10)]
+            write_fake_pdf(os.path.join(laws_dir, f"law_{i}.pdf"), pages)
+        for name, (spec, embeddings) in backends.items():
+            query = bench_query(embeddings, queries)
+            build = bench_build(embeddings, spec, laws_dir, os.path.join(tmp_dir, name))
+            results[name] = (query, build)
+
+    print(f"\n질의 {queries}회, 원격 호출당 지연 {remote_latency * 1000:.0f}ms, PDF {files}개")
+    print(f"{'백엔드':>7} {'질의 p50(ms)':>12} {'질의 p95(ms)':>12} {'청크':>6} {'빌드(s)':>8} {'청크/s':>9}")
+    for name, ((p50, p95), (chunks, seconds, throughput)) in results.items():
+        print(f"{name:>7} {p50:>12.2f} {p95:>12.2f} {chunks:>6} {seconds:>8.2f} {throughput:>9.0f}")
+    print(f"local 백엔드 주제 질의 1순위 적중: {topic_hits(backends['local'][1])}/{len(TOPIC_QUERIES)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 0.15,
+         int(sys.argv[3]) if len(sys.argv) > 3 else 8)
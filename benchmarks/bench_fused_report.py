@@ -0,0 +1,62 @@
+"""
+통합 보고서(구조화된 출력 1회) 모드 지연 비교 벤치마크
+
+가짜 LLM(호출당 첫 토큰 지연 + 출력 토큰당 지연)으로 정상 경로를 다음 세 방식으로 실행하여
+전체 지연과 LLM 호출 수, 출력 길이를 비교합니다.
+- sequential: 답변 생성 -> 민원 내용 정제 -> 최종 보고서 생성 (기본)
+- parallel: 답변 생성 / 민원 내용 정제 병렬 -> 최종 보고서 생성
+- fused: 통합 보고서 생성 1회 (final_report 채움)
+
+실행: python -m benchmarks.bench_fused_report [반복 수] [호출당 지연(초)] [출력 토큰당 지연(초)]
+"""
+import sys
+import time
+
+from benchmarks.fakes import FakeChatModel, install_fake_vector_store
+from benchmarks.stats import percentile
+
+from app.ai.agent import build_agent_workflow
+from app.rag import chain
+from app.services.agent_service import create_initial_state
+
+QUESTION = "7월 20일 오후 3시 강남구 테헤란로 123 앞에 불법 주차된 차량을 신고합니다."
+MODES = {
+    # 모드 이름: (병렬 분기, 통합 보고서)
+    "sequential": (False, False),
+    "parallel": (True, False),
+    "fused": (False, True),
+}
+
+
+def main(iterations: int = 5, latency: float = 0.3, token_latency: float = 0.01) -> None:
+    install_fake_vector_store()
+
+    results = {}
+    for name, (parallel, fused) in MODES.items():
+        model = FakeChatModel(latency=latency, token_latency=token_latency)
+        chain.set_llm(model)
+        agent = build_agent_workflow(parallel_answer_and_sanitize=parallel, answer_cache=False, fused_report=fused)
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            final_state = agent.invoke(create_initial_state(QUESTION))
+            samples.append(time.perf_counter() - start)
+        assert "■" in final_state["answer"], final_state["answer"]
+        results[name] = {
+            "p50": percentile(samples, 0.50),
+            "calls": len(model.calls) / iterations,
+            "final_report": bool(final_state["final_report"]),
+        }
+
+    print(f"\n반복 {iterations}회, 호출당 지연 {latency * 1000:.0f}ms, 출력 토큰당 지연 {token_latency * 1000:.1f}ms")
+    print(f"{'모드':>10} {'p50(s)':>8} {'LLM 호출':>8} {'final_report':>12}")
+    for name, result in results.items():
+        print(f"{name:>10} {result['p50']:>8.3f} {result['calls']:>8.0f} {str(result['final_report']):>12}")
+    saved = results["sequential"]["p50"] - results["fused"]["p50"]
+    print(f"통합 모드 절감: {saved:.3f}s ({saved / results['sequential']['p50']:.0%})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 0.3,
+         float(sys.argv[3]) if len(sys.argv) > 3 else 0.01)
@@ -0,0 +1,77 @@
+"""
+요청당 그래프 고정 비용 마이크로 벤치마크
+
+매 요청마다 `build_agent_workflow()`로 그래프를 다시 컴파일하고 노드 체인을 새로 구성하던 방식(before)과
+캐시된 컴파일 에이전트/미리 구성된 체인을 재사용하는 방식(after)을 지연 0의 가짜 LLM으로 비교합니다.
+가장 가벼운 재질문 경로(assess_question -> request_clarification)를 사용합니다.
+
+실행: python -m benchmarks.bench_graph_overhead [반복 횟수]
+"""
+import statistics
+import sys
+import time
+
+from benchmarks.fakes import FakeChatModel
+from benchmarks.stats import percentile
+
+from langchain_core.output_parsers import StrOutputParser
+
+from app.ai.agent import build_agent_workflow, get_compiled_agent
+from app.rag import chain, prompts
+from app.services.agent_service import create_initial_state
+
+QUESTION = "주차 때문에 불편해요"
+NODE_PROMPTS = [
+    prompts.assess_question_prompt,
+    prompts.request_clarification_prompt,
+    prompts.assess_answer_quality_prompt,
+    prompts.generate_answer_prompt,
+    prompts.filter_and_sanitize_prompt,
+    prompts.create_final_report_prompt,
+]
+
+
+def _measure(fn, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(percentile(samples, 0.50), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+    }
+
+
+def main(iterations: int = 200) -> None:
+    chain.set_llm(FakeChatModel(question_assessment="insufficient"))
+
+    def before():
+        # 이전 방식: 요청마다 그래프 컴파일 + 실행한 노드의 체인 재구성
+        for prompt in NODE_PROMPTS[:2]:
+            prompt | chain.llm | StrOutputParser()
+        build_agent_workflow().invoke(create_initial_state(QUESTION))
+
+    def after():
+        get_compiled_agent().invoke(create_initial_state(QUESTION))
+
+    def chain_construction():
+        for prompt in NODE_PROMPTS:
+            prompt | chain.llm | StrOutputParser()
+
+    get_compiled_agent()
+    results = {
+        "before (compile per request)": _measure(before, iterations),
+        "after (cached agent)": _measure(after, iterations),
+        "chain construction x6": _measure(chain_construction, iterations),
+        "graph compile only": _measure(build_agent_workflow, iterations),
+    }
+
+    print(f"\n반복 횟수: {iterations}")
+    for name, stats in results.items():
+        print(f"{name:<32} mean={stats['mean_ms']:>8.3f}ms  p50={stats['p50_ms']:>8.3f}ms  p99={stats['p99_ms']:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
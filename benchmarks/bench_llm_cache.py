@@ -0,0 +1,63 @@
+"""
+LLM 응답 캐시 효과 측정 벤치마크
+
+같은 민원이 반복되거나 동시에 들어오는 상황을 가짜 LLM(호출당 지연 시간 지정)으로 재현하여,
+캐시 사용 전후의 LLM 호출 수와 소요 시간, 노드별 적중/병합 횟수를 비교합니다.
+
+실행: python -m benchmarks.bench_llm_cache [민원 수] [동시 실행 수]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.fakes import FakeChatModel, install_fake_vector_store
+
+from app.config import settings
+from app.rag import chain
+from app.rag.llm_cache import get_llm_cache
+from app.services.agent_service import arun_minone_agent
+
+QUESTIONS = [
+    "7월 20일 오후 3시 강남구 테헤란로 123 앞에 불법 주차된 차량을 신고합니다.",
+    "매일 밤 11시 이후 윗집에서 발생하는 층간 소음 때문에 잠을 못 잡니다.",
+    "서초구 반포대로 공사장에서 새벽 6시부터 공사를 시작합니다.",
+]
+
+
+async def _run(total: int, concurrency: int) -> dict:
+    model = FakeChatModel(latency=0.05)
+    chain.set_llm(model)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await arun_minone_agent(QUESTIONS[i % len(QUESTIONS)])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return {"llm_calls": len(model.calls), "elapsed": time.perf_counter() - start}
+
+
+def main(total: int = 30, concurrency: int = 6) -> None:
+    install_fake_vector_store()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings.LLM_CACHE_ENABLED = False
+        baseline = asyncio.run(_run(total, concurrency))
+
+        settings.LLM_CACHE_ENABLED = True
+        settings.LLM_CACHE_PATH = os.path.join(tmp_dir, "llm_responses.sqlite3")
+        cached = asyncio.run(_run(total, concurrency))
+        stats = get_llm_cache().stats()
+
+    print(f"\n민원 {total}건 (서로 다른 민원 {len(QUESTIONS)}종), 동시 실행 {concurrency}")
+    print(f"캐시 미사용: LLM 호출 {baseline['llm_calls']}회, {baseline['elapsed']:.2f}s")
+    print(f"캐시 사용:   LLM 호출 {cached['llm_calls']}회, {cached['elapsed']:.2f}s")
+    print(f"\n{'노드':<24} {'적중':>6} {'미스':>6} {'병합':>6} {'적중률':>7}")
+    for node, counts in stats.items():
+        print(f"{node:<24} {counts['hits']:>6} {counts['misses']:>6} {counts['coalesced']:>6} {counts['hit_rate']:>7.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30, int(sys.argv[2]) if len(sys.argv) > 2 else 6)
@@ -0,0 +1,117 @@
+"""
+로깅 모드별 요청 지연 벤치마크
+
+가짜 LLM(호출당 지연 시간 지정, 수 KB 길이의 답변 초안/보고서)으로 에이전트를 동시에 실행하면서
+로깅 모드(off | sync | queue)에 따른 요청 지연(p50/p95)과 처리량을 비교합니다.
+로그 파일은 임시 디렉토리에 쓰고, 콘솔 출력은 두 가지 출력 대상으로 측정합니다.
+- file: 임시 파일 (빠른 출력)
+- slow: 쓰기마다 지연이 있는 출력 (컨테이너 로그 수집기가 밀린 파이프, 원격 터미널 등)
+모드별 측정 순서에 따른 편향을 줄이기 위해 여러 라운드를 번갈아 실행하여 합칩니다.
+
+실행: python -m benchmarks.bench_logging [요청 수] [동시 실행 수] [LLM 지연(초)] [출력 쓰기 지연(초)]
+"""
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.fakes import FakeChatModel, install_fake_vector_store
+from benchmarks.stats import percentile
+
+from app.ai.agent import build_agent_workflow
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.rag import chain
+from app.services.agent_service import create_initial_state
+
+MODES = ("off", "sync", "queue")
+ROUNDS = 3
+QUESTION = "7월 20일 오후 3시 강남구 테헤란로 123 앞에 불법 주차된 차량을 신고합니다."
+
+
+class VerboseFakeChatModel(FakeChatModel):
+    """답변 초안/최종 보고서를 실제 응답 길이(수 KB)로 늘린 가짜 모델"""
+
+    def _respond(self, kind: str) -> str:
+        response = super()._respond(kind)
+        return response * 30 if kind in ("generate_answer", "create_final_report") else response
+
+
+class SlowStream(io.TextIOBase):
+    """쓰기마다 `delay`초 동안 막히는 출력 스트림"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay)
+        return len(text)
+
+
+async def run(agent, total: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await agent.ainvoke(create_initial_state(QUESTION))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+def measure(agent, mode: str, stream, total: int, concurrency: int):
+    """(요청별 지연 목록, 소요 시간)을 반환합니다. 큐에 남은 로그를 모두 기록할 때까지 포함합니다."""
+    with contextlib.redirect_stdout(stream):
+        setup_logging(mode)
+        start = time.perf_counter()
+        latencies = asyncio.run(run(agent, total, concurrency))
+        shutdown_logging()
+        return latencies, time.perf_counter() - start
+
+
+def main(total: int = 200, concurrency: int = 16, latency: float = 0.005, sink_delay: float = 0.0005) -> None:
+    install_fake_vector_store()
+    chain.set_llm(VerboseFakeChatModel(latency=latency))
+    agent = build_agent_workflow()
+    cwd = os.getcwd()
+
+    latencies = defaultdict(list)
+    elapsed = defaultdict(float)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            asyncio.run(run(agent, concurrency, concurrency))  # 워밍업
+            for _ in range(ROUNDS):
+                for sink in ("file", "slow"):
+                    for mode in MODES:
+                        if sink == "slow" and mode == "off":
+                            continue
+                        with open(os.path.join(tmp_dir, "console.log"), "w", encoding="utf8") as console:
+                            stream = console if sink == "file" else SlowStream(sink_delay)
+                            samples, seconds = measure(agent, mode, stream, total, concurrency)
+                        latencies[(sink, mode)].extend(samples)
+                        elapsed[(sink, mode)] += seconds
+        finally:
+            logging.disable(logging.NOTSET)
+            os.chdir(cwd)
+
+    print(f"\n요청 {total}건 x {ROUNDS}라운드, 동시 실행 {concurrency}, LLM 호출당 지연 {latency * 1000:.0f}ms, "
+          f"slow 출력 쓰기당 지연 {sink_delay * 1000:.1f}ms", file=sys.stderr)
+    print(f"{'출력':>5} {'모드':>6} {'p50(ms)':>9} {'p95(ms)':>9} {'처리량(건/s)':>12}", file=sys.stderr)
+    for (sink, mode), samples in latencies.items():
+        print(f"{sink:>5} {mode:>6} {percentile(samples, 0.50):>9.1f} {percentile(samples, 0.95):>9.1f} "
+              f"{total * ROUNDS / elapsed[(sink, mode)]:>12.1f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 16,
+         float(sys.argv[3]) if len(sys.argv) > 3 else 0.005,
+         float(sys.argv[4]) if len(sys.argv) > 4 else 0.0005)
@@ -0,0 +1,58 @@
+"""
+'답변 생성'과 '민원 내용 정제' 병렬 분기 검증 벤치마크
+
+고정 지연을 가진 가짜 LLM으로 정상 경로를 순차/병렬 모드에서 각각 실행하여
+- 두 노드의 LLM 호출 구간이 실제로 겹치는지
+- 병렬 모드의 전체 소요 시간이 LLM 1회 호출만큼 줄어드는지
+- 합류 후 최종 상태(assistant_answer, cleaned_question, answer)가 동일한지
+를 확인합니다.
+
+실행: python -m benchmarks.bench_parallel_branches [LLM 지연(초)]
+"""
+import sys
+import time
+
+from benchmarks.fakes import FakeChatModel, install_fake_vector_store
+
+from app.ai.agent import build_agent_workflow
+from app.rag import chain
+from app.services.agent_service import create_initial_state
+
+QUESTION = "7월 20일 오후 3시 강남구 테헤란로 123 앞에 불법 주차된 차량을 신고합니다."
+
+
+def _run(parallel: bool, latency: float):
+    model = FakeChatModel(latency=latency)
+    chain.set_llm(model)
+    agent = build_agent_workflow(parallel_answer_and_sanitize=parallel)
+    start = time.perf_counter()
+    final_state = agent.invoke(create_initial_state(QUESTION))
+    elapsed = time.perf_counter() - start
+    spans = {kind: (s, e) for kind, s, e in model.calls}
+    return final_state, elapsed, spans
+
+
+def main(latency: float = 0.2) -> None:
+    install_fake_vector_store()
+
+    sequential_state, sequential_time, _ = _run(False, latency)
+    parallel_state, parallel_time, spans = _run(True, latency)
+
+    answer_span = spans["generate_answer"]
+    sanitize_span = spans["filter_and_sanitize"]
+    overlap = min(answer_span[1], sanitize_span[1]) - max(answer_span[0], sanitize_span[0])
+
+    print(f"\nLLM 지연: {latency:.3f}s")
+    print(f"순차 모드 소요 시간: {sequential_time:.3f}s")
+    print(f"병렬 모드 소요 시간: {parallel_time:.3f}s (절감 {sequential_time - parallel_time:.3f}s)")
+    print(f"generate_answer / filter_and_sanitize 호출 구간 겹침: {max(overlap, 0.0):.3f}s")
+
+    for key in ("assistant_answer", "cleaned_question", "answer"):
+        assert sequential_state[key] == parallel_state[key], f"상태 병합 결과가 다릅니다: {key}"
+    assert overlap > latency * 0.5, "두 분기의 LLM 호출이 겹치지 않았습니다."
+    assert parallel_time < sequential_time - latency * 0.5, "병렬 모드에서 소요 시간이 줄지 않았습니다."
+    print("✅ 병렬 분기 검증 통과")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.2)
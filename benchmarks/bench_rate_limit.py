@@ -0,0 +1,167 @@
+"""
+과부하 시 속도 제한 스케줄러/수락 제어 벤치마크
+
+공급자 한도(초 단위로 축소한 RPM/TPM, 넘으면 429 + retry-after-ms)를 흉내 내는 가짜 채팅 모델로
+처리 용량보다 많은 민원을 일정한 간격으로 보내고 방식별로 다음을 비교합니다.
+- none: 조율 없음. OpenAI 클라이언트처럼 호출마다 429를 받으면 Retry-After만큼 기다렸다가 최대 2번 다시 시도
+- scheduler: 프로세스 전역 토큰 버킷 + 진행 중인 민원 우선 + 지터 백오프 (`RATE_LIMIT_ENABLED`)
+- admission: scheduler + 수락 제어 (동시 처리 민원 수를 처리 용량 x 목표 지연으로 제한하고,
+  대기열이 차거나 예상 대기가 길면 새 민원을 503으로 바로 거절)
+
+지표
+- goodput: SLO 안에 최종 보고서까지 완료된 민원 수 / 첫 전송부터 마지막 민원이 끝날 때까지의 시간(초)
+- 완료/실패(공급자 오류로 중단)/거절(503) 수, 공급자 429 수, 완료 민원의 p50/p95 지연
+
+실행: python -m benchmarks.bench_rate_limit [보낸 시간(초)] [공급자 초당 요청 한도]
+"""
+import asyncio
+import sys
+import threading
+import time
+from typing import Any, List, Optional
+
+import httpx
+import openai
+
+from benchmarks.fakes import FakeChatModel, install_fake_vector_store
+from benchmarks.stats import percentile
+
+from app.config import settings
+from app.core import rate_limit
+from app.core.rate_limit import AdmissionController, OverloadedError, RateLimitScheduler, TokenBucket
+from app.rag import chain
+from app.rag.context_packing import get_token_counter
+from app.services.agent_service import arun_minone_agent
+
+QUESTION = "7월 20일 오후 3시쯤 강남구 테헤란로 123 앞에 차량이 인도를 막고 불법 주차되어 있어요."
+MODEL = "fake-gpt"
+CALLS_PER_COMPLAINT = 5  # 질문 분석, 답변 생성, 품질 평가, 민원 정제, 최종 보고서
+SLO_SECONDS = 15.0
+
+
+class Upstream:
+    """공급자 한도: 분당 요청/토큰 수를 1초 분량까지 쌓이는 버킷으로 지키고, 넘는 호출은 거절합니다."""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm, burst_seconds=1.0)
+        self.tokens = TokenBucket(tpm, burst_seconds=1.0)
+        self.accepted = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def admit(self, tokens: int) -> Optional[float]:
+        """받으면 None, 거절하면 다시 시도할 때까지의 시간(초)"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                self.throttled += 1
+                return wait
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.accepted += 1
+            return None
+
+
+def rate_limit_error(retry_after: float) -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, request=request, headers={"retry-after-ms": str(int(retry_after * 1000))})
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+class UpstreamChatModel(FakeChatModel):
+    """공급자 한도를 넘으면 429를 내는 가짜 모델. `client_retries`는 OpenAI 클라이언트의 자체 재시도를 흉내 냅니다."""
+
+    model_name: str = MODEL
+    upstream: Any = None
+    client_retries: int = 0
+
+    def _tokens(self, messages) -> int:
+        counter = get_token_counter(settings.CONTEXT_TOKENIZER_ENCODING)
+        return sum(counter.count(str(m.content)) + 4 for m in messages) + settings.RATE_LIMIT_DEFAULT_COMPLETION_TOKENS
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = self._tokens(messages)
+        for attempt in range(self.client_retries + 1):
+            retry_after = self.upstream.admit(tokens)
+            if retry_after is None:
+                return await super()._agenerate(messages, stop, run_manager, **kwargs)
+            if attempt == self.client_retries:
+                raise rate_limit_error(retry_after)
+            # OpenAI 클라이언트는 60초 이하의 Retry-After를 지터 없이 그대로 기다립니다.
+            await asyncio.sleep(retry_after)
+
+
+async def run_load(mode: str, rate: float, duration: float, rps: float, latency: float) -> dict:
+    upstream = Upstream(rpm=rps * 60, tpm=rps * 60 * 2500)
+    settings.RATE_LIMIT_ENABLED = mode != "none"
+    scheduler = RateLimitScheduler({MODEL: {"rpm": rps * 60, "tpm": rps * 60 * 2500}}, headroom=0.9,
+                                   burst_seconds=1.0, concurrency=32, max_wait=10.0)
+    rate_limit._rate_limiter = scheduler
+    # 동시 처리 수: 처리 용량(건/s) x 목표 지연(약 3초) (리틀의 법칙)
+    capacity = rps * 0.9 / CALLS_PER_COMPLAINT
+    admission = AdmissionController(max(1, round(capacity * 3)), round(capacity * 5), 5.0, 2.0, scheduler) \
+        if mode == "admission" else None
+    chain.set_llm(UpstreamChatModel(latency=latency, upstream=upstream, client_retries=2 if mode == "none" else 0))
+
+    latencies: List[float] = []
+    outcome = {"completed": 0, "failed": 0, "rejected": 0}
+
+    async def complaint():
+        start = time.perf_counter()
+        try:
+            if admission is None:
+                answer = await arun_minone_agent(QUESTION)
+            else:
+                async with admission.admit():
+                    answer = await arun_minone_agent(QUESTION)
+        except OverloadedError:
+            outcome["rejected"] += 1
+            return
+        except openai.APIError:
+            outcome["failed"] += 1
+            return
+        if "■" in answer:
+            outcome["completed"] += 1
+            latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    total = int(rate * duration)
+    start = time.perf_counter()
+    for i in range(total):
+        await asyncio.sleep(max(0.0, start + i / rate - time.perf_counter()))
+        tasks.append(asyncio.create_task(complaint()))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    good = sum(latency <= SLO_SECONDS for latency in latencies)
+    return {
+        **outcome,
+        "sent": total,
+        "goodput": good / elapsed,
+        "throttled": upstream.throttled,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+    }
+
+
+def main(duration: float = 10.0, rps: float = 30.0, latency: float = 0.2) -> None:
+    install_fake_vector_store()
+    capacity = rps / CALLS_PER_COMPLAINT
+    results = {}
+    for load in (0.7, 1.5, 3.0):
+        for mode in ("none", "scheduler", "admission"):
+            results[(load, mode)] = asyncio.run(run_load(mode, capacity * load, duration, rps, latency))
+
+    print(f"\n공급자 한도 초당 {rps:.0f}요청 (민원 {capacity:.1f}건/s 분량), 호출 지연 {latency * 1000:.0f}ms, "
+          f"{duration:.0f}초 동안 전송, SLO {SLO_SECONDS:.0f}s")
+    print(f"{'부하':>5} {'방식':>10} {'보냄':>5} {'완료':>5} {'실패':>5} {'거절':>5} {'429':>6} "
+          f"{'goodput(/s)':>12} {'p50(s)':>7} {'p95(s)':>7}")
+    for (load, mode), r in results.items():
+        print(f"{load:>4.1f}x {mode:>10} {r['sent']:>5} {r['completed']:>5} {r['failed']:>5} {r['rejected']:>5} "
+              f"{r['throttled']:>6} {r['goodput']:>12.2f} {r['p50']:>7.2f} {r['p95']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 30.0)
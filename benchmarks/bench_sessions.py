@@ -0,0 +1,96 @@
+"""
+대화 세션(체크포인트) 효과 측정 벤치마크
+
+민원인이 재질문에 계속 답하는 긴 대화를 가짜 LLM으로 재현하여, 턴마다
+- '질문 분석' 프롬프트 길이(글자 수, 매 턴 처음 실행되는 LLM 호출)
+- 턴 지연 시간
+을 두 방식으로 비교합니다.
+
+- 이전 방식: 지금까지의 대화 전체(사용자/AI 발화)를 이어 붙여 매 턴 처음부터 실행
+- 세션 방식: `agent_service`와 같은 세션 수명 주기. 재질문 후 '답변 대기'에서 멈춘 실행을 SQLite 체크포인트에서
+  민원인의 답변만 받아 이어서 실행 (답변은 원래 민원에 덧붙이고 AI 재질문은 질문에 넣지 않음)
+
+이전 방식은 재질문 횟수가 매 턴 초기화되어 재질문이 끝없이 반복되고, 세션 방식은 최대 재질문 횟수에
+도달하면 최종 보고서를 만든 뒤 세션을 삭제하고 다음 입력을 새 민원으로 시작합니다. (보고서 턴은 LLM 호출이 많아 더 깁니다)
+
+실행: python -m benchmarks.bench_sessions [턴 수]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.fakes import FakeChatModel, install_fake_vector_store
+
+from app.ai.agent import build_agent_workflow
+from app.config import settings
+from app.rag import chain
+from app.services.agent_service import _end_session, _prepare_run, create_initial_state, extract_agent_response
+
+TURNS = [
+    "불법 주차 신고합니다.",
+    "강남구 테헤란로 123 앞입니다.",
+    "오늘 오후 3시부터 계속 서 있습니다.",
+    "흰색 승용차이고 인도를 막고 있습니다.",
+]
+
+
+class PromptSizeCounter(BaseCallbackHandler):
+    """'질문 분석' 노드에서 채팅 모델에 전달된 메시지의 글자 수를 합산합니다."""
+
+    def __init__(self):
+        self.chars = 0
+
+    def on_chat_model_start(self, serialized, messages, *, metadata=None, **kwargs):
+        if (metadata or {}).get("langgraph_node") == "assess_question":
+            self.chars += sum(len(message.content) for batch in messages for message in batch)
+
+
+def _turn(agent, run_input, config: dict) -> tuple:
+    counter = PromptSizeCounter()
+    start = time.perf_counter()
+    final_state = agent.invoke(run_input, {**config, "callbacks": [counter]}, checkpoint_during=False)
+    return final_state, counter.chars, (time.perf_counter() - start) * 1000
+
+
+def run_concatenated(turns: int) -> list:
+    agent = build_agent_workflow()
+    history, results = [], []
+    for i in range(turns):
+        history.append(f"사용자: {TURNS[i % len(TURNS)]}")
+        final_state, chars, ms = _turn(agent, create_initial_state("\n".join(history)), {})
+        history.append(f"AI: {extract_agent_response(final_state)}")
+        results.append((chars, ms))
+    return results
+
+
+def run_sessions(turns: int, directory: str) -> list:
+    # 프로세스 전역 체크포인트 저장소를 처음 만들기 전에 경로를 임시 폴더로 바꿉니다.
+    settings.SESSION_DB_PATH = os.path.join(directory, "sessions.sqlite3")
+    results = []
+    for i in range(turns):
+        start = time.perf_counter()
+        agent, run_input, config, _ = _prepare_run(TURNS[i % len(TURNS)], "bench")
+        final_state, chars, _ = _turn(agent, run_input, config)
+        _end_session("bench", extract_agent_response(final_state))
+        results.append((chars, (time.perf_counter() - start) * 1000))
+    return results
+
+
+def main(turns: int = 12) -> None:
+    install_fake_vector_store()
+    # 질문 분석이 항상 '불충분'이면 이전 방식은 매 턴 재질문을 반복하며 대화가 길어집니다.
+    chain.set_llm(FakeChatModel(question_assessment="insufficient"))
+    concatenated = run_concatenated(turns)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sessions = run_sessions(turns, tmp_dir)
+
+    print(f"\n{'턴':>3} {'이전 질문분석(자)':>16} {'이전(ms)':>9} {'세션 질문분석(자)':>16} {'세션(ms)':>9}")
+    for turn, ((old_chars, old_ms), (new_chars, new_ms)) in enumerate(zip(concatenated, sessions), 1):
+        print(f"{turn:>3} {old_chars:>16} {old_ms:>9.1f} {new_chars:>16} {new_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 12)
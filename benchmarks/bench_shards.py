@@ -0,0 +1,144 @@
+"""
+샤드 인덱스 검색 지연/재생성 시간 벤치마크
+
+1) 검색: 분야별(교통/소음/건축/환경) 합성 청크를 로컬 해싱 임베딩으로 색인하여 다음을 비교합니다.
+   - monolithic: 모든 청크를 하나의 Flat 인덱스로 검색 (기존 방식)
+   - routed: 키워드 라우팅으로 고른 샤드 + 공통 샤드만 동시에 검색
+   - all: 모든 샤드를 동시에 검색
+   질의별 지연 p50/p95와, monolithic 상위 5개 대비 일치율(recall@5)을 출력합니다.
+2) 재생성: 가짜 법령 PDF(분야별 폴더)로 전체 인덱스 재생성과 샤드 하나만 재생성하는 시간을 비교합니다.
+   (원격 임베딩 API를 흉내 내어 임베딩 배치마다 지연을 둡니다)
+
+실행: python -m benchmarks.bench_shards [분야별 청크 수] [분야별 PDF 수] [임베딩 배치당 지연(초)]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from langchain_community.vectorstores import FAISS
+
+from benchmarks.fakes import FakeEmbeddings, write_fake_pdf
+from benchmarks.stats import percentile
+
+from app.rag.embeddings import EmbeddingSpec, HashingEmbeddings
+from app.rag.ingest import rebuild_vector_store, sync_shards
+from app.rag.shards import ShardedVectorStore, ShardRouter
+
+DOMAINS = {
+    "traffic": ["주차", "정차", "차량", "도로", "횡단보도", "견인", "신호", "교차로", "보도", "운전자"],
+    "noise": ["소음", "진동", "층간", "확성기", "야간", "공사장", "생활소음", "측정", "기준", "데시벨"],
+    "construction": ["건축", "증축", "대수선", "철거", "허가", "신고", "용도변경", "건축물", "가설", "착공"],
+    "environment": ["폐기물", "투기", "분리수거", "악취", "매연", "오염", "배출", "소각", "수거", "과태료"],
+}
+GENERAL = ["민원", "처리기간", "접수", "통지", "이의신청", "행정기관", "보완", "이송", "공표", "민원인"]
+ROUTER = ShardRouter(
+    {name: {"patterns": [f"{name}/*"], "keywords": words[:6]} for name, words in DOMAINS.items()},
+    default="general", always=["general"], max_routed=2,
+)
+QUERY_TEMPLATES = ["{0} {1} 관련 민원입니다. {2}에 대해 조치해 주세요.", "{0} 문제로 {1} 신고합니다. {2} 확인 바랍니다."]
+
+
+def chunk_text(rng: random.Random, words: list, n: int) -> str:
+    return f"제{n}조 " + " ".join(rng.choice(words + GENERAL[:3]) for _ in range(40))
+
+
+def build_search_fixtures(per_domain: int, embeddings):
+    rng = random.Random(0)
+    corpus = {name: [chunk_text(rng, words, i) for i in range(per_domain)] for name, words in DOMAINS.items()}
+    corpus["general"] = [chunk_text(rng, GENERAL, i) for i in range(per_domain // 10)]
+
+    shards, all_pairs, all_metadatas = {}, [], []
+    for name, texts in corpus.items():
+        pairs = list(zip(texts, embeddings.embed_array(texts)))
+        metadatas = [{"shard": name, "i": i} for i in range(len(texts))]
+        shards[name] = FAISS.from_embeddings(pairs, embeddings, metadatas=metadatas)
+        all_pairs += pairs
+        all_metadatas += metadatas
+    monolithic = FAISS.from_embeddings(all_pairs, embeddings, metadatas=all_metadatas)
+    return monolithic, ShardedVectorStore(shards, embeddings, ROUTER)
+
+
+def bench_search(per_domain: int, queries: int) -> dict:
+    embeddings = HashingEmbeddings(dimension=256)
+    monolithic, sharded = build_search_fixtures(per_domain, embeddings)
+    rng = random.Random(1)
+    query_texts = []
+    for i in range(queries):
+        words = DOMAINS[list(DOMAINS)[i % len(DOMAINS)]]
+        query_texts.append(rng.choice(QUERY_TEMPLATES).format(*rng.sample(words[:6], 2), rng.choice(words)))
+
+    retrievers = {
+        "monolithic": monolithic.as_retriever(search_kwargs={"k": 5}),
+        "routed": sharded.as_retriever(search_kwargs={"k": 5}),
+        "all": sharded.as_retriever(search_kwargs={"k": 5}).model_copy(update={"routed": False}),
+    }
+    results = {}
+    expected = {}
+    for name, retriever in retrievers.items():
+        retriever.invoke(query_texts[0])  # 워밍업
+        samples, recalls = [], []
+        for query in query_texts:
+            start = time.perf_counter()
+            documents = retriever.invoke(query)
+            samples.append((time.perf_counter() - start) * 1000)
+            found = {(d.metadata["shard"], d.metadata["i"]) for d in documents}
+            if name == "monolithic":
+                expected[query] = found
+            recalls.append(len(found & expected[query]) / len(expected[query]))
+        results[name] = {
+            "p50": percentile(samples, 0.50),
+            "p95": percentile(samples, 0.95),
+            "recall": statistics.mean(recalls),
+        }
+    results["vectors"] = monolithic.index.ntotal
+    results["shards_per_query"] = statistics.mean(len(sharded.route(query)) for query in query_texts)
+    return results
+
+
+def bench_rebuild(directory: str, files_per_domain: int, embed_latency: float) -> dict:
+    laws_dir = os.path.join(directory, "laws")
+    for name in list(DOMAINS) + [""]:
+        os.makedirs(os.path.join(laws_dir, name), exist_ok=True)
+        for i in range(files_per_domain if name else max(1, files_per_domain // 4)):
+            article = f"{name or 'general'} law {i} article: rules for {name or 'civil petitions'} apply. " * 30
+            write_fake_pdf(os.path.join(laws_dir, name, f"{name or 'general'}_{i}.pdf"), [article] * 8)
+
+    spec = EmbeddingSpec("fake", "remote-api", 256)
+    embeddings = FakeEmbeddings(size=256, latency=embed_latency)
+    timings = {}
+    start = time.perf_counter()
+    rebuild_vector_store(embeddings, laws_dir, os.path.join(directory, "monolithic"), spec)
+    timings["monolithic"] = time.perf_counter() - start
+    start = time.perf_counter()
+    sync_shards(embeddings, laws_dir, os.path.join(directory, "shards"), spec, rebuild=True, router=ROUTER)
+    timings["all shards"] = time.perf_counter() - start
+    start = time.perf_counter()
+    sync_shards(embeddings, laws_dir, os.path.join(directory, "shards"), spec, names=["noise"], rebuild=True,
+                router=ROUTER)
+    timings["noise shard"] = time.perf_counter() - start
+    return timings
+
+
+def main(per_domain: int = 25000, files_per_domain: int = 8, embed_latency: float = 0.2) -> None:
+    search = bench_search(per_domain, queries=200)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rebuild = bench_rebuild(tmp_dir, files_per_domain, embed_latency)
+
+    print(f"\n검색: 벡터 {search['vectors']}개 (분야별 {per_domain}개 + 공통), 질의 200개, 질의당 평균 샤드 "
+          f"{search['shards_per_query']:.1f}개 (routed)")
+    print(f"{'방식':>10} {'p50(ms)':>8} {'p95(ms)':>8} {'recall@5':>9}")
+    for name in ("monolithic", "routed", "all"):
+        result = search[name]
+        print(f"{name:>10} {result['p50']:>8.2f} {result['p95']:>8.2f} {result['recall']:>9.2f}")
+    print(f"\n재생성: 분야별 PDF {files_per_domain}개, 임베딩 배치당 지연 {embed_latency * 1000:.0f}ms")
+    for name, seconds in rebuild.items():
+        print(f"{name:>12} {seconds:>6.2f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 25000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+         float(sys.argv[3]) if len(sys.argv) > 3 else 0.2)
@@ -0,0 +1,92 @@
+"""
+로컬 가짜 OpenAI 서버
+`/v1/chat/completions`(스트리밍 포함)와 `/v1/embeddings`를 고정 지연으로 흉내 냅니다.
+OPENAI_BASE_URL을 이 서버로 지정하면 네트워크/과금 없이 API 서버 전체를 부하 테스트할 수 있습니다.
+
+실행: python -m benchmarks.fake_openai_server --port 8100 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import uvicorn
+import xxhash
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain_core.messages import SystemMessage
+
+from benchmarks.fakes import FakeChatModel
+
+EMBEDDING_DIMENSION = 1536
+
+
+def create_app(latency: float = 0.2, embedding_latency: float = 0.02) -> FastAPI:
+    app = FastAPI()
+    responder = FakeChatModel()
+
+    def _completion_text(body: dict) -> str:
+        system = next((m.get("content", "") for m in body.get("messages", []) if m.get("role") == "system"), "")
+        return responder._respond(responder._kind([SystemMessage(content=system)]))
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        text = _completion_text(body)
+        created = int(time.time())
+        base = {"id": "chatcmpl-fake", "created": created, "model": body.get("model", "fake")}
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return JSONResponse({
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": len(text), "total_tokens": 100 + len(text)},
+            })
+
+        async def event_stream():
+            # 첫 토큰까지 지연의 절반, 나머지를 토큰 단위로 나눠 보냅니다.
+            await asyncio.sleep(latency / 2)
+            pieces = [text[i:i + 8] for i in range(0, len(text), 8)] or [""]
+            for piece in pieces:
+                chunk = {**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(latency / 2 / len(pieces))
+            done = {**base, "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            yield f"data: {json.dumps(done)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"]
+        if isinstance(inputs, (str, int)) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        await asyncio.sleep(embedding_latency)
+        data = []
+        for i, item in enumerate(inputs):
+            seed = xxhash.xxh64_intdigest(json.dumps(item, ensure_ascii=False))
+            vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIMENSION).astype(np.float32)
+            vector /= np.linalg.norm(vector)
+            data.append({"object": "embedding", "index": i, "embedding": vector.tolist()})
+        return JSONResponse({"object": "list", "data": data, "model": body.get("model", "fake"),
+                             "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)}})
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가짜 OpenAI 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.2, help="채팅 응답 지연(초)")
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="임베딩 응답 지연(초)")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency, args.embedding_latency), host=args.host, port=args.port, log_level="warning")
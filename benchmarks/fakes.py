@@ -0,0 +1,220 @@
+"""
+벤치마크용 가짜 모델
+네트워크 없이 에이전트 그래프를 실행할 수 있도록, 프롬프트의 역할 문구를 보고
+노드별로 결정적인 응답을 돌려주는 채팅 모델을 제공합니다.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+# app 모듈은 import 시점에 ChatOpenAI를 생성하므로 가짜 키를 미리 설정합니다.
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake-benchmark-key")
+# LLM 호출 수를 비교하는 벤치마크가 디스크에 남은 응답 캐시의 영향을 받지 않도록 기본으로 끕니다.
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+
+FAKE_LAW_TEXTS = [
+    "도로교통법 제32조(정차 및 주차의 금지) 모든 차의 운전자는 교차로·횡단보도·건널목이나 보도와 차도가 구분된 도로의 보도에 차를 정차하거나 주차해서는 아니 된다.",
+    "도로교통법 제33조(주차금지의 장소) 터널 안 및 다리 위에는 차를 주차해서는 아니 된다.",
+    "소음·진동관리법 제21조(생활소음과 진동의 규제) 특별자치시장·시장·군수·구청장은 주민의 조용하고 평온한 생활환경을 유지하기 위하여 생활소음·진동을 규제하여야 한다.",
+    "민원 처리에 관한 법률 제17조(법정민원의 처리기간 등) 행정기관의 장은 법정민원을 신속히 처리하기 위하여 처리기간을 정하여 공표하여야 한다.",
+    "건축법 제11조(건축허가) 건축물을 건축하거나 대수선하려는 자는 특별자치시장·특별자치도지사 또는 시장·군수·구청장의 허가를 받아야 한다.",
+    "폐기물관리법 제8조(폐기물의 투기 금지 등) 누구든지 특별자치시장, 특별자치도지사, 시장·군수·구청장이 정하는 방법 외의 방법으로 생활폐기물을 버려서는 아니 된다.",
+]
+
+FAKE_REPORT = (
+    "### 민원 검토 결과 안내 (민원인에게 표시될 부분) ###\n"
+    "■ 민원 내용: 가짜 민원\n"
+    "■ 검토 결과: 관련 법령에 따라 조치하겠습니다.\n"
+    "■ 관련 규정: 도로교통법 제32조\n\n"
+    "### 담당자 참고 정보 (내부 시스템용) ###\n"
+    "■ 민원 요약 (정제됨): 불법 주차 신고\n"
+)
+
+FAKE_FUSED_REPORT = json.dumps({
+    "citizen_answer": "도로교통법 제32조에 따라 해당 차량은 단속 대상이며, 관할 구청에서 확인 후 조치하겠습니다.",
+    "related_regulations": ["도로교통법 제32조"],
+    "cleaned_question": "지정된 장소에 장시간 불법 주차된 차량에 대한 단속 요청",
+    "staff_notes": "현장 확인 후 주정차 단속 부서로 이관 필요",
+}, ensure_ascii=False)
+
+
+class FakeChatModel(BaseChatModel):
+    """시스템 프롬프트의 역할 문구로 노드를 구분하여 고정된 응답을 반환하는 채팅 모델"""
+
+    latency: float = 0.0
+    # 출력 토큰당 추가 지연(초). 0이 아니면 호출 시간이 `latency + token_latency * 출력 토큰 수`가 됩니다.
+    # (출력 길이가 다른 호출 방식을 비교할 때 사용. 토큰 수는 UTF-8 바이트 수/3으로 근사합니다)
+    token_latency: float = 0.0
+    question_assessment: str = "sufficient"
+    quality_assessment: str = "sufficient"
+
+    # (응답 종류, 시작 시각, 종료 시각) 호출 기록. 노드 간 실행 구간이 겹치는지 확인할 때 사용합니다.
+    _calls: list = PrivateAttr(default_factory=list)
+
+    @property
+    def calls(self) -> list:
+        return self._calls
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @staticmethod
+    def _kind(messages: List[BaseMessage]) -> str:
+        system = messages[0].content if messages else ""
+        if "정보 확인 AI" in system:
+            return "assess_question"
+        if "민원안내 로봇" in system:
+            return "request_clarification"
+        if "법률 분석 AI" in system:
+            return "assess_answer_quality"
+        if "법률 전문가 AI" in system:
+            return "generate_answer"
+        if "민원 정제 AI" in system:
+            return "filter_and_sanitize"
+        if "민원 처리 통합 AI" in system:
+            return "create_fused_report"
+        return "create_final_report"
+
+    def _respond(self, kind: str) -> str:
+        return {
+            "assess_question": self.question_assessment,
+            "request_clarification": "정확한 확인을 위해, 불편을 겪으신 구체적인 장소를 알려주시겠어요?",
+            "assess_answer_quality": self.quality_assessment,
+            "generate_answer": "도로교통법 제32조에 따라 해당 차량은 단속 대상입니다.",
+            "filter_and_sanitize": "지정된 장소에 장시간 불법 주차된 차량에 대한 단속 요청",
+            "create_fused_report": FAKE_FUSED_REPORT,
+        }.get(kind, FAKE_REPORT)
+
+    def _delay(self, text: str) -> float:
+        return self.latency + self.token_latency * math.ceil(len(text.encode("utf-8")) / 3)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        kind = self._kind(messages)
+        text = self._respond(kind)
+        start = time.perf_counter()
+        if self._delay(text):
+            time.sleep(self._delay(text))
+        self._calls.append((kind, start, time.perf_counter()))
+        message = AIMessage(content=text)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        kind = self._kind(messages)
+        text = self._respond(kind)
+        start = time.perf_counter()
+        if self._delay(text):
+            await asyncio.sleep(self._delay(text))
+        self._calls.append((kind, start, time.perf_counter()))
+        message = AIMessage(content=text)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        kind = self._kind(messages)
+        start = time.perf_counter()
+        text = self._respond(kind)
+        pieces = _split_tokens(text)
+        for piece in pieces:
+            if self._delay(text):
+                time.sleep(self._delay(text) / len(pieces))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+        self._calls.append((kind, start, time.perf_counter()))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        kind = self._kind(messages)
+        start = time.perf_counter()
+        text = self._respond(kind)
+        pieces = _split_tokens(text)
+        for piece in pieces:
+            if self._delay(text):
+                await asyncio.sleep(self._delay(text) / len(pieces))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+        self._calls.append((kind, start, time.perf_counter()))
+
+
+def _split_tokens(text: str, size: int = 8) -> List[str]:
+    """스트리밍 흉내를 위해 응답을 일정 길이 조각으로 나눕니다."""
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+class FakeEmbeddings(DeterministicFakeEmbedding):
+    """텍스트마다 결정적인 벡터를 돌려주고, 호출(배치)마다 `latency`초를 기다리는 임베딩 모델"""
+
+    latency: float = 0.0
+    calls: int = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def write_fake_pdf(path: str, pages: List[str], line_length: int = 90) -> None:
+    """
+    텍스트 페이지로 최소한의 PDF 파일을 만듭니다. (인덱스 빌드 벤치마크용, 외부 라이브러리 없이)
+    기본 글꼴(Helvetica)을 사용하므로 ASCII 텍스트만 넣을 수 있습니다.
+    """
+    def escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for text in pages:
+        lines = [text[i:i + line_length] for i in range(0, len(text), line_length)]
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({escape(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        page_refs.append(len(objects) + 1)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{ref} 0 R' for ref in page_refs)}] /Count {len(page_refs)} >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(output)
+
+
+def install_fake_vector_store(embeddings=None):
+    """가짜 임베딩으로 만든 작은 FAISS 인덱스를 전역 레지스트리에 주입합니다."""
+    from langchain_community.vectorstores import FAISS
+    from app.rag.retriever import vector_store_registry
+
+    embeddings = embeddings or DeterministicFakeEmbedding(size=64)
+    metadatas = [{"source": f"data/laws/fake_{i}.pdf", "page": 0} for i in range(len(FAKE_LAW_TEXTS))]
+    vector_store = FAISS.from_texts(FAKE_LAW_TEXTS, embeddings, metadatas=metadatas)
+    vector_store_registry.use_vector_store(vector_store)
+    return vector_store
@@ -0,0 +1,123 @@
+"""
+비동기 API 서버 부하 테스트
+
+1. 가짜 OpenAI 서버를 띄우고, 그 서버의 임베딩으로 작은 임시 Vector Store를 만듭니다.
+2. OPENAI_BASE_URL/VECTOR_STORE_PATH를 가짜 서버/임시 인덱스로 지정하여 API 서버(app.main:app)를 띄웁니다.
+3. 동시성 단계별로 `POST /complaints`를 보내 처리량과 p50/p99 지연을 출력합니다.
+
+실행: python -m benchmarks.load_test --concurrency 1 8 32 64 --requests 64 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.fakes import FAKE_LAW_TEXTS
+from benchmarks.stats import percentile
+
+QUESTION = "7월 20일 오후 3시쯤 강남구 테헤란로 123 앞에 차량이 인도를 막고 불법 주차되어 있어요."
+
+
+def _wait_until_up(url: str, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"서버가 응답하지 않습니다: {url}")
+
+
+def _build_index(path: str, openai_base_url: str) -> None:
+    from langchain_community.vectorstores import FAISS
+    from langchain_openai import OpenAIEmbeddings
+
+    embeddings = OpenAIEmbeddings(model="text-embedding-3-small", base_url=openai_base_url,
+                                  api_key="sk-fake", check_embedding_ctx_length=False)
+    FAISS.from_texts(FAKE_LAW_TEXTS, embeddings).save_local(path)
+
+
+async def _run_level(base_url: str, concurrency: int, total: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/complaints", json={"question": QUESTION})
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": total / elapsed,
+        "p50_s": percentile(latencies, 0.50),
+        "p99_s": percentile(latencies, 0.99),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="민 ONE API 부하 테스트")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=64, help="동시성 단계별 요청 수")
+    parser.add_argument("--latency", type=float, default=0.2, help="가짜 LLM 응답 지연(초)")
+    parser.add_argument("--fake-port", type=int, default=8100)
+    parser.add_argument("--app-port", type=int, default=8001)
+    args = parser.parse_args()
+
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    processes = []
+    try:
+        processes.append(subprocess.Popen([
+            sys.executable, "-m", "benchmarks.fake_openai_server",
+            "--port", str(args.fake_port), "--latency", str(args.latency),
+        ]))
+        _wait_until_up(f"{fake_url}/docs")
+
+        index_dir = tempfile.mkdtemp(prefix="minone-loadtest-")
+        _build_index(index_dir, f"{fake_url}/v1")
+
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": "sk-fake",
+            "OPENAI_BASE_URL": f"{fake_url}/v1",
+            "VECTOR_STORE_PATH": index_dir,
+            "LOG_TO_CONSOLE": "false",
+        }
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.app_port), "--log-level", "warning"],
+            env=env, stdout=subprocess.DEVNULL,
+        ))
+        _wait_until_up(f"{app_url}/")
+
+        print(f"\n가짜 LLM 지연 {args.latency:.3f}s, 단계별 요청 {args.requests}건")
+        print(f"{'동시성':>6} {'처리량(req/s)':>14} {'p50(s)':>8} {'p99(s)':>8} {'오류':>5}")
+        for concurrency in args.concurrency:
+            result = asyncio.run(_run_level(app_url, concurrency, args.requests))
+            print(f"{result['concurrency']:>6} {result['throughput_rps']:>14.2f} "
+                  f"{result['p50_s']:>8.3f} {result['p99_s']:>8.3f} {result['errors']:>5}")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
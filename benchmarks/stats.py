@@ -0,0 +1,14 @@
+"""
+벤치마크 공용 통계 함수
+모든 벤치마크가 같은 정의로 지연 백분위수(p50/p95/p99)를 계산하도록 한 곳에 둡니다.
+"""
+import math
+from typing import Sequence
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """최근접 순위(nearest-rank) 백분위수. `q`는 0~1이며, 표본이 없으면 nan을 반환합니다."""
+    if len(samples) == 0:
+        return float("nan")
+    ordered = sorted(samples)
+    return float(ordered[max(0, math.ceil(q * len(ordered)) - 1)])
@@ -0,0 +1,267 @@
+"""
+오프라인 전체 파이프라인 벤치마크 모음
+
+네트워크 없이 결정적인 가짜 채팅/임베딩 모델(지연 시간 지정 가능)로 다음을 측정하고 JSON으로 저장합니다.
+- 인덱스 빌드 처리량 (가짜 PDF -> 파싱/분할/임베딩/저장)
+- 리트리버 콜드(디스크에서 로드)/웜(로드된 인덱스 재사용) 로드 시간
+- 재질문/정상/재검색 경로별 노드 지연과 전체 지연
+- 동시 실행 수별 처리량
+
+커밋 간 비교는 이전 결과 파일을 `--compare`로 넘기면 지표별 변화율을 출력합니다.
+
+실행:
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --output bench_new.json --compare bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings, write_fake_pdf
+from benchmarks.stats import percentile
+
+from app.ai.agent import build_agent_workflow
+from app.config import settings
+from app.rag import chain
+from app.rag.embeddings import EmbeddingSpec
+from app.rag.ingest import rebuild_vector_store
+from app.rag.retriever import VectorStoreRegistry, vector_store_registry
+from app.services.agent_service import create_initial_state
+
+PATHS = {
+    # 경로 이름: (질문 분석 결과, 품질 평가 결과)
+    "clarification": ("insufficient", "sufficient"),
+    "happy": ("sufficient", "sufficient"),
+    "retry": ("sufficient", "insufficient"),
+}
+QUESTION = "7월 20일 오후 3시 강남구 테헤란로 123 앞에 불법 주차된 차량을 신고합니다."
+ARTICLE = ("Article {n} (Parking restrictions) No driver shall stop or park a vehicle at an intersection, "
+           "a crosswalk, a railroad crossing or on the sidewalk of a road where the sidewalk and the roadway "
+           "are separated. The head of the local government may designate additional restricted zones. ")
+FAKE_EMBEDDING = EmbeddingSpec("fake", "deterministic-fake", 256)
+
+
+class NodeTimer(BaseCallbackHandler):
+    """그래프 노드(이름이 노드 이름과 같은 실행)의 시작~종료 시간을 노드별로 모읍니다."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._started = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        if kwargs.get("name") and kwargs.get("name") == (metadata or {}).get("langgraph_node"):
+            # 그래프가 노드를 감싼 실행과 노드 함수 실행이 같은 이름이므로 바깥 실행만 셉니다.
+            parent = self._started.get(kwargs.get("parent_run_id"))
+            if parent is None or parent[0] != kwargs["name"]:
+                self._started[run_id] = (kwargs["name"], time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started:
+            self.samples[started[0]].append((time.perf_counter() - started[1]) * 1000)
+
+
+def _summary(samples: List[float]) -> dict:
+    return {
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": percentile(samples, 0.50),
+        "p95_ms": percentile(samples, 0.95),
+    }
+
+
+def bench_build(directory: str, files: int, pages: int, embed_latency: float) -> dict:
+    """가짜 법령 PDF로 Vector Store를 새로 만들고 빌드 처리량을 측정합니다."""
+    laws_dir = os.path.join(directory, "laws")
+    os.makedirs(laws_dir)
+    for i in range(files):
+        texts = ["".join(ARTICLE.format(n=i * 1000 + p * 10 + j) for j in range(12)) for p in range(pages)]
+        write_fake_pdf(os.path.join(laws_dir, f"law_{i}.pdf"), texts)
+
+    embeddings = FakeEmbeddings(size=FAKE_EMBEDDING.dimension, latency=embed_latency)
+    store_dir = os.path.join(directory, "vector_store")
+    start = time.perf_counter()
+    vector_store = rebuild_vector_store(embeddings, laws_dir, store_dir, FAKE_EMBEDDING)
+    seconds = time.perf_counter() - start
+    chunks = vector_store.index.ntotal
+    return {
+        "files": files,
+        "pages": files * pages,
+        "chunks": chunks,
+        "seconds": seconds,
+        "chunks_per_second": chunks / seconds,
+        "embedding_calls": embeddings.calls,
+        "store_dir": store_dir,
+    }
+
+
+def bench_retriever_load(store_dir: str, repeats: int) -> dict:
+    """새 레지스트리의 첫 `get_retriever`(디스크 로드)와 이후 호출(재사용) 시간을 측정합니다."""
+    embeddings = FakeEmbeddings(size=FAKE_EMBEDDING.dimension)
+    cold, warm = [], []
+    for _ in range(repeats):
+        registry = VectorStoreRegistry(path=store_dir, embedding_spec=FAKE_EMBEDDING)
+        registry._embeddings = embeddings
+        start = time.perf_counter()
+        registry.get_retriever()
+        cold.append((time.perf_counter() - start) * 1000)
+        for _ in range(100):
+            start = time.perf_counter()
+            registry.get_retriever()
+            warm.append((time.perf_counter() - start) * 1000)
+    return {"cold": _summary(cold), "warm": _summary(warm)}
+
+
+def bench_paths(store_dir: str, iterations: int, llm_latency: float) -> dict:
+    """경로별로 그래프를 반복 실행하여 노드 지연과 전체 지연, LLM 호출 수를 측정합니다."""
+    registry = VectorStoreRegistry(path=store_dir, embedding_spec=FAKE_EMBEDDING)
+    registry._embeddings = FakeEmbeddings(size=FAKE_EMBEDDING.dimension)
+    vector_store_registry.use_vector_store(registry.get_vector_store())
+    agent = build_agent_workflow()
+
+    results = {}
+    for name, (question_assessment, quality_assessment) in PATHS.items():
+        model = FakeChatModel(latency=llm_latency, question_assessment=question_assessment,
+                              quality_assessment=quality_assessment)
+        chain.set_llm(model)
+        timer = NodeTimer()
+        total = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            agent.invoke(create_initial_state(QUESTION), {"callbacks": [timer]})
+            total.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            "end_to_end": _summary(total),
+            "llm_calls_per_run": len(model.calls) / iterations,
+            "nodes": {node: _summary(samples) for node, samples in timer.samples.items()},
+        }
+    return results
+
+
+def bench_concurrency(levels: List[int], requests_per_level: int, llm_latency: float) -> list:
+    """정상 경로를 동시 실행 수별로 `ainvoke`하여 처리량을 측정합니다. (bench_paths 이후 실행)"""
+    chain.set_llm(FakeChatModel(latency=llm_latency))
+    agent = build_agent_workflow()
+
+    async def run(level: int) -> float:
+        semaphore = asyncio.Semaphore(level)
+
+        async def one():
+            async with semaphore:
+                await agent.ainvoke(create_initial_state(QUESTION))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests_per_level)))
+        return time.perf_counter() - start
+
+    results = []
+    for level in levels:
+        seconds = asyncio.run(run(level))
+        results.append({"concurrency": level, "seconds": seconds, "requests_per_second": requests_per_level / seconds})
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def _flatten(value, prefix: str = "") -> Dict[str, float]:
+    """중첩된 결과를 `a.b.c` 키의 숫자 지표로 펼칩니다. (목록은 concurrency 값을 키로 사용)"""
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}{key}."))
+    elif isinstance(value, list):
+        for item in value:
+            metrics = {key: metric for key, metric in item.items() if key != "concurrency"}
+            flat.update(_flatten(metrics, f"{prefix}{item['concurrency']}."))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix.rstrip(".")] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """두 결과의 같은 지표를 비교하여 변화율을 출력합니다. (지연 지표는 증가, 처리량 지표는 감소가 회귀)"""
+    before, after = _flatten(baseline["results"]), _flatten(current["results"])
+    print(f"\n비교: {baseline['meta'].get('commit') or '이전'} -> {current['meta'].get('commit') or '현재'}")
+    for key in sorted(before.keys() & after.keys()):
+        if not before[key]:
+            continue
+        change = (after[key] - before[key]) / before[key]
+        worse = change < 0 if key.endswith("per_second") else change > 0
+        mark = "⚠️" if worse and abs(change) >= 0.1 and (key.endswith("_ms") or key.endswith("per_second")) else "  "
+        print(f"{mark} {key:<60} {before[key]:>10.3f} -> {after[key]:>10.3f} ({change:+.1%})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="오프라인 전체 파이프라인 벤치마크")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="비교할 이전 결과 파일")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="가짜 LLM 호출당 지연(초)")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="가짜 임베딩 배치당 지연(초)")
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--requests", type=int, default=64, help="동시 실행 측정의 단계별 요청 수")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        build = bench_build(tmp_dir, args.files, args.pages, args.embed_latency)
+        store_dir = build.pop("store_dir")
+        retriever_load = bench_retriever_load(store_dir, repeats=5)
+        paths = bench_paths(store_dir, args.iterations, args.llm_latency)
+        concurrency = bench_concurrency([int(level) for level in args.concurrency.split(",")],
+                                        args.requests, args.llm_latency)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+            "settings": {
+                "RETRIEVER_MODE": settings.RETRIEVER_MODE,
+                "FAISS_INDEX_TYPE": settings.FAISS_INDEX_TYPE,
+                "DOCSTORE_FORMAT": settings.DOCSTORE_FORMAT,
+                "CONTEXT_PACKING_ENABLED": settings.CONTEXT_PACKING_ENABLED,
+            },
+        },
+        "results": {
+            "build": build,
+            "retriever_load": retriever_load,
+            "paths": paths,
+            "concurrency": concurrency,
+        },
+    }
+    with open(args.output, "w", encoding="utf8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n📊 빌드: 청크 {build['chunks']}개, {build['chunks_per_second']:.0f} chunks/s")
+    print(f"📊 리트리버 로드: 콜드 {retriever_load['cold']['p50_ms']:.1f}ms, 웜 {retriever_load['warm']['p50_ms']:.4f}ms")
+    for name, result in paths.items():
+        print(f"📊 {name:<14} 전체 p50 {result['end_to_end']['p50_ms']:.1f}ms, LLM 호출 {result['llm_calls_per_run']:.0f}회")
+    for result in concurrency:
+        print(f"📊 동시 실행 {result['concurrency']:>3}: {result['requests_per_second']:.1f} req/s")
+    print(f"결과를 '{args.output}'에 저장했습니다.")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+FAISS 인덱스 유형/검색 파라미터 튜닝 도구
+
+저장된 Flat 인덱스(또는 합성 벡터)에서 일부 벡터를 질의용으로 떼어 두고(held-out),
+나머지로 인덱스 유형별 인덱스를 만든 뒤 nprobe/efSearch를 바꿔 가며 다음을 측정합니다.
+- recall@5: Flat(정확 검색) 결과 대비 상위 5개 일치율
+- 질의 1건의 검색 지연 p50/p99 (단일 스레드)
+- 인덱스를 메모리 맵으로 열었을 때와 전체 로드했을 때의 상주 메모리(별도 프로세스에서 측정)
+
+실행:
+    python -m benchmarks.tune_faiss_index                       # data/vector_store/faiss_index 사용
+    python -m benchmarks.tune_faiss_index --synthetic 50000 --dimension 1536
+    python -m benchmarks.tune_faiss_index --types IVF-Flat HNSW --json results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks.stats import percentile
+
+from app.config import settings
+from app.rag.faiss_index import FLAT_INDEX_FILE, INDEX_TYPES, IndexSpec, create_index, flat_vectors, read_index
+
+NPROBE_SWEEP = [1, 2, 4, 8, 16, 32, 64, 128]
+EF_SEARCH_SWEEP = [16, 32, 64, 128, 256]
+TOP_K = 5
+
+
+def _synthetic_vectors(count: int, dimension: int, seed: int = 42) -> np.ndarray:
+    """임베딩처럼 군집을 이루는 정규화된 합성 벡터를 만듭니다."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(count // 100, 1), dimension)).astype(np.float32)
+    vectors = centers[rng.integers(len(centers), size=count)] + 0.3 * rng.standard_normal((count, dimension))
+    vectors = vectors.astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def _rss_kb() -> dict:
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon", "RssFile")):
+                name, value, _ = line.split()
+                values[name.rstrip(":")] = int(value)
+    return values
+
+
+def _measure_memory(path: str, mmap: bool, index_type: str, queries: np.ndarray) -> dict:
+    """새 프로세스에서 인덱스를 열고 질의를 실행한 뒤 늘어난 상주 메모리(MB)를 잽니다."""
+    before = _rss_kb()
+    index = read_index(path, mmap, IndexSpec(index_type=index_type))
+    index.search(queries, TOP_K)
+    after = _rss_kb()
+    return {name: (after[name] - before[name]) / 1024 for name in after}
+
+
+def _latencies(index: faiss.Index, queries: np.ndarray):
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], TOP_K)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(ids[0])
+    return np.asarray(timings), np.asarray(results)
+
+
+def _recall(results: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(r) & set(t)) / TOP_K for r, t in zip(results, truth)]))
+
+
+def _sweep(spec: IndexSpec, index: faiss.Index):
+    if isinstance(index, faiss.IndexIVF):
+        return "nprobe", [n for n in NPROBE_SWEEP if n <= index.nlist]
+    if isinstance(index, faiss.IndexHNSW):
+        return "efSearch", EF_SEARCH_SWEEP
+    return None, [None]
+
+
+def _set_param(index: faiss.Index, name: str, value: int) -> None:
+    if name == "nprobe":
+        index.nprobe = value
+    elif name == "efSearch":
+        index.hnsw.efSearch = value
+
+
+def load_base_vectors(path: str) -> np.ndarray:
+    return flat_vectors(faiss.read_index(os.path.join(path, FLAT_INDEX_FILE)))
+
+
+def run(vectors: np.ndarray, index_types, query_count: int) -> list:
+    faiss.omp_set_num_threads(1)
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(vectors))
+    queries, base = vectors[order[:query_count]], vectors[order[query_count:]]
+    print(f"기준 벡터 {len(base)}개 / 질의 {len(queries)}개 / 차원 {base.shape[1]}")
+
+    flat = faiss.IndexFlatL2(base.shape[1])
+    flat.add(base)
+    _, truth = flat.search(queries, TOP_K)
+
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir, context.Pool(1, maxtasksperchild=1) as pool:
+        for index_type in index_types:
+            spec = IndexSpec.from_settings()
+            spec.index_type = index_type
+            build_started = time.perf_counter()
+            index = create_index(spec, base)
+            build_seconds = time.perf_counter() - build_started
+            path = os.path.join(tmp_dir, f"{index_type}.faiss")
+            faiss.write_index(index, path)
+            memory = {
+                "mmap": pool.apply(_measure_memory, (path, True, index_type, queries)),
+                "full": pool.apply(_measure_memory, (path, False, index_type, queries)),
+            }
+
+            param, values = _sweep(spec, index)
+            for value in values:
+                _set_param(index, param, value)
+                timings, results = _latencies(index, queries)
+                rows.append({
+                    "index_type": index_type,
+                    "param": param,
+                    "value": value,
+                    "recall_at_5": _recall(results, truth),
+                    "p50_ms": percentile(timings, 0.50),
+                    "p99_ms": percentile(timings, 0.99),
+                    "build_seconds": build_seconds,
+                    "file_mb": os.path.getsize(path) / 2 ** 20,
+                    "rss_anon_mb_full": memory["full"].get("RssAnon", 0.0),
+                    "rss_anon_mb_mmap": memory["mmap"].get("RssAnon", 0.0),
+                    "rss_file_mb_mmap": memory["mmap"].get("RssFile", 0.0),
+                })
+    return rows
+
+
+def print_rows(rows: list) -> None:
+    print(f"\n{'유형':<9} {'파라미터':<13} {'recall@5':>8} {'p50(ms)':>8} {'p99(ms)':>8} {'빌드(s)':>7} "
+          f"{'파일(MB)':>8} {'RSS 전체(MB)':>12} {'RSS mmap(MB)':>12}")
+    for row in rows:
+        param = f"{row['param']}={row['value']}" if row["param"] else "-"
+        print(f"{row['index_type']:<9} {param:<13} {row['recall_at_5']:>8.3f} {row['p50_ms']:>8.3f} "
+              f"{row['p99_ms']:>8.3f} {row['build_seconds']:>7.2f} {row['file_mb']:>8.1f} "
+              f"{row['rss_anon_mb_full']:>12.1f} {row['rss_anon_mb_mmap']:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 유형/검색 파라미터 튜닝")
+    parser.add_argument("--path", default=settings.VECTOR_STORE_PATH)
+    parser.add_argument("--synthetic", type=int, help="저장된 인덱스 대신 사용할 합성 벡터 수")
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = _synthetic_vectors(args.synthetic, args.dimension)
+    else:
+        vectors = load_base_vectors(args.path)
+    rows = run(vectors, args.types, min(args.queries, len(vectors) // 5))
+    print_rows(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f"\n결과를 '{args.json}'에 저장했습니다.")
+
+
+if __name__ == "__main__":
+    main()